@@ -9,7 +9,7 @@ Hey there! This is a modern ISEE-style runner thingy:
 - Buttons have hover/pressed states, and click is on mouse-up inside the button (feels better, trust me)
 - Exam & Practice modes (pill toggle); Practice mode lets you "Skip to Next Section" if there's time left or it's untimed
 - Section Lobby, Section screen w/ choices, keyboard shortcuts, timer, the works
-- Results screen lets you save TXT or export JSON
+- Results screen lets you save TXT or export JSON; every finished attempt also lands in History (SQLite, in the user data dir)
 - You can drag-and-drop .json files anywhere to load 'em
 - Toasts are animated: slide up, hang for 4s, slide down; only show for big stuff (load/save/export); you can click to dismiss
 - Exam Builder: make/edit sections/items; Save As... uses native dialog if possible, or falls back to a regular save
@@ -19,7 +19,14 @@ Hey there! This is a modern ISEE-style runner thingy:
 import os
 import sys
 import json
+import time
 import datetime
+import bisect
+import struct
+import re
+import math
+import heapq
+from collections import OrderedDict, deque, Counter
 
 #
 # --- EARLY crash logger (has to go before pygame import or stuff blows up) ---
@@ -61,6 +68,7 @@ _install_crash_logger_early()
 
 #
 # Try importing pygame (or pygame-ce) with error capture (so it doesn't just explode on import)
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # its hello banner would end up in exports piped to stdout
 try:
     import pygame  # standard package
 except Exception as _pg_ex_primary:
@@ -132,6 +140,8 @@ def _base_dir():
 
 #
 # Helper to get a per-user writable data dir (so we don't mess up system files)
+_DATA_DIR_OVERRIDE = None  # set by --bench so a run never touches the user's settings/history/cache
+
 def _user_data_dir():
     """
     Returns a writable per-user data directory and makes sure it exists.
@@ -139,6 +149,7 @@ def _user_data_dir():
     Windows: %APPDATA%/Testify
     Linux: ~/.local/share/testify
     """
+    if _DATA_DIR_OVERRIDE: return _DATA_DIR_OVERRIDE
     try:
         if sys.platform == "darwin":
             p = os.path.expanduser("~/Library/Application Support/Testify")
@@ -186,7 +197,12 @@ DEFAULT_SETTINGS = {
     "mode": "exam",            # exam | practice
     "goal_overall": 85,        # not really used, but hey
     "goal_per_section": 80,    # ditto
-    "font_size": 24            # default font size, tweak if you like big text
+    "font_size": 24,           # default font size, tweak if you like big text
+    "idle_render": True,       # sleep between frames when nothing on screen is moving (saves CPU)
+    "dirty_rects": True,       # only repaint the parts of the window that changed
+    "prewrap": True,           # after loading an exam, word-wrap all questions/passages in idle time
+    "exam_cache": True,        # keep parsed copies of loaded exams so re-opening them skips JSON parsing
+    "journal": True            # log the attempt in progress so it can be resumed after a crash / quit
 }
 
 def load_settings():
@@ -247,9 +263,168 @@ THEMES = {
     }
 }
 
+#
+# ---------------------------- Caches ----------------------------
+_MISSING = object()  # sentinel for cache lookups where None is a legit cached value
+
+class LRUCache:
+    """Tiny bounded cache (least-recently-used gets kicked out first) with hit/miss counters."""
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.misses_last_frame = 0
+        self._frame_mark = 0
+    def get(self, key, default=None):
+        try:
+            val = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return val
+    def put(self, key, val):
+        self.data[key] = val
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_items:
+            self.data.popitem(last=False)
+        return val
+    def __contains__(self, key):
+        return key in self.data
+    def __len__(self):
+        return len(self.data)
+    def clear(self):
+        self.data.clear()
+    def end_frame(self):
+        """Remember how many misses the frame that just ended had."""
+        self.misses_last_frame = self.misses - self._frame_mark
+        self._frame_mark = self.misses
+    def stats(self):
+        total = self.hits + self.misses
+        return {"size": len(self.data), "max": self.max_items, "hits": self.hits, "misses": self.misses,
+                "misses_last_frame": self.misses_last_frame, "hit_rate": (self.hits / total) if total else 0.0}
+
+#
+# ---------------------------- Dirty regions ----------------------------
+class DirtyRegions:
+    """
+    Widgets report the screen areas they changed here (hover, press, selection, timer, toast).
+    The next frame only repaints those (clipped) and pushes them with display.update(rects).
+    Anything bigger (screen switch, resize, theme...) just invalidates the whole window.
+    """
+    def __init__(self):
+        self.rects = []
+        self.full = True
+    def add(self, rect):
+        if rect is not None:
+            self.rects.append(pygame.Rect(rect))
+    def invalidate(self):
+        self.full = True
+    def pending(self):
+        return self.full or bool(self.rects)
+    def take(self):
+        """Returns None for 'repaint everything', otherwise the list of changed rects (can be empty)."""
+        rects, full = self.rects, self.full
+        self.rects = []; self.full = False
+        return None if full else rects
+
+DIRTY = DirtyRegions()
+
+#
+# ---------------------------- Profiling ----------------------------
+class FrameProfiler:
+    """
+    Opt-in frame instrumentation (F3 in the app, or TESTIFY_PROFILE=1 in the environment).
+    - phases: time per screen (scr_*), event dispatch, display flip/update, clock.tick wait
+    - counters: font.render calls, image loads, Surface allocations (these always count, it's just an int)
+    - rolling p50/p99 frame times for the overlay
+    - while on, writes one JSON line per second to testify_perf.jsonl in the user data dir
+    """
+    COUNTERS = ("font_render", "image_load", "surface_alloc")
+
+    def __init__(self, window=240):
+        self.enabled = os.environ.get("TESTIFY_PROFILE", "") not in ("", "0")
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.frame_ms = deque(maxlen=window)   # work time per frame (no idle waiting)
+        self.phases = {}                       # phase -> ms in the current frame
+        self.last_phases = {}
+        self.last_counts = dict.fromkeys(self.COUNTERS, 0)
+        self._frame_start_counts = dict(self.counts)
+        self._sec = {"t0": time.perf_counter(), "frames": 0, "phases": {}, "counts": dict(self.counts)}
+        self.state_name = ""
+
+    def count(self, what, n=1):
+        self.counts[what] += n
+
+    def add(self, phase, ms):
+        self.phases[phase] = self.phases.get(phase, 0.0) + ms
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame_ms.clear()
+
+    def end_frame(self, work_ms):
+        self.frame_ms.append(work_ms)
+        self.last_phases = self.phases; self.phases = {}
+        self.last_counts = {k: self.counts[k] - self._frame_start_counts[k] for k in self.COUNTERS}
+        self._frame_start_counts = dict(self.counts)
+        if not self.enabled: return
+        sec = self._sec; sec["frames"] += 1
+        for k, v in self.last_phases.items():
+            sec["phases"][k] = sec["phases"].get(k, 0.0) + v
+        now = time.perf_counter()
+        if now - sec["t0"] >= 1.0:
+            self.export(now)
+
+    def percentile(self, q):
+        if not self.frame_ms: return 0.0
+        vals = sorted(self.frame_ms)
+        return vals[min(len(vals)-1, int(q/100.0 * len(vals)))]
+
+    def export(self, now=None):
+        """Append the last second's numbers to testify_perf.jsonl (one JSON object per line)."""
+        now = now or time.perf_counter()
+        sec = self._sec; n = max(1, sec["frames"])
+        rec = {
+            "ts": datetime.datetime.now().isoformat(timespec="seconds"),
+            "version": VERSION, "screen": self.state_name,
+            "frames": sec["frames"], "seconds": round(now - sec["t0"], 3),
+            "p50_ms": round(self.percentile(50), 3), "p99_ms": round(self.percentile(99), 3),
+            "phase_avg_ms": {k: round(v/n, 3) for k, v in sec["phases"].items()},
+            "counts": {k: self.counts[k] - sec["counts"][k] for k in self.COUNTERS},
+        }
+        self._sec = {"t0": now, "frames": 0, "phases": {}, "counts": dict(self.counts)}
+        try:
+            with open(os.path.join(_user_data_dir(), "testify_perf.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+        except Exception:
+            pass
+
+    def overlay_rect(self, W):
+        return pygame.Rect(W-300, 80, 290, 16 + 18*6)  # 2 summary lines + events/screen/flip/tick
+
+    def draw(self, surf, fonts, theme):
+        """Draw the HUD in the top-right corner; returns the rect it covered."""
+        r = self.overlay_rect(surf.get_width())
+        pygame.draw.rect(surf, (0,0,0), r, border_radius=8)
+        f = fonts["mono"]
+        lines = [f"frame p50 {self.percentile(50):6.2f}ms  p99 {self.percentile(99):6.2f}ms",
+                 f"render {self.last_counts['font_render']}  img {self.last_counts['image_load']}  surf {self.last_counts['surface_alloc']}"]
+        lines += [f"{k:<14}{v:8.2f}ms" for k, v in sorted(self.last_phases.items())][:4]
+        y = r.y + 8
+        for ln in lines:
+            img = f.render(ln, True, (120,255,160))  # not draw_text, so the HUD doesn't count itself
+            surf.blit(img, (r.x+10, y)); y += 18
+        return r
+
+PROF = FrameProfiler()
+
 #
 # ---------------------------- Assets & Icons ----------------------------
 def load_img(path):
+    PROF.count("image_load")
     try:
         return pygame.image.load(path).convert_alpha()
     except Exception:
@@ -299,17 +474,78 @@ def set_window_icon():
             # If Cocoa/PyObjC isn't present, ignore — .icns will still show the right Dock icon if you package as .app anyway
             pass
 
+class IconRegistry:
+    """
+    Keeps icons from assets/icons decoded once instead of hitting the disk every frame.
+    - originals get decoded on first use (or all at once with preload())
+    - scaled copies live in a bounded cache keyed by (name, size)
+    - missing icons are remembered too, so we don't keep poking the filesystem for them
+    - build_atlas(size) packs every icon at that size into one surface (handy for fewer surfaces around)
+    """
+    def __init__(self, folder=None, max_scaled=128):
+        self.folder = folder
+        self._src = {}                      # name -> Surface or None (None = missing)
+        self._scaled = LRUCache(max_scaled)  # (name, size) -> Surface or None
+        self._atlas = {}                    # size -> (Surface, {name: Rect})
+    def _dir(self):
+        return self.folder or os.path.join(_base_dir(), "assets", "icons")
+    def names(self):
+        try:
+            return sorted(f[:-4] for f in os.listdir(self._dir()) if f.lower().endswith(".png"))
+        except Exception:
+            return []
+    def source(self, name):
+        if name not in self._src:
+            self._src[name] = load_img(os.path.join(self._dir(), f"{name}.png"))
+        return self._src[name]
+    def preload(self):
+        for nm in self.names():
+            self.source(nm)
+    def get(self, name, size):
+        key = (name, size)
+        img = self._scaled.get(key, _MISSING)
+        if img is not _MISSING:
+            return img
+        atlas = self._atlas.get(size)
+        if atlas and name in atlas[1]:
+            img = atlas[0].subsurface(atlas[1][name])
+        else:
+            src = self.source(name)
+            img = pygame.transform.smoothscale(src, (size,size)).convert_alpha() if src else None
+            if img is not None: PROF.count("surface_alloc")
+        return self._scaled.put(key, img)
+    def build_atlas(self, size, names=None):
+        """Pack icons of one size into a single surface; get() hands out subsurfaces of it afterwards."""
+        found = [nm for nm in (names or self.names()) if self.source(nm) is not None]
+        if not found:
+            return None
+        cols = max(1, int(len(found) ** 0.5 + 0.999))
+        rows = (len(found) + cols - 1) // cols
+        sheet = pygame.Surface((cols*size, rows*size), pygame.SRCALPHA)
+        PROF.count("surface_alloc")
+        rects = {}
+        for i, nm in enumerate(found):
+            r = pygame.Rect((i % cols)*size, (i // cols)*size, size, size)
+            sheet.blit(pygame.transform.smoothscale(self.source(nm), (size,size)), r.topleft)
+            rects[nm] = r
+        self._atlas[size] = (sheet.convert_alpha(), rects)
+        for nm in rects:  # drop stale per-icon copies so they come from the atlas now
+            self._scaled.data.pop((nm, size), None)
+        return self._atlas[size]
+    def clear(self):
+        self._src.clear(); self._scaled.clear(); self._atlas.clear()
+
+ICONS = IconRegistry()
+
 def load_icon(name, size):
-    """Load an icon PNG from assets/icons. If it's missing, just returns None (no placeholder, sorry)"""
-    p = os.path.join(_base_dir(), "assets", "icons", f"{name}.png")
-    img = load_img(p)
-    if not img:
-        return None
-    return pygame.transform.smoothscale(img, (size,size)).convert_alpha()
+    """Get an icon from assets/icons (cached). If it's missing, just returns None (no placeholder, sorry)"""
+    return ICONS.get(name, size)
 
 #
 # ---------------------------- Fonts & Helpers ----------------------------
 def mk_fonts(base_size, custom_path=None):
+    _text_cache.clear()  # new Font objects = old renders are useless
+    _wrap_cache.clear(); _word_w_cache.clear()
     try:
         if custom_path and os.path.isfile(custom_path):
             return {
@@ -331,26 +567,67 @@ def mk_fonts(base_size, custom_path=None):
                  else pygame.font.SysFont(None, max(14, base_size-2)))
     }
 
-def draw_text(s, font, color):
-    return font.render(s, True, color)
+# Rendered text surfaces, keyed by (text, font, color, antialias). Most labels don't change
+# between frames so this saves a font.render per label per frame. Cleared on font/theme change.
+_text_cache = LRUCache(2048)
+
+def draw_text(s, font, color, antialias=True):
+    key = (s, font, tuple(color), antialias)
+    img = _text_cache.get(key)
+    if img is None:
+        PROF.count("font_render")
+        img = _text_cache.put(key, font.render(s, antialias, color))
+    return img
+
+def text_cache_stats():
+    return _text_cache.stats()
+
+# Card shadows keyed by (size, shadow color, radius). Cards only change size on resize,
+# so steady-state frames don't allocate any alpha surfaces. Every miss = one Surface allocation.
+_shadow_cache = LRUCache(64)
+
+
+def fit_text(s, font, width):
+    """s on one line, cut down with … so it renders no wider than width."""
+    s = " ".join(s.split())
+    if font.size(s)[0] <= width: return s
+    lo, hi = 0, len(s)
+    while lo < hi:
+        mid = (lo+hi+1)//2
+        if font.size(s[:mid] + "…")[0] <= width: lo = mid
+        else: hi = mid-1
+    return s[:lo].rstrip() + "…"
+
+def _card_shadow(w, h, color, radius=20):
+    key = (w, h, tuple(color), radius)
+    shadow = _shadow_cache.get(key)
+    if shadow is None:
+        PROF.count("surface_alloc")
+        shadow = pygame.Surface((w, h), pygame.SRCALPHA)
+        pygame.draw.rect(shadow, color, shadow.get_rect(), border_radius=radius)
+        _shadow_cache.put(key, shadow)
+    return shadow
 
 def blit_shadowed_card(screen, rect, theme):
-    shadow = pygame.Surface((rect.width+20, rect.height+20), pygame.SRCALPHA)
-    pygame.draw.rect(shadow, theme["shadow"], shadow.get_rect(), border_radius=20)
-    screen.blit(shadow, (rect.x-10, rect.y-6))
+    screen.blit(_card_shadow(rect.width+20, rect.height+20, theme["shadow"]), (rect.x-10, rect.y-6))
     pygame.draw.rect(screen, theme["panel"], rect, border_radius=16)
 
+def card_cache_stats():
+    """Shadow cache stats; 'misses_last_frame' is how many shadow surfaces the last frame had to allocate."""
+    st = _shadow_cache.stats()
+    st["allocs"] = st["misses"]; st["allocs_last_frame"] = st["misses_last_frame"]
+    return st
+
 def draw_chip(surf, rect, theme):
     pygame.draw.rect(surf, theme["chip"], rect, border_radius=12)
 
 #
 # ---------- Responsive button row layout ----------
-def layout_button_row(container_rect, buttons, theme, fonts, align="center", pad_x=16, pad_y=12, gap=12, min_w=120, max_w=220, h=44):
+def place_button_row(container_rect, buttons, align="center", pad_x=16, pad_y=12, gap=12, min_w=120, max_w=220, h=44):
     """
-    Lay out buttons in a single row at the bottom of container_rect.
+    Lay out buttons in a single row at the bottom of container_rect (no drawing).
     - buttons: list[Button] (their rects get reassigned here)
     - align: 'center' | 'left' | 'right'
-    This also draws the buttons after placing 'em.
     """
     n = len(buttons)
     if n == 0: return
@@ -373,26 +650,84 @@ def layout_button_row(container_rect, buttons, theme, fonts, align="center", pad
     x = start_x
     for b in buttons:
         b.rect = pygame.Rect(int(x), int(y), int(w), int(h))
-        b.draw(pygame.display.get_surface(), theme, fonts)
         x += w + gap_eff
 
-_wrap_cache = {}
+# Wrapped lines keyed by (text, font, width), bounded so resizing all session long doesn't leak.
+_wrap_cache = LRUCache(20000)
+# Word widths per font, so a long passage measures each word once instead of re-measuring the growing line.
+_word_w_cache = LRUCache(50000)
+
+def _word_width(font, w):
+    key = (font, w)
+    ww = _word_w_cache.get(key)
+    if ww is None:
+        ww = _word_w_cache.put(key, font.size(w)[0])
+    return ww
+
 def wrap_lines(s, font, width):
-    # Word wrap helper, but with a tiny cache so it doesn't get slow
-    key = (s, font.get_height(), width)
-    if key in _wrap_cache: return _wrap_cache[key]
+    # Word wrap helper (cached). Summed word widths + binary search give a guess for each break point,
+    # then the joined line is measured both ways (kerning makes the sum drift a few px either way),
+    # so lines come out the same as the plain greedy wrap.
+    key = (s, font, width)
+    out = _wrap_cache.get(key)
+    if out is not None: return out
     words = s.split()
-    out, cur = [], ""
+    sp = _word_width(font, " ")
+    cum = [0]  # cum[k] = width of words[:k], each followed by a space
     for w in words:
-        t = w if not cur else cur+" "+w
-        if font.size(t)[0] <= width:
-            cur = t
-        else:
-            if cur: out.append(cur)
-            cur = w
-    if cur: out.append(cur)
-    _wrap_cache[key] = out
-    return out
+        cum.append(cum[-1] + _word_width(font, w) + sp)
+    out = []
+    i, n = 0, len(words)
+    while i < n:
+        j = bisect.bisect_right(cum, cum[i] + width + sp, i+1) - 1
+        if j <= i: j = i+1  # single word wider than the line gets a line to itself
+        line = " ".join(words[i:j])
+        while j-i > 1 and font.size(line)[0] > width:
+            j -= 1; line = " ".join(words[i:j])
+        while j < n:
+            t = line + " " + words[j]
+            if font.size(t)[0] > width: break
+            line = t; j += 1
+        out.append(line)
+        i = j
+    return _wrap_cache.put(key, out)
+
+def wrap_cache_stats():
+    return _wrap_cache.stats()
+
+_passage_cache = LRUCache(16)  # whole rendered passage blocks
+
+def passage_surface(key, lines, font, color, bg, line_h=26):
+    """
+    A passage's wrapped lines rendered once onto one bg-filled surface (looks the same as blitting
+    the lines one by one onto bg). key identifies the passage, e.g. (passage table, pid).
+    """
+    ck = (key, tuple(lines), font, color, bg)
+    surf = _passage_cache.get(ck)
+    if surf is None:
+        rendered = [draw_text(ln, font, color) for ln in lines]
+        w = max([r.get_width() for r in rendered] + [1])
+        h = line_h*(len(rendered)-1) + max(1, font.get_height())
+        surf = pygame.Surface((w, h)); surf.fill(bg); PROF.count("surface_alloc")
+        for i, r in enumerate(rendered): surf.blit(r, (0, i*line_h))
+        _passage_cache.put(ck, surf)
+    return surf
+
+def iter_prewrap(sections, font, q_width, passage_width):
+    """
+    Wraps every question/passage of an exam into the cache ahead of time, one item per step
+    (it's a generator so the main loop can run it in small slices while it'd be idle anyway).
+    """
+    done = 0; seen = set()
+    for _name, items, _tmin in sections:
+        for it in items:
+            if done >= _wrap_cache.max_items // 2: return  # more wouldn't fit anyway
+            wrap_lines(it.get("q",""), font, q_width)
+            p = it.get("passage")
+            if p and id(p) not in seen:  # shared passages are one string object, wrap them once
+                seen.add(id(p)); wrap_lines(p, font, passage_width)
+            done += 1
+            yield done
 
 #
 # ---------------------------- Widgets ----------------------------
@@ -408,13 +743,19 @@ class Button:
     def handle_event(self, e):
         if not self.enabled: return False
         if e.type == pygame.MOUSEMOTION:
-            self.hover = self.rect.collidepoint(e.pos)
+            hover = self.rect.collidepoint(e.pos)
+            if hover != self.hover: DIRTY.add(self.rect)
+            self.hover = hover
             return False
         if e.type == pygame.MOUSEBUTTONUP and e.button == 1:
+            if self.pressed:
+                self.pressed = False
+                DIRTY.add(self.rect)
             return self.rect.collidepoint(e.pos)
         if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
             if self.rect.collidepoint(e.pos):
                 self.pressed = True
+                DIRTY.add(self.rect)
         return False
 
     def draw(self, surf, theme, fonts):
@@ -510,6 +851,7 @@ class TextInput:
             now = pygame.time.get_ticks()
             if now - self.last_blink > 500:
                 self.show_cursor = not self.show_cursor; self.last_blink = now
+                DIRTY.add(self.rect)
             if self.show_cursor:
                 before = self.text[:self.cursor].split("\n")[-1] if self.multiline else self.text[:self.cursor]
                 cx = fonts["body"].size(before)[0]
@@ -518,25 +860,1887 @@ class TextInput:
                 y = self.rect.y + 6 if self.multiline else self.rect.y + (self.rect.height-cy)//2
                 pygame.draw.line(surf, theme["text"], (x, y), (x, y+cy), 1)
 
+class VirtualList:
+    """
+    Scrollable list of fixed-height rows that only lays out, draws and hit-tests the rows you can see,
+    so a 300-section / 5,000-item list costs the same per frame as a 5-row one.
+    Rows are drawn with a small pool of Buttons (one per visible slot) that get relabeled each frame.
+    - mouse wheel scrolls when the pointer is over it, Up/Down/PgUp/PgDn/Home/End scroll too
+    - the scrollbar thumb can be dragged
+    - handle_event() returns the index of a clicked row (or None)
+    """
+    SCROLLBAR_W = 8
+
+    def __init__(self, row_h=56, gap=8, keys_need_hover=False):
+        self.rect = pygame.Rect(0,0,0,0)
+        self.row_h = row_h
+        self.gap = gap
+        self.keys_need_hover = keys_need_hover  # builder lists shouldn't eat keys meant for text inputs
+        self.count = 0
+        self.scroll = 0            # px from the top of the content
+        self.hover_row = -1
+        self.pressed_row = -1
+        self._drag_dy = None       # offset into the thumb while dragging it
+        self._pool = []
+    # ---- geometry ----
+    @property
+    def pitch(self):
+        return self.row_h + self.gap
+    def content_h(self):
+        return max(0, self.count*self.pitch - self.gap)
+    def max_scroll(self):
+        return max(0, self.content_h() - self.rect.height)
+    def set_rect(self, rect):
+        self.rect = pygame.Rect(rect)
+        self.scroll = min(self.scroll, self.max_scroll())
+    def set_count(self, n):
+        if n != self.count:
+            self.count = n
+            self.scroll = min(self.scroll, self.max_scroll())
+            if self.hover_row >= n: self.hover_row = -1
+    def visible_range(self):
+        if self.count == 0 or self.rect.height <= 0: return range(0)
+        first = self.scroll // self.pitch
+        last = min(self.count, (self.scroll + self.rect.height) // self.pitch + 1)
+        return range(first, last)
+    def row_rect(self, i):
+        w = self.rect.width - (self.SCROLLBAR_W + 6 if self.max_scroll() else 0)
+        return pygame.Rect(self.rect.x, self.rect.y + i*self.pitch - self.scroll, w, self.row_h)
+    def row_at(self, pos):
+        if not self.rect.collidepoint(pos): return -1
+        y = pos[1] - self.rect.y + self.scroll
+        i = y // self.pitch
+        if i >= self.count or (y % self.pitch) >= self.row_h: return -1
+        return i if self.row_rect(i).collidepoint(pos) else -1
+    def _thumb(self):
+        ms = self.max_scroll()
+        if not ms: return None
+        track = pygame.Rect(self.rect.right - self.SCROLLBAR_W, self.rect.y, self.SCROLLBAR_W, self.rect.height)
+        th = max(24, int(track.height * self.rect.height / self.content_h()))
+        ty = track.y + int((track.height - th) * self.scroll / ms)
+        return track, pygame.Rect(track.x, ty, track.width, th)
+    # ---- scrolling ----
+    def scroll_to(self, px):
+        px = max(0, min(self.max_scroll(), int(px)))
+        if px != self.scroll:
+            self.scroll = px
+            DIRTY.add(self.rect)
+    def ensure_visible(self, i):
+        if not (0 <= i < self.count): return
+        top = i*self.pitch
+        if top < self.scroll: self.scroll_to(top)
+        elif top + self.row_h > self.scroll + self.rect.height: self.scroll_to(top + self.row_h - self.rect.height)
+    def _set_hover(self, i):
+        if i != self.hover_row:
+            for j in (self.hover_row, i):
+                if j >= 0: DIRTY.add(self.row_rect(j).clip(self.rect))
+            self.hover_row = i
+    # ---- events ----
+    def handle_event(self, e):
+        if e.type == pygame.MOUSEWHEEL:
+            if self.rect.collidepoint(pygame.mouse.get_pos()):
+                self.scroll_to(self.scroll - e.y*self.pitch)
+            return None
+        if e.type == pygame.MOUSEMOTION:
+            if self._drag_dy is not None:
+                track, thumb = self._thumb() or (None, None)
+                if track is not None and track.height > thumb.height:
+                    frac = (e.pos[1] - self._drag_dy - track.y) / (track.height - thumb.height)
+                    self.scroll_to(frac * self.max_scroll())
+                return None
+            self._set_hover(self.row_at(e.pos))
+            return None
+        if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+            tt = self._thumb()
+            if tt and tt[0].collidepoint(e.pos):
+                track, thumb = tt
+                if thumb.collidepoint(e.pos):
+                    self._drag_dy = e.pos[1] - thumb.y
+                else:  # click on the track = page up/down
+                    self.scroll_to(self.scroll + (self.rect.height if e.pos[1] > thumb.y else -self.rect.height))
+                return None
+            self.pressed_row = self.row_at(e.pos)
+            if self.pressed_row >= 0: DIRTY.add(self.row_rect(self.pressed_row).clip(self.rect))
+            return None
+        if e.type == pygame.MOUSEBUTTONUP and e.button == 1:
+            if self._drag_dy is not None:
+                self._drag_dy = None
+                return None
+            if self.pressed_row >= 0: DIRTY.add(self.row_rect(self.pressed_row).clip(self.rect))
+            self.pressed_row = -1
+            i = self.row_at(e.pos)
+            return i if i >= 0 else None
+        if e.type == pygame.KEYDOWN:
+            if self.keys_need_hover and not self.rect.collidepoint(pygame.mouse.get_pos()):
+                return None
+            step = {pygame.K_UP: -self.pitch, pygame.K_DOWN: self.pitch,
+                    pygame.K_PAGEUP: -self.rect.height, pygame.K_PAGEDOWN: self.rect.height}.get(e.key)
+            if step is not None: self.scroll_to(self.scroll + step)
+            elif e.key == pygame.K_HOME: self.scroll_to(0)
+            elif e.key == pygame.K_END: self.scroll_to(self.max_scroll())
+        return None
+    # ---- drawing ----
+    def draw(self, surf, theme, fonts, row_info, selected=-1, paint=None):
+        """
+        row_info(i) -> (label, icon, enabled) for a visible row i.
+        'selected' gets an accent outline (builder lists).
+        paint(surf, rect, i) draws rows itself instead of as buttons (tables); row_info isn't used then.
+        """
+        rows = self.visible_range()
+        while paint is None and len(self._pool) < len(rows):
+            self._pool.append(Button((0,0,0,0), ""))
+        old_clip = surf.get_clip()
+        surf.set_clip(old_clip.clip(self.rect))
+        for slot, i in enumerate(rows):
+            if paint is not None:
+                paint(surf, self.row_rect(i), i); continue
+            b = self._pool[slot]
+            b.rect = self.row_rect(i)
+            b.label, b.icon, b.enabled = row_info(i)
+            b.hover = (i == self.hover_row); b.pressed = (i == self.pressed_row)
+            if i == selected:
+                pygame.draw.rect(surf, theme["accent"], b.rect, 3, border_radius=12)
+            b.draw(surf, theme, fonts)
+        tt = self._thumb()
+        if tt:
+            track, thumb = tt
+            pygame.draw.rect(surf, theme["chip"], track, border_radius=4)
+            pygame.draw.rect(surf, theme["accent"] if self._drag_dy is not None else theme["muted"], thumb, border_radius=4)
+        surf.set_clip(old_clip)
+
+class Widgets:
+    """
+    Retained widgets for one screen. Screens build these once and keep drawing/hit-testing
+    the same objects (so hover/pressed state sticks around); they only get rebuilt when
+    the screen's layout key changes (resize, font change, different content).
+    """
+    def __init__(self, key):
+        self.key = key
+        self.buttons = []  # drawn + hit-tested every frame, in this order
+    def carry_over(self, old):
+        """Keep hover/pressed from the previous build for buttons that still exist (same attribute name)."""
+        if old is None: return
+        for nm, w in vars(self).items():
+            prev = getattr(old, nm, None)
+            if isinstance(w, Button) and isinstance(prev, Button) and w.rect == prev.rect:
+                w.hover = prev.hover; w.pressed = prev.pressed
+    def draw(self, surf, theme, fonts):
+        for b in self.buttons:
+            b.draw(surf, theme, fonts)
+
+#
+# ---------------------------- Exam model ----------------------------
+# Compact in-memory exam: one slotted object per item instead of a 4-key dict, choices as tuples,
+# answer letters / short choice texts interned. Items still answer it["q"] / it.get("q","") like
+# the dicts they replace, and sections still unpack as  name, items, tmin = sec.
+class Item:
+    __slots__ = ("q", "choices", "ans", "passage", "pid", "extra")
+    KEYS = ("q", "choices", "ans", "passage")
+
+    def __init__(self, q="", choices=(), ans="", passage="", pid=0, extra=None):
+        self.q = q
+        self.choices = tuple(_intern_short(c) for c in choices)
+        self.ans = sys.intern(ans) if isinstance(ans, str) else ans
+        self.passage = passage
+        self.pid = pid  # id of the passage in its exam's passage table (0 = none)
+        self.extra = extra  # any other keys the item had ("explanation", ...), kept as-is; None if there weren't any
+
+    @classmethod
+    def from_dict(cls, d, passages=None):
+        """passages: PassageTable to share the passage text through (and to take the pid from)."""
+        text = d.get("passage","")
+        pid = 0
+        if passages is not None: pid, text = passages.add(text)
+        extra = {k: v for k, v in d.items() if k not in Item.KEYS and k != "passage_id"} or None
+        return cls(d.get("q",""), d.get("choices",[]) or (), d.get("ans",""), text, pid, extra)
+
+    def to_dict(self):
+        d = {"q": self.q, "choices": list(self.choices), "ans": self.ans, "passage": self.passage}
+        if self.extra: d.update(self.extra)
+        return d
+
+    def get(self, key, default=None):
+        if key in Item.KEYS: return getattr(self, key)
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key):
+        if key in Item.KEYS: return getattr(self, key)
+        if self.extra and key in self.extra: return self.extra[key]
+        raise KeyError(key)
+
+    def __repr__(self):
+        return f"Item({str(self.q)[:30]!r}, ans={self.ans!r})"
+
+def _intern_short(x):
+    # choice texts like "True", "4", "none of these" repeat all over a bank; long ones rarely do
+    return sys.intern(x) if isinstance(x, str) and len(x) <= 32 else x
+
+class Section:
+    """
+    name / items / time_minutes; iterates and indexes like the old [name, items, tmin] list.
+    passages: whatever the items' pids refer to (the exam's PassageTable, or its CompiledExam).
+    """
+    __slots__ = ("name", "items", "time_minutes", "passages")
+
+    def __init__(self, name, items, time_minutes=None, passages=None):
+        self.name, self.items, self.time_minutes, self.passages = name, items, time_minutes, passages
+
+    def __iter__(self):
+        return iter((self.name, self.items, self.time_minutes))
+
+    def __getitem__(self, i):
+        return (self.name, self.items, self.time_minutes)[i]
+
+    def __len__(self):
+        return 3
+
+class AnswerSheet:
+    """One section's answers in a bytearray (0 = unanswered, else the letter's byte). Indexes like a list of letter/None."""
+    __slots__ = ("_b",)
+
+    def __init__(self, n):
+        self._b = bytearray(n)
+
+    def __len__(self):
+        return len(self._b)
+
+    def __getitem__(self, i):
+        c = self._b[i]
+        return _ANSWER_LETTERS[c] if c else None
+
+    def __setitem__(self, i, letter):
+        self._b[i] = ord(letter) if letter else 0
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self._b)))
+
+    def to_list(self):
+        return list(self)
+
+    def to_bytes(self):
+        return bytes(self._b)
+
+    @classmethod
+    def from_bytes(cls, b):
+        sheet = cls(0); sheet._b = bytearray(b)
+        return sheet
+
+_ANSWER_LETTERS = [sys.intern(chr(i)) for i in range(256)]
+
+class PassageTable:
+    """
+    Every distinct passage of an exam once. Reading sections repeat the same passage over several
+    items; they all end up holding the one string (and the same pid, which the screens cache by).
+    """
+    def __init__(self):
+        self.texts = [""]
+        self.ids = {"": 0}
+
+    def add(self, text):
+        """(pid, shared text) for this passage text."""
+        pid = self.ids.get(text)
+        if pid is None:
+            pid = self.ids[text] = len(self.texts); self.texts.append(text)
+        return pid, self.texts[pid]
+
+    def __len__(self):
+        return len(self.texts) - 1
+
+def with_shared_passages(data):
+    """
+    Copy of exam JSON where every passage used by more than one item moves into a top-level
+    "passages" table ({"p1": text, ...}) and the items say "passage_id" instead.
+    """
+    counts = {}
+    for sec in data.get("sections", []):
+        for it in sec.get("items", []):
+            p = it.get("passage") or ""
+            if p: counts[p] = counts.get(p, 0) + 1
+    ids = {}
+    for p, n in counts.items():
+        if n > 1: ids[p] = f"p{len(ids)+1}"
+    out = {k: v for k, v in data.items() if k not in ("sections", "passages")}
+    out["passages"] = {pid: p for p, pid in ids.items()}  # ahead of sections so loaders can resolve as they stream
+    out["sections"] = []
+    for sec in data.get("sections", []):
+        sec = dict(sec); items = []
+        for it in sec.get("items", []):
+            p = it.get("passage") or ""
+            if p in ids:
+                it = {k: v for k, v in it.items() if k != "passage"}; it["passage_id"] = ids[p]
+            items.append(it)
+        sec["items"] = items
+        out["sections"].append(sec)
+    return out
+
+def exam_footprint(sections):
+    """Rough bytes held by an exam's model objects (strings counted once). {'sections', 'items', 'bytes'}."""
+    seen = set(); total = 0; n_items = 0
+    def add(o):
+        nonlocal total
+        if id(o) not in seen:
+            seen.add(id(o)); total += sys.getsizeof(o)
+    add(sections)
+    for sec in sections:
+        add(sec)
+        name, items, tmin = sec
+        add(name); add(items)
+        if isinstance(sec, list): add(tmin)
+        for it in items:
+            n_items += 1
+            add(it)
+            if isinstance(it, dict):
+                for k, v in it.items():
+                    add(v)
+                    if isinstance(v, list):
+                        for c in v: add(c)
+            else:
+                add(it.q); add(it.ans); add(it.passage); add(it.choices)
+                for c in it.choices: add(c)
+    return {"sections": len(sections), "items": n_items, "bytes": total}
+
+#
+# ---------------------------- Search ----------------------------
+_WORD_RE = re.compile(r"\w+")
+
+class SearchIndex:
+    """
+    Inverted index over items' question / choices / passage text (builder search).
+    Items are tracked by identity, so update(item) after an edit only re-indexes that one item.
+    """
+    FIELDS = (("q", 3.0), ("choices", 2.0), ("passage", 1.0))  # a hit in the question counts most
+
+    def __init__(self):
+        self.postings = {}  # token -> {doc id: weighted term frequency}
+        self.docs = {}      # doc id -> (item, {token: weighted tf})
+        self.rev = 0        # bumps on every change (so callers know to search again)
+        self._vocab = None  # sorted tokens for prefix lookups; rebuilt when the vocabulary changes
+        self._counts = LRUCache(256)  # text -> token counts, so a passage shared by many items is tokenized once
+
+    @staticmethod
+    def tokens(text):
+        return _WORD_RE.findall(text.lower())
+
+    def _count(self, text):
+        if len(text) < 200: return Counter(SearchIndex.tokens(text))
+        c = self._counts.get(text)
+        if c is None: c = self._counts.put(text, Counter(SearchIndex.tokens(text)))
+        return c
+
+    def _terms(self, it):
+        tf = {}
+        for field, w in SearchIndex.FIELDS:
+            v = it.get(field) or ""
+            if not isinstance(v, str):  # parse_exam lets numbers through (q: 42, choices: [1, 2, 3])
+                v = " ".join(map(str, v)) if isinstance(v, (list, tuple)) else str(v)
+            for t, c in self._count(v).items(): tf[t] = tf.get(t, 0.0) + w*c
+        return tf
+
+    def update(self, it):
+        key = id(it)
+        new = self._terms(it)
+        had = self.docs.get(key)
+        old = had[1] if had else {}
+        if had and old == new: return
+        for t in old:
+            if t not in new:
+                p = self.postings[t]; del p[key]
+                if not p: del self.postings[t]; self._vocab = None
+        for t, w in new.items():
+            p = self.postings.get(t)
+            if p is None: p = self.postings[t] = {}; self._vocab = None
+            p[key] = w
+        self.docs[key] = (it, new); self.rev += 1
+
+    def remove(self, it):
+        had = self.docs.pop(id(it), None)
+        if had is None: return
+        for t in had[1]:
+            p = self.postings[t]; del p[id(it)]
+            if not p: del self.postings[t]; self._vocab = None
+        self.rev += 1
+
+    def clear(self):
+        self.postings.clear(); self.docs.clear(); self._vocab = None; self.rev += 1
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _expand(self, tok, prefix):
+        if not prefix: return [tok] if tok in self.postings else []
+        if self._vocab is None: self._vocab = sorted(self.postings)
+        out = []; i = bisect.bisect_left(self._vocab, tok)
+        while i < len(self._vocab) and self._vocab[i].startswith(tok) and len(out) < 200:
+            out.append(self._vocab[i]); i += 1
+        return out
+
+    def search(self, query, limit=100):
+        """
+        [(item, score)] for items containing every word of query, best first. The last word
+        also matches as a prefix (search-as-you-type), unless the query ends in a space.
+        """
+        toks = SearchIndex.tokens(query)
+        if not toks: return []
+        n = len(self.docs)
+        groups = []  # per query word: [(postings, idf)] of the index words it matches
+        for k, tok in enumerate(toks):
+            terms = self._expand(tok, prefix=(k == len(toks)-1 and not query[-1:].isspace()))
+            if not terms: return []
+            groups.append([(self.postings[t], math.log(1 + n/len(self.postings[t]))) for t in terms])
+        # rarest word first, so the candidate set is as small as it gets right away
+        groups.sort(key=lambda g: sum(len(p) for p, _ in g))
+        scores = None
+        for g in groups:
+            if scores is None:
+                if len(g) == 1:
+                    p, idf = g[0]
+                    scores = {d: idf*w/(w + 1.5) for d, w in p.items()}
+                else:
+                    scores = {}
+                    for p, idf in g:
+                        for d, w in p.items(): scores[d] = scores.get(d, 0.0) + idf*w/(w + 1.5)
+                continue
+            s = {}
+            for d, v in scores.items():
+                add = 0.0
+                for p, idf in g:
+                    w = p.get(d)
+                    if w is not None: add += idf*w/(w + 1.5)
+                if add: s[d] = v + add
+            scores = s
+            if not scores: return []
+        best = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return [(self.docs[d][0], sc) for d, sc in best]
+
+#
+# ---------------------------- Exam IO ----------------------------
+class _JsonStream:
+    """
+    Reads a JSON file a chunk at a time and decodes one value at a time (json raw_decode),
+    so only a window of the file is ever held as text. Used by iter_exam_sections.
+    """
+    _WS = " \t\n\r"
+
+    def __init__(self, f, chunk_size=1 << 20):
+        import codecs
+        self.f = f
+        self.chunk = chunk_size
+        self.dec = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+        self._json = json.JSONDecoder()
+
+    def _more(self, n=None):
+        if self.eof: return False
+        data = self.f.read(n or self.chunk)
+        self.bytes_read += len(data)
+        if not data:
+            self.eof = True
+            self.buf += self.dec.decode(b"", final=True)
+            return False
+        if self.pos > self.chunk:  # drop what we already went through (not on every value, that'd be O(n^2))
+            self.buf = self.buf[self.pos:]; self.pos = 0
+        self.buf += self.dec.decode(data)
+        return True
+
+    def peek(self):
+        """Next non-whitespace char ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self._WS:
+                self.pos += 1
+            if self.pos < len(self.buf): return self.buf[self.pos]
+            if not self._more(): return ""
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return c
+
+    def value(self):
+        """Decode the next complete JSON value, reading more of the file as needed."""
+        self.peek()
+        grow = self.chunk
+        while True:
+            try:
+                val, end = self._json.raw_decode(self.buf, self.pos)
+                # a number right at the end of the buffer might continue in the next chunk
+                if end < len(self.buf) or self.eof or not self._more():
+                    self.pos = end
+                    return val
+            except json.JSONDecodeError:
+                if not self._more(grow): raise
+                grow *= 2  # big section: read bigger pieces so retries stay rare
+
+def iter_exam_sections(path, chunk_size=1 << 20, progress=None):
+    """
+    Streams an exam file section by section: yields a normalized Section (name, items, time_minutes)
+    as soon as each section has been read, without loading the whole document first.
+    progress(bytes_read, total_bytes) gets called after each section if given.
+    Raises ValueError with the same messages parse_exam always had.
+    """
+    try:
+        total = os.path.getsize(path)
+        f = open(path, "rb")
+    except Exception as ex:
+        raise ValueError(f"Invalid JSON: {ex}")
+    with f:
+        st = _JsonStream(f, chunk_size)
+        try:
+            c = st.peek()
+            if c != "{":
+                if c and c in '["-0123456789tfn': raise ValueError("JSON must have a top-level 'sections' array.")
+                raise json.JSONDecodeError("Expecting value", st.buf, st.pos)
+            st.pos += 1
+            found = False
+            passages = PassageTable()
+            refs = None     # the file's "passages" object, once read
+            pending = []    # sections that referenced a passage_id before "passages" showed up
+            if st.peek() == "}":
+                st.pos += 1
+            else:
+                while True:
+                    key = st.value()
+                    st.expect(":")
+                    # json.load keeps the last of a repeated key, but by then we've already yielded
+                    # sections from the first one, so refuse instead of quietly reading a different exam
+                    if (key == "sections" and found) or (key == "passages" and refs is not None):
+                        raise ValueError(f"JSON has more than one top-level {key!r} key.")
+                    if key == "sections":
+                        found = True
+                        if st.peek() != "[":
+                            raise ValueError("JSON must have a top-level 'sections' array.")
+                        st.pos += 1
+                        if st.peek() == "]":
+                            st.pos += 1
+                        else:
+                            while True:
+                                sec = st.value()
+                                if not isinstance(sec, dict):
+                                    raise ValueError("Each section must be a JSON object.")
+                                if pending or (refs is None and _section_has_refs(sec)):
+                                    pending.append(sec)  # hold on to it until the table turns up
+                                else:
+                                    yield _normalize_section(sec, passages, refs)
+                                if progress: progress(st.bytes_read, total)
+                                if st.expect(",]") == "]": break
+                    elif key == "passages":
+                        refs = st.value()
+                        if not isinstance(refs, dict) or not all(isinstance(v, str) for v in refs.values()):
+                            raise ValueError("'passages' must be an object of id -> passage text.")
+                        for sec in pending: yield _normalize_section(sec, passages, refs)
+                        pending = []
+                    else:
+                        st.value()  # something else at the top level, skip it
+                    if st.expect(",}") == "}": break
+            if st.peek() != "":
+                raise json.JSONDecodeError("Extra data", st.buf, st.pos)
+        except json.JSONDecodeError as ex:
+            raise ValueError(f"Invalid JSON: {ex}")
+        except UnicodeDecodeError as ex:
+            raise ValueError(f"Invalid JSON: {ex}")
+        if not found:
+            raise ValueError("JSON must have a top-level 'sections' array.")
+        for sec in pending: yield _normalize_section(sec, passages, refs)  # raises on the dangling passage_id
+        if progress: progress(total, total)
+
+def _section_has_refs(sec):
+    return any(isinstance(it, dict) and "passage_id" in it for it in sec.get("items", []))
+
+def _normalize_section(sec, passages=None, refs=None):
+    name = sec.get("name","Untitled")
+    items = sec.get("items",[])
+    tmin = sec.get("time_minutes")
+    passages = passages if passages is not None else PassageTable()
+    out = []
+    for it in items:
+        if isinstance(it, dict) and "passage_id" in it:
+            ref = it["passage_id"]
+            if not refs or ref not in refs: raise ValueError(f"Unknown passage_id: {ref!r}")
+            it = dict(it, passage=refs[ref])
+        out.append(Item.from_dict(it, passages))
+    return Section(name, out, tmin, passages)
+
+def parse_exam(path):
+    return list(iter_exam_sections(path))
+
+#
+# ---------------------------- Compiled exams (.tfx) ----------------------------
+# Binary exam format for big banks that don't change often. Everything little-endian:
+#   header        magic "TFXB", version, flags, #sections, #items, #strings, and the offsets below
+#   section table per section: name string id, time_minutes (f64, NaN = untimed), first item, item count
+#   item index    per item: absolute file offset of its record
+#   item records  q id, passage id, ans id, #choices, choice ids...
+#   string table  per string: offset into string data, byte length (strings are deduplicated)
+#   string data   utf-8
+# Opening one only reads the header + section table; items get decoded when something looks at them.
+TFX_MAGIC = b"TFXB"
+TFX_VERSION = 2
+_TFX_HEADER = struct.Struct("<4sHHIIIQQQQ")
+_TFX_SECTION = struct.Struct("<IdII")
+_TFX_ITEM = struct.Struct("<IIIIH")    # q, passage, ans, extra keys as JSON ("" = none), n choices
+_TFX_ITEM_V1 = struct.Struct("<IIIH")  # version 1 had no extra keys
+_TFX_STR = struct.Struct("<QI")
+
+def is_compiled_exam(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == TFX_MAGIC
+    except Exception:
+        return False
+
+def write_compiled_exam(sections, out_path):
+    """Write normalized sections ([name, items, time_minutes] like parse_exam returns) as a .tfx file."""
+    strings, sids = [], {}
+    def sid(x):
+        x = x if isinstance(x, str) else str(x)
+        i = sids.get(x)
+        if i is None:
+            i = sids[x] = len(strings); strings.append(x)
+        return i
+    sec_rows, records, first = [], [], 0
+    for name, items, tmin in sections:
+        t = float("nan") if tmin in (None, "") else float(tmin)
+        sec_rows.append(_TFX_SECTION.pack(sid(name), t, first, len(items)))
+        for it in items:
+            ch = it.get("choices", []) or []
+            extra = it.extra if isinstance(it, Item) else Item.from_dict(it).extra
+            records.append(_TFX_ITEM.pack(sid(it.get("q","")), sid(it.get("passage","")), sid(it.get("ans","")),
+                                          sid(json.dumps(extra, ensure_ascii=False) if extra else ""), len(ch))
+                           + struct.pack(f"<{len(ch)}I", *[sid(c) for c in ch]))
+        first += len(items)
+    n_items = first
+    off_sections = _TFX_HEADER.size
+    off_index = off_sections + _TFX_SECTION.size*len(sec_rows)
+    off_records = off_index + 8*n_items
+    index, pos = [], off_records
+    for r in records:
+        index.append(pos); pos += len(r)
+    off_strtab = pos
+    off_strdata = off_strtab + _TFX_STR.size*len(strings)
+    blobs = [x.encode("utf-8") for x in strings]
+    import tempfile
+    # own temp name per writer: pool workers (or two banks with the same content) can write the same .tfx at once
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_TFX_HEADER.pack(TFX_MAGIC, TFX_VERSION, 0, len(sec_rows), n_items, len(strings),
+                                     off_sections, off_index, off_strtab, off_strdata))
+            f.write(b"".join(sec_rows))
+            f.write(struct.pack(f"<{n_items}Q", *index))
+            f.write(b"".join(records))
+            o = 0
+            for b in blobs:
+                f.write(_TFX_STR.pack(o, len(b))); o += len(b)
+            f.write(b"".join(blobs))
+        os.replace(tmp, out_path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+class CompiledExam:
+    """
+    A .tfx file opened through mmap. 'sections' has the usual [name, items, time_minutes] shape;
+    items is a CompiledItems sequence that decodes an Item only when it's indexed.
+    """
+    def __init__(self, path):
+        import mmap
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, ver, _flags, n_sec, self.n_items, self.n_strings,
+             off_sec, self.off_index, self.off_strtab, self.off_strdata) = _TFX_HEADER.unpack_from(self.mm, 0)
+        except struct.error:
+            raise ValueError("Not a compiled Testify exam (file too short).")
+        if magic != TFX_MAGIC: raise ValueError("Not a compiled Testify exam.")
+        if ver > TFX_VERSION: raise ValueError(f"Compiled exam version {ver} is newer than this app supports.")
+        self.version = ver
+        self._rec = _TFX_ITEM if ver >= 2 else _TFX_ITEM_V1
+        # string() / item() trust these offsets, so a truncated or scribbled-on file has to fail here
+        size = len(self.mm)
+        if not (off_sec == _TFX_HEADER.size and off_sec + n_sec*_TFX_SECTION.size == self.off_index
+                and self.off_index + 8*self.n_items <= self.off_strtab <= self.off_strdata <= size
+                and self.off_strtab + self.n_strings*_TFX_STR.size == self.off_strdata):
+            raise ValueError("Compiled exam is truncated or corrupt.")
+        if self.n_strings:
+            off, n = _TFX_STR.unpack_from(self.mm, self.off_strdata - _TFX_STR.size)
+            if self.off_strdata + off + n > size: raise ValueError("Compiled exam is truncated or corrupt.")
+        # every item record has to start after the index and fit ahead of the string table
+        import array
+        idx = array.array("Q", self.mm[self.off_index:self.off_index + 8*self.n_items])
+        if sys.byteorder == "big": idx.byteswap()
+        if idx and (min(idx) < self.off_index + 8*self.n_items or max(idx) + self._rec.size > self.off_strtab):
+            raise ValueError("Compiled exam is truncated or corrupt.")
+        self._strs = LRUCache(4096)
+        self.sections = []
+        for i in range(n_sec):
+            name_sid, t, first, count = _TFX_SECTION.unpack_from(self.mm, off_sec + i*_TFX_SECTION.size)
+            if first + count > self.n_items: raise ValueError("Compiled exam is truncated or corrupt.")
+            tmin = None if t != t else (int(t) if t.is_integer() else t)
+            self.sections.append(Section(self.string(name_sid), CompiledItems(self, first, count), tmin, self))
+
+    def string(self, i):
+        s = self._strs.get(i)
+        if s is None:
+            if i >= self.n_strings: raise ValueError("Compiled exam is truncated or corrupt.")
+            off, n = _TFX_STR.unpack_from(self.mm, self.off_strtab + i*_TFX_STR.size)
+            start = self.off_strdata + off
+            if start + n > len(self.mm): raise ValueError("Compiled exam is truncated or corrupt.")
+            s = self._strs.put(i, self.mm[start:start+n].decode("utf-8"))
+        return s
+
+    def item(self, gi):
+        (pos,) = struct.unpack_from("<Q", self.mm, self.off_index + 8*gi)
+        if self._rec is _TFX_ITEM:
+            q, pas, ans, ex, n = _TFX_ITEM.unpack_from(self.mm, pos)
+            extra = self.string(ex)
+        else:
+            q, pas, ans, n = _TFX_ITEM_V1.unpack_from(self.mm, pos); extra = ""
+        if pos + self._rec.size + 4*n > self.off_strtab: raise ValueError("Compiled exam is truncated or corrupt.")
+        ch = struct.unpack_from(f"<{n}I", self.mm, pos + self._rec.size)
+        return Item(self.string(q), [self.string(c) for c in ch], self.string(ans), self.string(pas),
+                    pas+1 if self.string(pas) else 0,  # strings are deduped in the file, so the id works as a pid
+                    json.loads(extra) if extra else None)
+
+class CompiledItems:
+    """List-like view of one section's items in a CompiledExam (len / index / iterate)."""
+    def __init__(self, exam, first, count):
+        self.exam, self.first, self.count = exam, first, count
+    def __len__(self):
+        return self.count
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0: i += self.count
+        if not 0 <= i < self.count: raise IndexError("item index out of range")
+        return self.exam.item(self.first + i)
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.exam.item(self.first + i)
+
+def sections_to_json(sections, share_passages=False):
+    """Normalized sections back to the regular exam JSON schema (optionally with a shared passages table)."""
+    if share_passages: return with_shared_passages(sections_to_json(sections))
+    return {"sections": [{"name": name, "time_minutes": tmin,
+                          "items": [(it if isinstance(it, Item) else Item.from_dict(it)).to_dict() for it in items]}
+                         for name, items, tmin in sections]}
+
+def compile_exam(json_path, out_path):
+    write_compiled_exam(parse_exam(json_path), out_path)
+
+def decompile_exam(tfx_path, out_path):
+    data = sections_to_json(CompiledExam(tfx_path).sections)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+#
+# ---------------------------- Parsed-exam cache ----------------------------
+# Lives in <user data>/exam_cache. Parsed + normalized exams are stored as .tfx (see above), named by
+# content hash, with a small JSON entry per source path: {path, size, mtime_ns, sha256}.
+# Same path/size/mtime -> straight hit. Touched but unchanged file -> hash matches -> still a hit.
+EXAM_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def _exam_cache_dir():
+    p = os.path.join(_user_data_dir(), "exam_cache")
+    os.makedirs(p, exist_ok=True)
+    return p
+
+def _file_sha256(path):
+    import hashlib
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _exam_cache_entry_path(path):
+    import hashlib
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8", "surrogatepass")).hexdigest()
+    return os.path.join(_exam_cache_dir(), key + ".json")
+
+def exam_cache_lookup(path):
+    """CompiledExam for a cached copy of this exam file, or None."""
+    try:
+        st = os.stat(path)
+        entry_p = _exam_cache_entry_path(path)
+        with open(entry_p, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if entry.get("size") != st.st_size: return None
+        if entry.get("mtime_ns") != st.st_mtime_ns:
+            if _file_sha256(path) != entry.get("sha256"): return None
+            entry["mtime_ns"] = st.st_mtime_ns  # same content, just touched
+            with open(entry_p, "w", encoding="utf-8") as f: json.dump(entry, f)
+        tfx = os.path.join(_exam_cache_dir(), entry["sha256"] + ".tfx")
+        try: exam = CompiledExam(tfx)
+        except ValueError: exam = None
+        if exam is None or exam.version != TFX_VERSION:  # corrupt, or an older format that dropped item fields
+            if exam is not None: exam.mm.close()
+            os.remove(tfx)  # so exam_cache_store writes a fresh one
+            return None
+        os.utime(tfx)  # mtime = last use, for eviction
+        return exam
+    except Exception:
+        return None
+
+def exam_cache_store(path, sections, stat_before=None):
+    """Save normalized sections for this file. stat_before: os.stat from when it was read (skip if it changed since)."""
+    try:
+        st = os.stat(path)
+        if stat_before is not None and (st.st_size, st.st_mtime_ns) != (stat_before.st_size, stat_before.st_mtime_ns):
+            return False
+        sha = _file_sha256(path)
+        tfx = os.path.join(_exam_cache_dir(), sha + ".tfx")
+        if not os.path.isfile(tfx):
+            write_compiled_exam(sections, tfx)
+        entry = {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+        with open(_exam_cache_entry_path(path), "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        exam_cache_evict()
+        return True
+    except Exception as ex:
+        _log_runtime(f"exam cache store failed: {ex}")
+        return False
+
+def exam_cache_evict(max_bytes=None):
+    """Drop least-recently-used cached exams until the cache fits in max_bytes."""
+    max_bytes = EXAM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    d = _exam_cache_dir()
+    files = []
+    for fn in os.listdir(d):
+        if fn.endswith(".tfx"):
+            fp = os.path.join(d, fn)
+            try: st = os.stat(fp)
+            except OSError: continue  # another pool worker evicted it first
+            files.append((st.st_mtime, st.st_size, fp))
+    total = sum(sz for _, sz, _ in files)
+    for _, sz, fp in sorted(files):
+        if total <= max_bytes: break
+        try: os.remove(fp); total -= sz
+        except OSError: pass  # still mapped somewhere (Windows); try again next time
+    # entries whose .tfx is gone are just misses, but don't let them pile up
+    for fn in os.listdir(d):
+        if fn.endswith(".json"):
+            try:
+                with open(os.path.join(d, fn), "r", encoding="utf-8") as f:
+                    sha = json.load(f).get("sha256", "")
+                if not os.path.isfile(os.path.join(d, sha + ".tfx")): os.remove(os.path.join(d, fn))
+            except Exception:
+                pass
+
+def purge_exam_cache():
+    """Delete everything in the exam cache. Returns how many files went away."""
+    d = _exam_cache_dir(); n = 0
+    for fn in os.listdir(d):
+        try: os.remove(os.path.join(d, fn)); n += 1
+        except OSError: pass
+    return n
+
+def load_exam_cached(path):
+    """parse_exam, but served from / saved to the exam cache (for headless use)."""
+    if is_compiled_exam(path): return CompiledExam(path).sections
+    hit = exam_cache_lookup(path)
+    if hit is not None: return hit.sections
+    st = os.stat(path)
+    sections = parse_exam(path)
+    exam_cache_store(path, sections, st)
+    return sections
+
+#
+# ---------------------------- Question banks (many files) ----------------------------
+EXAM_FILE_EXTS = (".json", ".tfx")
+
+def exam_files(paths):
+    """Exam files under a path / list of paths (directories are walked), sorted so merges come out the same every time."""
+    if isinstance(paths, str): paths = [paths]
+    out = set()
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, files in os.walk(p):
+                dirs[:] = [d for d in dirs if not d.startswith(".")]
+                out.update(os.path.join(root, f) for f in files
+                           if f.lower().endswith(EXAM_FILE_EXTS) and not f.startswith("."))
+        elif os.path.isfile(p):
+            out.add(p)
+    return sorted(out, key=lambda f: (os.path.normcase(f), f))
+
+def exam_label(paths):
+    """What to call a file / folder / batch of files in the UI."""
+    if isinstance(paths, str): return paths
+    if len(paths) == 1: return paths[0]
+    try: return os.path.commonpath([os.path.abspath(p) for p in paths])
+    except ValueError: return paths[0]  # different drives
+
+def _load_bank_file(path, use_cache=True):
+    """Process-pool worker: parse one file of a bank (and leave a cache copy behind for next time)."""
+    st = os.stat(path)
+    sections = parse_exam(path)
+    if use_cache: exam_cache_store(path, sections, st)
+    return sections
+
+def _unique_section_name(name, path, taken):
+    # answers are kept by section name, so two files' "Reading" sections mustn't collide
+    if name not in taken: return name
+    base = f"{name} ({os.path.splitext(os.path.basename(path))[0]})"
+    cand, n = base, 2
+    while cand in taken:
+        cand = f"{base} {n}"; n += 1
+    return cand
+
+def load_exam_bank(paths, workers=None, use_cache=True):
+    """
+    Headless: load every exam file under paths in parallel. Returns (sections, errors) where
+    errors is [(path, message)] for the files that didn't load.
+    """
+    loader = ExamLoader(paths if not isinstance(paths, str) else [paths], use_cache=use_cache, workers=workers,
+                        notify=False)
+    sections = loader.finish()
+    return sections, list(loader.file_errors)
+
+#
+# ---------------------------- Background loading ----------------------------
+EXAM_LOAD_EVENT = pygame.USEREVENT + 1  # posted by ExamLoader's worker when it has news
+
+class ExamLoader:
+    """
+    Reads an exam on a worker thread so the window keeps responding while a big file comes in.
+    The worker only ever talks to its queue; the main thread calls pump() to move finished
+    sections into 'sections' (which therefore only ever changes on the main thread).
+    cancel() makes the worker stop at the next section boundary.
+
+    path can also be a folder or a list of files (a question bank): those get parsed in a
+    process pool and merged in exam_files order; files that fail end up in 'file_errors'.
+    """
+    def __init__(self, path, use_cache=True, workers=None, notify=True):
+        import queue, threading
+        self.path = path
+        self.label = exam_label(path)
+        self.many = not isinstance(path, str) or os.path.isdir(path)
+        self.sections = []
+        self.error = None
+        self.file_errors = []  # [(path, message)] (banks only)
+        self.n_files = 1
+        self.done = False
+        self.bytes_read = 0; self.total = 0  # written by the worker, only ever read for the progress text
+        self._use_cache = use_cache
+        self._workers = workers
+        self._notify = notify
+        self._q = queue.SimpleQueue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._work, name="exam-loader", daemon=True)
+        self._thread.start()
+
+    def _post(self):
+        if not self._notify: return
+        try: pygame.event.post(pygame.event.Event(EXAM_LOAD_EVENT))
+        except pygame.error: pass  # no display / shutting down; pump() still works
+
+    def _work(self):
+        after = None
+        try:
+            after = self._work_bank() if self.many else self._work_file()
+        except Exception as ex:
+            self._q.put(("error", ex))
+        finally:
+            self._q.put(("done", None)); self._post()
+        if after is not None and not self._cancel.is_set():
+            after()  # e.g. writing the cache copy; off the main thread anyway
+
+    def _work_file(self):
+        if is_compiled_exam(self.path):
+            self._q.put(("all", CompiledExam(self.path).sections)); return None
+        hit = exam_cache_lookup(self.path) if self._use_cache else None
+        if hit is not None:
+            self._q.put(("all", hit.sections)); return None
+        stat = os.stat(self.path) if self._use_cache else None
+        def progress(done, total): self.bytes_read, self.total = done, total
+        got = []; last_post = 0.0
+        for sec in iter_exam_sections(self.path, progress=progress):
+            if self._cancel.is_set(): return None
+            got.append(sec); self._q.put(("section", sec))
+            now = time.perf_counter()
+            if now - last_post > 0.05: last_post = now; self._post()  # don't flood the event queue
+        return (lambda: exam_cache_store(self.path, got, stat)) if stat is not None else None
+
+    def _work_bank(self):
+        files = exam_files(self.path)
+        if not files: raise ValueError("No exam files (.json / .tfx) found.")
+        self.n_files = len(files)
+        sizes = [os.path.getsize(f) for f in files]
+        self.total = sum(sizes)
+        results = {}  # file index -> sections or the exception it failed with
+        todo = []
+        for i, f in enumerate(files):
+            # compiled files and cache hits are just an mmap away; only real parsing goes to the pool
+            try:
+                if is_compiled_exam(f): results[i] = CompiledExam(f).sections
+                else:
+                    hit = exam_cache_lookup(f) if self._use_cache else None
+                    if hit is not None: results[i] = hit.sections
+                    else: todo.append(i)
+            except Exception as ex:
+                results[i] = ex
+            if i in results: self.bytes_read += sizes[i]
+        taken = set(); nxt = 0
+        def flush():
+            # hand over finished files strictly in order, whatever order the pool finishes them in
+            nonlocal nxt
+            while nxt in results:
+                res = results.pop(nxt)
+                if isinstance(res, Exception):
+                    self._q.put(("file_error", (files[nxt], str(res))))
+                else:
+                    for sec in res:
+                        sec.name = _unique_section_name(sec.name, files[nxt], taken); taken.add(sec.name)
+                        self._q.put(("section", sec))
+                nxt += 1
+            self._post()
+        flush()
+        workers = min(len(todo), self._workers or os.cpu_count() or 1)
+        if workers <= 1:
+            # one file or one core: a pool would only add process start-up time
+            for i in todo:
+                if self._cancel.is_set(): return None
+                try: results[i] = _load_bank_file(files[i], self._use_cache)
+                except Exception as ex: results[i] = ex
+                self.bytes_read += sizes[i]
+                flush()
+        else:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            # spawn, not fork: this thread lives in a process that has SDL (and other threads) going
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                futs = {pool.submit(_load_bank_file, files[i], self._use_cache): i for i in todo}
+                for fut in as_completed(futs):
+                    if self._cancel.is_set(): return None
+                    i = futs[fut]
+                    try: results[i] = fut.result()
+                    except Exception as ex: results[i] = ex
+                    self.bytes_read += sizes[i]
+                    flush()
+            finally:
+                pool.shutdown(wait=not self._cancel.is_set(), cancel_futures=True)
+        flush()
+        return None
+
+    def _take(self, kind, val):
+        if kind == "section": self.sections.append(val); return 1
+        if kind == "all": self.sections.extend(val); return len(val)
+        if kind == "error": self.error = val
+        elif kind == "file_error": self.file_errors.append(val)
+        elif kind == "done": self.done = True
+        return 0
+
+    def pump(self):
+        """Main thread: pick up whatever the worker has finished. Returns how many sections were added."""
+        import queue
+        added = 0
+        while not self.done:
+            try: kind, val = self._q.get_nowait()
+            except queue.Empty: break
+            added += self._take(kind, val)
+        return added
+
+    def wait_for(self, idx):
+        """Block until section idx is in (or the file turns out shorter). True if it exists."""
+        while len(self.sections) <= idx and not self.done:
+            self._take(*self._q.get())
+        return idx < len(self.sections)
+
+    def finish(self):
+        while not self.done:
+            self._take(*self._q.get())
+        return self.sections
+
+    def cancel(self):
+        self._cancel.set()
+
+    def fraction(self):
+        return self.bytes_read / self.total if self.total else 0.0
+
+#
+# ---------------------------- Grading ----------------------------
+# Graded results (LiveScore.snapshot, AnswerKey.grade_batch) all come out as
+#   {"by_section": {name: {"correct", "total", "wrong": [(num, q, key, yours)]}}, "overall": {"correct", "total"}}
+# Items without choices aren't scored.
+def section_keys(items):
+    """Answer key per item, stripped + upper-cased (None for unscored items)."""
+    return [(it.get("ans","") or "").strip().upper() if it.get("choices") else None for it in items]
+
+class _SectionScore:
+    __slots__ = ("keys", "ok", "n", "answered", "correct", "total")
+
+    def __init__(self, items):
+        self.keys = section_keys(items)
+        # ok[i]: would item i count as right with the current answer (blank answers match a blank key)
+        self.ok = bytearray(1 if k == "" else 0 for k in self.keys)
+        self.n = len(self.keys)
+        self.answered = 0
+        self.correct = sum(self.ok)
+        self.total = sum(1 for k in self.keys if k is not None)
+
+class LiveScore:
+    """
+    Per-section score kept current while answering: update() is O(1) per answer change, so the lobby
+    can show progress every frame and finish_exam only has to snapshot it. Sections are set up the
+    first time they're looked at.
+    """
+    def __init__(self):
+        self.secs = {}  # section name -> _SectionScore
+
+    def section(self, name, items):
+        st = self.secs.get(name)
+        if st is None: st = self.secs[name] = _SectionScore(items)
+        return st
+
+    def peek(self, name):
+        """The section's score if it's been set up (nothing answered there yet otherwise)."""
+        return self.secs.get(name)
+
+    def update(self, name, i, old, new):
+        st = self.secs[name]
+        st.answered += (new is not None) - (old is not None)
+        key = st.keys[i]
+        if key is not None:
+            now = 1 if (new or "").strip().upper() == key else 0
+            st.correct += now - st.ok[i]; st.ok[i] = now
+
+    def snapshot(self, sections, answers):
+        """Graded results (shape above); only the wrong-item lists need a walk over the items."""
+        res = {}; tot_c=tot_t=0
+        for name, items, _ in sections:
+            st = self.section(name, items)
+            ans = answers.get(name)
+            wrong = []
+            i = st.ok.find(0)
+            while i != -1:
+                if st.keys[i] is not None:
+                    usr = ((ans[i] if ans is not None else None) or "").strip().upper()
+                    wrong.append((i+1, items[i].get("q",""), st.keys[i], usr or "—"))
+                i = st.ok.find(0, i+1)
+            res[name] = {"correct": st.correct, "total": st.total, "wrong": wrong}
+            tot_c += st.correct; tot_t += st.total
+        return {"by_section":res,"overall":{"correct":tot_c,"total":tot_t}}
+
+_NP = False  # not looked for yet
+def _numpy():
+    """numpy if it's installed (batch grading is vectorized with it), else None."""
+    global _NP
+    if _NP is False:
+        try:
+            import numpy
+            _NP = numpy
+        except Exception:
+            _NP = None
+    return _NP
+
+def _answer_code(x):
+    # one answer as an int: 0 = blank, the letter's code point, or -1 for anything that can't be a single letter
+    x = (x or "").strip().upper() if isinstance(x, str) or x is None else str(x).strip().upper()
+    if not x: return 0
+    return ord(x) if len(x) == 1 else -1
+
+class AnswerKey:
+    """
+    An exam's answer key encoded once as integer arrays (one slot per item, all sections end to end),
+    so a whole batch of response sheets can be graded with array comparisons.
+    """
+    def __init__(self, sections):
+        self.names, self.starts, self.ends = [], [], []
+        keys, scored, self._q, self._key_txt = [], [], [], []
+        n = 0
+        for name, items, _ in sections:
+            self.names.append(name); self.starts.append(n)
+            for it in items:
+                k = (it.get("ans","") or "").strip().upper()
+                keys.append(_answer_code(k) if len(k) <= 1 else -2)  # -2: a key no single answer can match
+                scored.append(bool(it.get("choices")))
+                self._q.append(it.get("q","")); self._key_txt.append(k)
+                n += 1
+            self.ends.append(n)
+        self.n_items = n
+        self._sec_of = [si for si in range(len(self.names)) for _ in range(self.starts[si], self.ends[si])]
+        self._codes = {None: 0}  # raw answer -> code (sheets only ever use a handful of distinct values)
+        np = _numpy()
+        if np is not None:
+            self.key = np.array(keys, dtype=np.int32)
+            self.scored = np.array(scored, dtype=bool)
+            self.totals = [int(self.scored[a:b].sum()) for a, b in zip(self.starts, self.ends)]
+        else:
+            self.key, self.scored = keys, scored
+            self.totals = [sum(scored[a:b]) for a, b in zip(self.starts, self.ends)]
+
+    def encode(self, answers):
+        """A response sheet ({section name: [letters]}) as one row of answer codes."""
+        row = [0]*self.n_items
+        codes = self._codes
+        for si, name in enumerate(self.names):
+            ans = answers.get(name) or ()
+            a, b = self.starts[si], self.ends[si]
+            try:
+                seg = [codes[x] for x in ans[:b-a]]
+            except (KeyError, TypeError):
+                seg = []
+                for x in ans[:b-a]:
+                    try: c = codes.get(x)
+                    except TypeError: c = -1  # a list or object where a letter should be
+                    if c is None: c = codes[x] = _answer_code(x)
+                    seg.append(c)
+            row[a:a+len(seg)] = seg
+        return row
+
+    def grade_batch(self, sheets, with_wrong=True):
+        """Grade many response sheets at once; one graded result per sheet."""
+        np = _numpy()
+        rows = [self.encode(sh) for sh in sheets]
+        if np is None or not rows:
+            return [self._result([r[j] == self.key[j] for j in range(self.n_items)], r, with_wrong) for r in rows]
+        R = np.array(rows, dtype=np.int32).reshape(len(rows), self.n_items)
+        ok = (R == self.key) | ~self.scored  # unscored items never count as wrong
+        # per-section sums as differences of a running total (sections can be empty)
+        cs = np.concatenate([np.zeros((len(rows), 1), dtype=np.int64), np.cumsum(ok & self.scored, axis=1)], axis=1)
+        correct = cs[:, self.ends] - cs[:, self.starts]
+        out = []
+        for ci in range(len(rows)):
+            wrong_idx = np.flatnonzero(~ok[ci]) if with_wrong else ()
+            out.append(self._result_from(correct[ci].tolist(), wrong_idx, rows[ci]))
+        return out
+
+    def _result(self, ok, row, with_wrong):
+        # plain-Python path (no numpy)
+        correct = [sum(1 for j in range(a, b) if ok[j] and self.scored[j]) for a, b in zip(self.starts, self.ends)]
+        wrong_idx = [j for j in range(self.n_items) if self.scored[j] and not ok[j]] if with_wrong else ()
+        return self._result_from(correct, wrong_idx, row)
+
+    def _result_from(self, correct, wrong_idx, row):
+        res = {}
+        for si, name in enumerate(self.names):
+            res[name] = {"correct": int(correct[si]), "total": self.totals[si], "wrong": []}
+        names, sec_of, starts, q, key = self.names, self._sec_of, self.starts, self._q, self._key_txt
+        for j in (wrong_idx.tolist() if hasattr(wrong_idx, "tolist") else wrong_idx):
+            si = sec_of[j]; c = row[j]
+            res[names[si]]["wrong"].append((j - starts[si] + 1, q[j], key[j], _ANSWER_LETTERS[c] if 0 < c < 256 else
+                                            (chr(c) if c > 0 else "—")))
+        tc = sum(r["correct"] for r in res.values()); tt = sum(r["total"] for r in res.values())
+        return {"by_section": res, "overall": {"correct": tc, "total": tt}}
+
+def load_response_sheet(path):
+    """
+    A candidate's responses: JSON with "answers": {section name: [letter or null, ...]} (the results
+    export writes these) and optionally "candidate"; otherwise the file name is the candidate id.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("answers"), dict):
+        raise ValueError("Response file needs an 'answers' object (section name -> list of answers).")
+    cand = data.get("candidate") or os.path.splitext(os.path.basename(path))[0]
+    return str(cand), data["answers"]
+
+def response_files(paths):
+    """Response sheet paths from files and/or folders of .json sheets."""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files += sorted(os.path.join(r, f) for r, _, fs in os.walk(p) for f in fs if f.lower().endswith(".json"))
+        else:
+            files.append(p)
+    return files
+
+_GRADE_KEY = None  # per worker process: the AnswerKey, built once by _grade_worker_init
+
+def _grade_worker_init(exam_path):
+    global _GRADE_KEY
+    _GRADE_KEY = AnswerKey(load_exam_bank(exam_path)[0] if os.path.isdir(exam_path) else load_exam_cached(exam_path))
+
+def _grade_chunk(paths, with_wrong=True, key=None):
+    """Grade a list of response files -> [record]; records carry 'error' instead of 'results' for bad files."""
+    key = key or _GRADE_KEY
+    sheets, recs = [], []
+    for p in paths:
+        try:
+            cand, answers = load_response_sheet(p)
+            recs.append({"candidate": cand, "file": p}); sheets.append(answers)
+        except Exception as ex:
+            recs.append({"candidate": None, "file": p, "error": str(ex)})
+    graded = iter(key.grade_batch(sheets, with_wrong))
+    for r in recs:
+        if "error" not in r: r["results"] = next(graded)
+    return recs
+
+def grade_batch(exam_path, response_paths, workers=1, chunk=256, with_wrong=True):
+    """
+    Grade response files against one exam; yields one record per file, in input order:
+    {"candidate", "file", "results": {same shape as App.results}} (or "error").
+    """
+    paths = list(response_paths)
+    chunks = [paths[i:i+chunk] for i in range(0, len(paths), chunk)]
+    if workers <= 1 or len(chunks) <= 1:
+        _grade_worker_init(exam_path)
+        for c in chunks:
+            yield from _grade_chunk(c, with_wrong)
+        return
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_grade_worker_init, initargs=(exam_path,)) as pool:
+        for recs in pool.map(_grade_chunk, chunks, [with_wrong]*len(chunks)):
+            yield from recs
+
+#
+# ---------------------------- Attempt history ----------------------------
+# Every finished attempt goes into one SQLite file in the user data dir (instead of overwriting
+# isee_results.txt/.json): which exam, when, the per-section scores and the raw answers.
+HISTORY_DB = "testify_history.sqlite3"
+
+_HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exams (
+    key TEXT PRIMARY KEY,       -- exam_identity(): hash of the section names + answer keys
+    label TEXT,                 -- file / folder it was last taken from
+    layout TEXT NOT NULL        -- JSON [[section name, [key or null per item]], ...]
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    exam_key TEXT NOT NULL REFERENCES exams(key),
+    label TEXT,
+    mode TEXT,
+    started REAL,               -- unix time
+    finished REAL NOT NULL,
+    correct INTEGER NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_exam ON attempts(exam_key, finished);
+CREATE INDEX IF NOT EXISTS attempts_by_date ON attempts(finished);
+CREATE TABLE IF NOT EXISTS section_scores (
+    attempt_id INTEGER NOT NULL REFERENCES attempts(id) ON DELETE CASCADE,
+    pos INTEGER NOT NULL,       -- the section's index in the exam
+    section TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    answers BLOB NOT NULL,      -- AnswerSheet bytes, one per item (0 = blank)
+    PRIMARY KEY (attempt_id, pos)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS section_scores_by_name ON section_scores(section, attempt_id);
+"""
+
+def exam_identity(sections, live=None):
+    """
+    (key, layout) for an exam: layout = [[section name, answer keys]], key = a hash of it.
+    The same exam as .json, .tfx or re-saved from the builder gets the same key.
+    live: a LiveScore that already has the keys worked out.
+    """
+    import hashlib
+    layout = [[name, live.section(name, items).keys if live is not None else section_keys(items)]
+              for name, items, _ in sections]
+    blob = json.dumps(layout, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest(), blob
+
+class AttemptStore:
+    """
+    Attempt history in SQLite. Each attempt is written in one transaction; reads go through the
+    indexes (exam, section name, date) and come back a page at a time, so the history screen
+    doesn't care whether there are 10 attempts in there or 100,000.
+    """
+    ROW = "id, label, mode, finished, correct, total"
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(_user_data_dir(), HISTORY_DB)
+        self._db = None
+
+    def db(self):
+        if self._db is None:
+            import sqlite3
+            db = sqlite3.connect(self.path)
+            db.execute("PRAGMA journal_mode=WAL")  # readers don't block the writer (and vice versa)
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            db.executescript(_HISTORY_SCHEMA)
+            self._db = db
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close(); self._db = None
+
+    def record(self, sections, answers, results, label="", mode="", started=None, finished=None, live=None):
+        """Store one graded attempt (answers: {section name: AnswerSheet}); returns its id."""
+        key, layout = exam_identity(sections, live)
+        finished = time.time() if finished is None else finished
+        db = self.db()
+        with db:
+            db.execute("INSERT OR IGNORE INTO exams(key, label, layout) VALUES (?,?,?)", (key, label, layout))
+            db.execute("UPDATE exams SET label=? WHERE key=?", (label, key))
+            ov = results["overall"]
+            aid = db.execute("INSERT INTO attempts(exam_key, label, mode, started, finished, correct, total) "
+                             "VALUES (?,?,?,?,?,?,?)",
+                             (key, label, mode, started, finished, ov["correct"], ov["total"])).lastrowid
+            rows = []
+            for pos, (name, items, _) in enumerate(sections):
+                r = results["by_section"].get(name) or {"correct": 0, "total": 0}
+                sheet = answers.get(name)
+                rows.append((aid, pos, name, r["correct"], r["total"],
+                             sheet.to_bytes() if sheet is not None else bytes(len(items))))
+            db.executemany("INSERT INTO section_scores VALUES (?,?,?,?,?,?)", rows)
+        return aid
+
+    @staticmethod
+    def _where(exam_key=None, section=None, since=None, until=None):
+        cond, args = [], []
+        if exam_key is not None: cond.append("exam_key = ?"); args.append(exam_key)
+        if section is not None:
+            cond.append("id IN (SELECT attempt_id FROM section_scores WHERE section = ?)"); args.append(section)
+        if since is not None: cond.append("finished >= ?"); args.append(since)
+        if until is not None: cond.append("finished < ?"); args.append(until)
+        return (" WHERE " + " AND ".join(cond)) if cond else "", args
+
+    def count(self, **filters):
+        w, args = self._where(**filters)
+        return self.db().execute("SELECT COUNT(*) FROM attempts" + w, args).fetchone()[0]
+
+    def page(self, offset=0, limit=50, **filters):
+        """Attempts newest first as (id, label, mode, finished, correct, total). Filters: exam_key, section, since, until."""
+        w, args = self._where(**filters)
+        return self.db().execute(f"SELECT {self.ROW} FROM attempts{w} ORDER BY finished DESC, id DESC LIMIT ? OFFSET ?",
+                                 args + [limit, offset]).fetchall()
+
+    def section_scores(self, attempt_id):
+        """[(section, correct, total)] in exam order."""
+        return self.db().execute("SELECT section, correct, total FROM section_scores WHERE attempt_id=? ORDER BY pos",
+                                 (attempt_id,)).fetchall()
+
+    def answers(self, attempt_id):
+        """{section name: AnswerSheet} as the attempt left them."""
+        return {name: AnswerSheet.from_bytes(b) for name, b in self.db().execute(
+            "SELECT section, answers FROM section_scores WHERE attempt_id=? ORDER BY pos", (attempt_id,))}
+
+    def exam_of(self, attempt_id):
+        row = self.db().execute("SELECT exam_key FROM attempts WHERE id=?", (attempt_id,)).fetchone()
+        return row[0] if row else None
+
+    def exam_label(self, exam_key):
+        row = self.db().execute("SELECT label FROM exams WHERE key=?", (exam_key,)).fetchone()
+        return row[0] if row else None
+
+    def section_blobs(self, exam_key, sizes, since=None, until=None):
+        """Raw answer bytes of every matching attempt, one list per section (attempt order; wrong-sized ones left out)."""
+        w, args = self._where(exam_key=exam_key, since=since, until=until)
+        out = [[] for _ in sizes]
+        for pos, b in self.db().execute("SELECT pos, answers FROM section_scores WHERE attempt_id IN "
+                                        f"(SELECT id FROM attempts{w}) ORDER BY attempt_id, pos", args):
+            if pos < len(sizes) and len(b) == sizes[pos]: out[pos].append(b)
+        return out
+
+    def exam_layout(self, exam_key):
+        """[[section name, [answer key per item]]] for an exam seen before, or None."""
+        row = self.db().execute("SELECT layout FROM exams WHERE key=?", (exam_key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+class HistoryPages:
+    """Row i of a filtered, newest-first attempt list for a VirtualList, fetched PAGE rows at a time."""
+    PAGE = 64
+
+    def __init__(self, store, **filters):
+        self.store, self.filters = store, filters
+        self.count = store.count(**filters)
+        self._pages = LRUCache(8)
+
+    def row(self, i):
+        p, k = divmod(i, self.PAGE)
+        rows = self._pages.get(p)
+        if rows is None: rows = self._pages.put(p, self.store.page(p*self.PAGE, self.PAGE, **self.filters))
+        return rows[k] if k < len(rows) else None
+
+def _fmt_when(ts):
+    return datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+
 #
-# ---------------------------- Exam IO ----------------------------
-def parse_exam(path):
+# ---------------------------- Item analysis ----------------------------
+# Classical test statistics over many attempts at one exam: difficulty (p), corrected point-biserial
+# discrimination, how often each option gets picked, and KR-20 per section. Every section becomes a
+# candidates x items matrix of answer codes and everything below is array math on it (numpy required).
+ITEM_FLAGS = {"hard": 0.2, "easy": 0.9, "low_r": 0.2}  # p below / p above / r_pb below these gets flagged
+
+def item_analysis(R, keys):
+    """
+    Statistics for one section.
+    R: candidates x items array of answer codes (0 = blank, else the letter's code point).
+    keys: answer key per item as in section_keys() (None = unscored).
+    """
+    np = _numpy()
+    m, n = R.shape
+    kc = np.array([_answer_code(k) if k is not None and len(k) <= 1 else -2 for k in keys], dtype=np.int32)
+    scored = np.array([k is not None for k in keys], dtype=bool)
+    C = (R[:, scored] == kc[scored]).astype(np.float64)  # 1 where the candidate got the item right
+    k = C.shape[1]
+    X = C.sum(axis=1)
+    p = C.mean(axis=0) if m else np.zeros(k)
+    var_i = p * (1 - p)
+    Xc = X - (X.mean() if m else 0.0)
+    var_x = float(Xc @ Xc / m) if m else 0.0
+    cov = (C - p).T @ Xc / m if m else np.zeros(k)
+    # against the rest of the section (total minus the item itself), so an item doesn't correlate with itself
+    cov_rest = cov - var_i
+    var_rest = var_x - 2*cov + var_i
+    den = np.sqrt(var_i * var_rest)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rpb = np.where(den > 1e-12, cov_rest / den, np.nan)
+    kr20 = (k / (k - 1)) * (1 - var_i.sum() / var_x) if k > 1 and var_x > 0 else None
+
+    # option picks: which codes show up at all, then one pass over the matrix per code
+    if R.dtype == np.uint8:
+        codes = np.flatnonzero(np.bincount(R.ravel(), minlength=256))
+    else:
+        codes = np.unique(R)
+    rates = {int(c): (R == c).mean(axis=0) if m else np.zeros(n) for c in codes}
+    label = lambda c: "blank" if c == 0 else (chr(c) if c > 0 else "other")
+
+    items = []
+    si = np.flatnonzero(scored).tolist()
+    for j, col in enumerate(si):
+        pj = float(p[j]); rj = None if np.isnan(rpb[j]) else float(rpb[j])
+        opts = {label(c): float(r[col]) for c, r in rates.items() if r[col] > 0}
+        key = keys[col]
+        flags = []
+        if pj < ITEM_FLAGS["hard"]: flags.append("hard")
+        if pj > ITEM_FLAGS["easy"]: flags.append("easy")
+        if rj is not None and rj < ITEM_FLAGS["low_r"]: flags.append("low r")
+        if any(v > pj for o, v in opts.items() if o not in (key or "blank", "blank")): flags.append("distractor > key")
+        items.append({"num": col+1, "key": key, "p": pj, "rpb": rj, "options": opts, "flags": flags})
+    return {"candidates": m, "scored": k, "mean": float(X.mean()) if m else 0.0, "sd": math.sqrt(var_x),
+            "kr20": None if kr20 is None else float(kr20), "items": items}
+
+def _analysis_numpy():
+    np = _numpy()
+    if np is None: raise RuntimeError("item analysis needs numpy (pip install numpy)")
+    return np
+
+def analyze_history(store, exam_key, since=None, until=None):
+    """Item analysis of every stored attempt at an exam: {"exam", "label", "attempts", "sections": [...]}."""
+    np = _analysis_numpy()
+    layout = store.exam_layout(exam_key)
+    if layout is None: raise KeyError(f"no attempts stored for exam {exam_key}")
+    blobs = store.section_blobs(exam_key, [len(keys) for _, keys in layout], since=since, until=until)
+    out = []
+    for (name, keys), bl in zip(layout, blobs):
+        R = np.frombuffer(b"".join(bl), dtype=np.uint8).reshape(len(bl), len(keys))
+        out.append(dict(item_analysis(R, keys), section=name))
+    return {"exam": exam_key, "label": store.exam_label(exam_key), "attempts": store.count(exam_key=exam_key, since=since, until=until),
+            "sections": out}
+
+def analyze_sheets(sections, sheets):
+    """Same for response sheets ({section name: [letters]}, e.g. what --grade reads) against a loaded exam."""
+    np = _analysis_numpy()
+    key = AnswerKey(sections)
+    R = np.array([key.encode(sh) for sh in sheets], dtype=np.int32).reshape(len(sheets), key.n_items)
+    out = []
+    for (name, items, _), a, b in zip(sections, key.starts, key.ends):
+        out.append(dict(item_analysis(R[:, a:b], section_keys(items)), section=name))
+    return {"exam": exam_identity(sections)[0], "label": "", "attempts": len(sheets), "sections": out}
+
+def format_analysis(report):
+    """Plain-text tables of an analyze_* report (the --analyze output)."""
+    L = [f"{report['attempts']} attempt(s){' of ' + report['label'] if report.get('label') else ''}"]
+    for sec in report["sections"]:
+        kr = "n/a" if sec["kr20"] is None else f"{sec['kr20']:.3f}"
+        L += ["", f"{sec['section']}: {sec['candidates']} candidates, {sec['scored']} scored items, "
+                  f"mean {sec['mean']:.2f} (sd {sec['sd']:.2f}), KR-20 {kr}",
+              f"  {'Q':>4}  {'key':<4} {'p':>5}  {'r_pb':>6}  options"]
+        for it in sec["items"]:
+            r = "   n/a" if it["rpb"] is None else f"{it['rpb']:+6.2f}"
+            opts = "  ".join(f"{o}{'*' if o == it['key'] else ''} {v*100:.0f}%" for o, v in sorted(it["options"].items()))
+            L.append(f"  {it['num']:>4}  {(it['key'] or '-'):<4} {it['p']:5.2f}  {r}  {opts}"
+                     f"{'   <- ' + ', '.join(it['flags']) if it['flags'] else ''}")
+    return "\n".join(L)
+
+ANALYSIS_EVENT = pygame.USEREVENT + 2  # posted by AnalysisJob when the numbers are in
+
+class AnalysisJob:
+    """analyze_history on a worker thread (with its own SQLite connection), so the window keeps drawing meanwhile."""
+    def __init__(self, db_path, exam_key):
+        import threading
+        self.result = None
+        self.error = None
+        self.done = False
+        threading.Thread(target=self._work, args=(db_path, exam_key), name="item-analysis", daemon=True).start()
+
+    def _work(self, db_path, exam_key):
+        store = AttemptStore(db_path)
+        try:
+            self.result = analyze_history(store, exam_key)
+        except Exception as ex:
+            self.error = str(ex)
+        finally:
+            store.close()
+            self.done = True
+            try: pygame.event.post(pygame.event.Event(ANALYSIS_EVENT))
+            except Exception: pass
+
+#
+# ---------------------------- Results export ----------------------------
+# One row per (candidate, section, item) for cohort exports. Rows come out of generators and go to disk
+# in chunks, so a few million of them take as little memory as a few hundred.
+RESULT_COLUMNS = ("candidate", "section", "item", "response", "key", "correct")
+_JSON_BOOL = {1: "true", 0: "false", "": "null"}
+
+def _row_key_codes(keys):
+    return [None if k is None else (_answer_code(k) if len(k) <= 1 else -2) for k in keys]
+
+def iter_history_rows(store, exam_key, since=None, until=None):
+    """Rows for every stored attempt at an exam (candidate = attempt id), read through one cursor."""
+    layout = store.exam_layout(exam_key)
+    if layout is None: return
+    secs = [(name, keys, _row_key_codes(keys)) for name, keys in layout]
+    w, args = store._where(exam_key=exam_key, since=since, until=until)
+    q = ("SELECT attempt_id, pos, answers FROM section_scores WHERE attempt_id IN "
+         f"(SELECT id FROM attempts{w}) ORDER BY attempt_id, pos")
+    letters = _ANSWER_LETTERS
+    for aid, pos, blob in store.db().execute(q, args):  # sqlite hands the rows over as we go
+        if pos >= len(secs): continue
+        name, keys, codes = secs[pos]
+        cand = str(aid)
+        for j, c in enumerate(blob[:len(keys)]):
+            kc = codes[j]
+            yield cand, name, j+1, letters[c] if c else "", keys[j] or "", "" if kc is None else int(c == kc)
+
+def iter_sheet_rows(sections, paths, errors=None):
+    """Rows for response sheet files (what --grade reads), one file in memory at a time. Unreadable files go to errors."""
+    secs = [(name, section_keys(items)) for name, items, _ in sections]
+    secs = [(name, keys, _row_key_codes(keys)) for name, keys in secs]
+    for fp in paths:
+        try:
+            cand, answers = load_response_sheet(fp)
+        except Exception as ex:
+            if errors is not None: errors.append((fp, str(ex)))
+            continue
+        for name, keys, codes in secs:
+            ans = answers.get(name) or ()
+            for j, k in enumerate(keys):
+                raw = ans[j] if j < len(ans) else None
+                if raw is None or isinstance(raw, str):
+                    resp = (raw or "").strip().upper(); c = _answer_code(raw)
+                else:
+                    resp = str(raw); c = -1  # a number / list where a letter should be: never right
+                kc = codes[j]
+                yield cand, name, j+1, resp, k or "", "" if kc is None else int(c == kc)
+
+def write_result_rows(rows, out_path, fmt=None, chunk_rows=8192):
+    """
+    Stream rows (RESULT_COLUMNS tuples) to out_path as CSV or JSON Lines, gzipped if the name ends in .gz
+    ('-' = stdout). fmt defaults to what the file name says. Returns how many rows were written.
+    """
+    import csv, gzip, itertools
+    name = out_path[:-3] if out_path.lower().endswith(".gz") else out_path
+    fmt = fmt or ("jsonl" if name.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    if fmt not in ("csv", "jsonl"): raise ValueError(f"Unknown export format: {fmt}")
+    if out_path == "-":
+        f = sys.stdout
+    elif name is not out_path:
+        f = gzip.open(out_path, "wt", encoding="utf-8", newline="", compresslevel=6)
+    else:
+        f = open(out_path, "w", encoding="utf-8", newline="", buffering=1 << 20)
+    n = 0
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as ex:
-        raise ValueError(f"Invalid JSON: {ex}")
-    if not isinstance(data, dict) or "sections" not in data:
-        raise ValueError("JSON must have a top-level 'sections' array.")
-    sections = []
-    for sec in data["sections"]:
-        name = sec.get("name","Untitled")
-        items = sec.get("items",[])
-        tmin = sec.get("time_minutes")
-        for it in items:
-            it.setdefault("q",""); it.setdefault("choices",[]); it.setdefault("ans",""); it.setdefault("passage","")
-        sections.append([name, items, tmin])
-    return sections
+        if fmt == "csv":
+            w = csv.writer(f)
+            w.writerow(RESULT_COLUMNS)
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk: break
+            if fmt == "csv":
+                w.writerows(chunk)
+            else:
+                # the strings repeat endlessly (names, letters, the candidate over its items), so each is encoded once per chunk
+                enc = {}
+                def js(x):
+                    v = enc.get(x)
+                    if v is None: v = enc[x] = json.dumps(x, ensure_ascii=False)
+                    return v
+                f.write("".join(f'{{"candidate": {js(r[0])}, "section": {js(r[1])}, "item": {r[2]}, "response": {js(r[3])}, '
+                                f'"key": {js(r[4])}, "correct": {_JSON_BOOL[r[5]]}}}\n' for r in chunk))
+            n += len(chunk)
+    finally:
+        if f is not sys.stdout: f.close()
+        else: f.flush()
+    return n
+
+#
+# ---------------------------- Session journal ----------------------------
+# The attempt in progress, as an append-only log in the user data dir, so a crash (or a plain quit)
+# mid-exam can be resumed exactly where it stopped. Each record: kind, payload length, CRC32, payload;
+# a torn write at the end of the file just ends the replay there.
+SESSION_JOURNAL = "testify_session.journal"
+_JREC = struct.Struct("<BII")
+J_BEGIN, J_SECTION, J_ANSWER, J_SHEET, J_NAV, J_TIMER, J_LOCK = range(1, 8)
+_J_ANSWER = struct.Struct("<HIB")  # section idx, item, answer byte (0 = blank)
+_J_SECTION = struct.Struct("<HI")  # section idx, item count; then the name (utf-8)
+_J_NAV = struct.Struct("<BHI")     # 1 = in the section (0 = lobby), section idx, question
+_J_TIMER = struct.Struct("<Hi")    # section idx, ms left (-1 = untimed)
+_J_IDX = struct.Struct("<H")       # section idx (J_LOCK, and J_SHEET before the answer bytes)
+
+def journal_record(kind, payload):
+    import zlib
+    return _JREC.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+class SessionJournal:
+    """
+    Writer for the journal file. The main thread only queues encoded records; a background thread writes
+    and fsyncs whatever has piled up every FLUSH_MS (group commit), so a frame never waits on the disk
+    and a crash costs at most the last FLUSH_MS of answers.
+    compact() swaps the whole log for a snapshot of the current state (written to a temp file, then renamed).
+    """
+    FLUSH_MS = 250
+    COMPACT_AFTER = 4096  # records appended since the last snapshot
+
+    def __init__(self, path, records):
+        import threading
+        self.path = path
+        self.n = 0
+        self.failed = None
+        self._f = None
+        self._q = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self.compact(records)
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, kind, payload):
+        rec = journal_record(kind, payload)
+        with self._lock: self._q.append(rec)
+        self.n += 1
+
+    def compact(self, records):
+        snap = b"".join(journal_record(k, p) for k, p in records)
+        with self._lock: self._q.append((snap,))  # a tuple = snapshot; replaces everything queued/written before it
+        self.n = 0
+
+    def close(self, remove=False):
+        """Write out what's queued and stop (blocks for one last fsync). remove: the attempt is over, drop the file."""
+        self._closing = True; self._wake.set()
+        self._thread.join()  # no timeout: giving up early on a slow disk would lose the last answers
+        if remove:
+            try: os.remove(self.path)
+            except OSError: pass
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.FLUSH_MS / 1000)
+            self._wake.clear()
+            closing = self._closing
+            with self._lock: batch, self._q = self._q, []
+            if batch and self.failed is None:
+                try: self._write(batch)
+                except Exception as ex:
+                    self.failed = str(ex); _log_runtime(f"Session journal stopped: {ex}")
+            if closing: break
+        if self._f is not None: self._f.close()
+
+    def _write(self, batch):
+        last_snap = max((i for i, r in enumerate(batch) if isinstance(r, tuple)), default=-1)
+        if last_snap >= 0:
+            tail = b"".join(r for r in batch[last_snap+1:] if not isinstance(r, tuple))
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(batch[last_snap][0] + tail); f.flush(); os.fsync(f.fileno())
+            if self._f is not None: self._f.close()  # (Windows won't rename over an open file)
+            os.replace(tmp, self.path)
+            self._f = open(self.path, "ab")
+            return
+        self._f.write(b"".join(batch))
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+def read_session_journal(path):
+    """
+    Replay a journal into the state it describes, or None if there's nothing usable:
+    {"begin": {...}, "sections": {idx: (name, n items)}, "sheets": {idx: bytearray}, "locked": set,
+     "nav": (in section?, idx, q) or None, "timer": (idx, ms left or None) or None}
+    """
+    import zlib
+    try:
+        with open(path, "rb") as f: data = f.read()
+    except OSError:
+        return None
+    st = {"begin": None, "sections": {}, "sheets": {}, "locked": set(), "nav": None, "timer": None}
+    pos, end = 0, len(data)
+    while pos + _JREC.size <= end:
+        kind, n, crc = _JREC.unpack_from(data, pos)
+        p = data[pos+_JREC.size:pos+_JREC.size+n]
+        if len(p) < n or zlib.crc32(p) != crc: break  # torn / garbled tail: the rest never made it to disk
+        pos += _JREC.size + n
+        try:
+            if kind == J_BEGIN:
+                st = {"begin": json.loads(p.decode("utf-8")), "sections": {}, "sheets": {}, "locked": set(), "nav": None, "timer": None}
+            elif kind == J_SECTION:
+                idx, cnt = _J_SECTION.unpack_from(p)
+                st["sections"][idx] = (p[_J_SECTION.size:].decode("utf-8"), cnt)
+                st["sheets"].setdefault(idx, bytearray(cnt))
+            elif kind == J_ANSWER:
+                idx, i, c = _J_ANSWER.unpack(p)
+                st["sheets"][idx][i] = c
+            elif kind == J_SHEET:
+                st["sheets"][_J_IDX.unpack_from(p)[0]] = bytearray(p[_J_IDX.size:])
+            elif kind == J_NAV:
+                st["nav"] = _J_NAV.unpack(p)
+            elif kind == J_TIMER:
+                idx, ms = _J_TIMER.unpack(p)
+                st["timer"] = (idx, None if ms < 0 else ms)
+            elif kind == J_LOCK:
+                st["locked"].add(_J_IDX.unpack(p)[0])
+        except (KeyError, IndexError, ValueError, struct.error):
+            break  # a record that doesn't fit what came before it; stop trusting the rest
+    return st if st["begin"] is not None and st["sections"] else None
+
+#
+# ---------------------------- Section timer ----------------------------
+SECTION_TIMER_EVENT = pygame.USEREVENT + 3  # the timed section's deadline has passed
+
+class SectionTimer:
+    """
+    Countdown for the section being taken, kept as an absolute deadline on the monotonic clock, so dropped
+    frames, a 1 FPS loop or a minimized window can't stretch it. While it runs, pygame's timer thread posts
+    SECTION_TIMER_EVENT at the deadline and the main loop acts on it whatever screen is up.
+    Stopped (practice mode) it just holds the ms that were left.
+    """
+    def __init__(self):
+        self.sec = None        # section index being timed
+        self.deadline = None   # time.monotonic() at which it runs out, while running
+        self.held_ms = None    # ms left while not running (None = untimed)
+
+    def set(self, sec, ms_left, running=True):
+        self.sec = sec
+        if ms_left is not None and running:
+            self.deadline = time.monotonic() + ms_left / 1000; self.held_ms = None
+        else:
+            self.deadline = None; self.held_ms = None if ms_left is None else int(ms_left)
+        self._arm()
+
+    def stop(self):
+        self.set(None, None)
+
+    def running(self):
+        return self.deadline is not None
+
+    def left_ms(self):
+        if self.deadline is None: return self.held_ms
+        return max(0, math.ceil((self.deadline - time.monotonic()) * 1000))  # 0 exactly when expired() turns True
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _arm(self):
+        """(Re)schedule the one-shot event for the deadline; SDL's timer can fire a hair early, so it's re-armed then."""
+        ms = self.left_ms() if self.deadline is not None else 0
+        try:
+            pygame.time.set_timer(SECTION_TIMER_EVENT, max(1, ms) if self.deadline is not None else 0, 1)
+        except Exception:
+            pass  # no timer subsystem (headless tools): frame() still notices the deadline
 
 #
 # ---------------------------- Toast ----------------------------
@@ -547,10 +2751,22 @@ class Toast:
         self.ts = 0
         self.in_ms = 180; self.hold_ms = 4000; self.out_ms = 200
         self.rect = None
+    def animating(self):
+        return bool(self.msg) and self.phase in ("in", "out")
+    def lane(self, W, H):
+        """Everything the toast (plus its shadow) can cover while sliding."""
+        return pygame.Rect(0, H-66, W, 66+50+20)
     def trigger(self, msg):
         self.msg = msg or ""
         if not self.msg: self.phase="idle"; return
         self.phase = "in"; self.ts = pygame.time.get_ticks()
+    def show(self, msg):
+        """Like trigger, but if the toast is already up just swap the text (progress updates)."""
+        if self.msg and self.phase in ("in", "hold"):
+            self.msg = msg
+            if self.phase == "hold": self.ts = pygame.time.get_ticks()
+        else:
+            self.trigger(msg)
     def draw(self, screen, fonts, theme, H):
         if not self.msg or self.phase=="idle":
             self.rect=None; return
@@ -571,12 +2787,19 @@ class Toast:
 
 #
 # ---------------------------- States ----------------------------
-S_HOME, S_SETTINGS, S_HELP, S_LOBBY, S_SECTION, S_RESULTS, S_BUILDER = range(7)
+S_HOME, S_SETTINGS, S_HELP, S_LOBBY, S_SECTION, S_RESULTS, S_BUILDER, S_HISTORY, S_ANALYSIS = range(9)
+STATE_NAMES = {S_HOME: "home", S_SETTINGS: "settings", S_HELP: "help", S_LOBBY: "lobby",
+               S_SECTION: "section", S_RESULTS: "results", S_BUILDER: "builder", S_HISTORY: "history",
+               S_ANALYSIS: "analysis"}
+
+# window events after which whatever we drew before may be gone
+_EXPOSE_EVENTS = {getattr(pygame, nm) for nm in ("VIDEOEXPOSE", "WINDOWEXPOSED", "WINDOWSHOWN", "WINDOWRESTORED",
+                                                 "WINDOWMAXIMIZED", "WINDOWSIZECHANGED") if hasattr(pygame, nm)}
 
 #
 # ---------------------------- App ----------------------------
 class App:
-    def __init__(self, initial_json=None):
+    def __init__(self, initial_json=None, settings=None):
         pygame.init()
         pygame.display.set_caption(f"{APP_NAME} v{VERSION}")
         set_window_icon()  # pre-set (some platforms read this prior to set_mode)
@@ -585,36 +2808,89 @@ class App:
         set_window_icon()  # post-set (mac/win variants sometimes require after set_mode too)
         self.clock = pygame.time.Clock()
 
-        self.settings = load_settings()
+        self.settings = load_settings() if settings is None else settings
         self.theme = THEMES.get(self.settings.get("theme","light"), THEMES["light"])
         self.fonts = mk_fonts(self.settings.get("font_size",24),
                               os.path.join(_base_dir(), "ui_font.ttf"))
         self.menu_logo = load_app_logo()
+        if self.menu_logo:  # header size, scaled once here instead of every frame
+            h = 56
+            w = int(self.menu_logo.get_width() * (h / self.menu_logo.get_height()))
+            self.menu_logo = pygame.transform.smoothscale(self.menu_logo, (w, h))
+        ICONS.preload()
+        ICONS.build_atlas(22)  # every button/chip icon is 22px
 
         # exam
-        self.exam_path = initial_json if initial_json and os.path.isfile(initial_json) else None
+        self._prewrap = None  # generator from iter_prewrap while pre-wrapping is in progress
+        self._loader = None  # ExamLoader while an exam is being read on the worker thread
+        self._drop_batch = None  # files of a multi-file drop, between DROPBEGIN and DROPCOMPLETE
+        self._load_to_lobby = False
+        self._load_pct = -1
+        self.exam_path = None
+        self._exam_src = None  # what exam_path was loaded from (path or list of paths), for resuming
         self.sections_all = []
         self.state = S_HOME
-        if self.exam_path:
-            try:
-                self.sections_all = parse_exam(self.exam_path)
-            except Exception as ex:
-                print("Load error:", ex)
 
         # runtime
         self.toast = Toast()
         self.sec_i = 0; self.q_i = 0
         self.answers = {}
+        self.live = LiveScore()  # running score, kept in step with answers by _set_answer
         self.locked = {}
-        self.time_left_ms = None; self.last_tick = pygame.time.get_ticks()
+        self.timer = SectionTimer()  # time_left_ms reads/writes this
+        self._timer_shown = None; self._timer_chip = None
+        self.choice_rects = []
         self.results = None
+        self._results_at = None  # when self.results was graded (names the saved report files)
+        self._attempt_t0 = None  # unix time the first section of this attempt was opened
+        self._attempt_mode = None  # mode a resumed attempt was taken in (None = whatever settings say)
+        self._answer_rev = 0; self._recorded_rev = None  # so finishing twice without changes stores one attempt
+
+        # attempt history (see AttemptStore); the history screen reads it a page at a time
+        self.history = AttemptStore()
+        self._hist = None  # HistoryPages for the current filter, made when the screen opens
+        self._hist_this_exam = False
+        self._hist_sel = None  # (attempt row, its section scores) picked in the list
+        self._exam_key = (None, None)  # (id(sections_all), exam_identity key)
+        self.hist_list = VirtualList(row_h=48, gap=6)
+        self._analysis = None  # AnalysisJob for the item-analysis screen
+        self.an_sec = 0
+        self.an_sec_list = VirtualList(row_h=44, gap=6, keys_need_hover=True)
+        self.an_item_list = VirtualList(row_h=34, gap=4)
+
+        # session journal: the attempt in progress, for resuming after a crash (see SessionJournal)
+        self._jr = None
+        self._jr_nav = None; self._jr_tick = 0
+        self._sec_idx = (None, {})  # ((id, len) of sections_all, name -> index)
+        self._resume = read_session_journal(self._journal_path()) if self.settings.get("journal", True) else None
+        self._resume_pending = None  # journal state waiting for its exam to finish loading
+
+        # retained widgets per screen (see _ui); the scrolling lists live here so they keep their scroll
+        self._ui_trees = {}
+        self.lobby_list = VirtualList(row_h=56, gap=8)
+        self.b_sec_list = VirtualList(row_h=40, gap=6, keys_need_hover=True)
+        self.b_item_list = VirtualList(row_h=40, gap=6, keys_need_hover=True)
+        self._last_view = None  # _view_key as of the end of the last frame
+        self.ui_rev = 0  # bump when the content a screen was laid out for changes (e.g. a new exam)
 
         # builder
         self.builder_sections = []
         self.b_sel_sec = -1
         self.b_sel_item = -1
+        self.b_index = SearchIndex()  # over builder_sections' items
+        self.b_hits = []  # (section idx, item idx, label) for the current search
+        self._b_hits_key = None  # (query, index rev) b_hits was made for
+        self._b_locs = None  # id(item) -> (section idx, item idx); None after adds/deletes
+        self._b_search_open = False
+        self._b_index_job = None  # generator indexing imported items in idle time
+        self._b_index_pending = []; self._b_index_done = 0; self._b_index_drawn = 0
+        self.b_hit_list = VirtualList(row_h=40, gap=6, keys_need_hover=True)
         self._init_builder_inputs()
 
+        # loads in the background like a dropped file, so the window is up right away
+        if initial_json and (not isinstance(initial_json, str) or os.path.exists(initial_json)):
+            self.load_exam_file(initial_json)
+
     # ---------- builder inputs (for Exam Builder screen) ----------
     def _init_builder_inputs(self):
         self.in_sec_name = TextInput(pygame.Rect(0,0,0,0), "", placeholder="Section name")
@@ -623,6 +2899,7 @@ class App:
         self.in_passage = TextInput(pygame.Rect(0,0,0,0), "", multiline=True, placeholder="Passage (optional)")
         self.in_choice = [TextInput(pygame.Rect(0,0,0,0), "", placeholder=f"Choice {c}") for c in "ABCD"]
         self.in_ans = TextInput(pygame.Rect(0,0,0,0), "", placeholder="Correct (A/B/C/D)")
+        self.in_search = TextInput(pygame.Rect(0,0,0,0), "", placeholder="Search questions, passages, choices")
 
     def _sync_inputs_from_model(self):
         if 0 <= self.b_sel_sec < len(self.builder_sections):
@@ -668,6 +2945,57 @@ class App:
                 it["passage"] = self.in_passage.text
                 it["choices"] = [c.text.strip() for c in self.in_choice if c.text.strip()!=""]
                 it["ans"] = (self.in_ans.text.strip().upper()[:1] if self.in_ans.text.strip() else "")
+                self.b_index.update(it)  # only this item gets re-indexed
+
+    # ---------- builder search ----------
+    def _builder_locate(self, it):
+        if self._b_locs is None:
+            self._b_locs = {id(x): (si, j) for si, sec in enumerate(self.builder_sections)
+                            for j, x in enumerate(sec.get("items", []))}
+        return self._b_locs.get(id(it))
+
+    def _index_items(self, items):
+        for k, it in enumerate(items):
+            self.b_index.update(it)
+            self._b_index_done = k+1
+            yield k
+        self._b_index_job = None; self._b_index_pending = []
+
+    def _builder_search(self):
+        """Search again if the query or the index changed since last time."""
+        key = (self.in_search.text, self.b_index.rev)
+        if key == self._b_hits_key: return
+        self._b_hits_key = key
+        self.b_hits = []
+        for it, _score in (self.b_index.search(self.in_search.text) if self.in_search.text.strip() else []):
+            loc = self._builder_locate(it)
+            if loc is None: continue
+            si, j = loc
+            self.b_hits.append((si, j, f"{self.builder_sections[si].get('name','Untitled')} · Q{j+1}: {it.get('q','')}"))
+        self.b_hit_list.set_count(len(self.b_hits)); self.b_hit_list.scroll_to(0)
+
+    def _builder_jump(self, si, j):
+        self._apply_inputs_to_model()
+        self.b_sel_sec = si; self.b_sel_item = j
+        self.b_sec_list.set_count(len(self.builder_sections)); self.b_sec_list.ensure_visible(si)
+        self.b_item_list.set_count(len(self.builder_sections[si].get("items", []))); self.b_item_list.ensure_visible(j)
+        self._sync_inputs_from_model()
+        self.in_search.active = False; self._b_search_open = False
+
+    def _import_loaded_exam(self):
+        """Append the loaded exam's sections to the builder (as plain JSON dicts) and index them."""
+        if not self.sections_all:
+            self.toast.trigger("No exam loaded to import"); return
+        self._ensure_all_sections(); self._apply_inputs_to_model()
+        new = sections_to_json(self.sections_all)["sections"]
+        self.builder_sections.extend(new)
+        self._b_locs = None
+        # a big bank takes a few seconds to tokenize, so it's indexed in idle time like prewrap
+        items = [it for sec in new for it in sec["items"]]
+        if self._b_index_job is not None: items = self._b_index_pending + items
+        self._b_index_pending = items
+        self._b_index_job = self._index_items(items)
+        self.toast.trigger(f"Imported {sum(len(sec['items']) for sec in new)} items from {os.path.basename(self.exam_path or '')}")
 
     # ---------- utils (mostly resizing/font stuff) ----------
     def on_resize(self, w, h):
@@ -675,6 +3003,8 @@ class App:
         self.W, self.H = self.screen.get_size()
         base = 22 if self.W < 1100 else 24 if self.W < 1400 else 26
         self.fonts = mk_fonts(base, os.path.join(_base_dir(), "ui_font.ttf"))
+        DIRTY.invalidate()
+        self.start_prewrap()
 
     def fill_bg(self):
         self.screen.fill(self.theme["bg"])
@@ -683,29 +3013,252 @@ class App:
         bar = pygame.Rect(0,0,self.W,72)
         blit_shadowed_card(self.screen, bar, self.theme)
         if self.menu_logo:
-            h = 56
-            w = int(self.menu_logo.get_width() * (h / self.menu_logo.get_height()))
-            lg = pygame.transform.smoothscale(self.menu_logo,(w,h))
-            self.screen.blit(lg, (18,8))
+            self.screen.blit(self.menu_logo, (18,8))
         else:
             self.screen.blit(draw_text(APP_NAME, self.fonts["h1"], self.theme["text"]), (20,14))
         ver = draw_text(f"v{VERSION}", self.fonts["body"], self.theme["muted"])
         self.screen.blit(ver, (self.W-ver.get_width()-18, 24))
 
+    def _ui(self, name, build, *key):
+        """Retained widgets for a screen; build(ui) only runs again when the size/fonts/content key changes."""
+        key = (self.W, self.H, id(self.fonts), self.ui_rev) + key
+        old = self._ui_trees.get(name)
+        if old is not None and old.key == key:
+            return old
+        ui = Widgets(key); build(ui); ui.carry_over(old)
+        self._ui_trees[name] = ui
+        return ui
+
+    def start_prewrap(self):
+        """(Re)start wrapping the loaded exam at the section screen's current widths, in idle time."""
+        if not self.sections_all or not self.settings.get("prewrap", True):
+            self._prewrap = None; return
+        self._prewrap = iter_prewrap(self.sections_all, self.fonts["body"],
+                                     int(self.W*0.6-30)-32, int(self.W*0.4-30)-32)
+
+    def _has_background_work(self):
+        return self._prewrap is not None or self._b_index_job is not None
+
+    def _background_step(self, budget_ms=4):
+        """Spare-time work for a few ms (builder indexing, pre-wrapping). Returns True if something visible changed."""
+        if self._b_index_job is not None:
+            end = pygame.time.get_ticks() + budget_ms
+            for _ in self._b_index_job:
+                if pygame.time.get_ticks() >= end: break
+            if self.state == S_BUILDER and self._b_search_open and \
+                    (self._b_index_job is None or end - self._b_index_drawn > 250):
+                # hits / progress line changed; a few times a second is plenty
+                self._b_index_drawn = end; DIRTY.invalidate()
+                return True
+            return False
+        if self._prewrap is not None:
+            end = pygame.time.get_ticks() + budget_ms
+            for _ in self._prewrap:
+                if pygame.time.get_ticks() >= end: return False
+            self._prewrap = None
+        return False
+
+    def _open_exam(self, p, to_lobby=False):
+        """Start reading an exam on a worker thread; a load that's still running gets cancelled."""
+        if self._loader is not None: self._loader.cancel()
+        self._loader = ExamLoader(p, use_cache=bool(self.settings.get("exam_cache", True)))
+        self._load_to_lobby = to_lobby
+        self._load_pct = -1
+
+    def _loading_current(self):
+        """True while the exam on screen is still growing."""
+        return self._loader is not None and self.sections_all is self._loader.sections
+
+    def _pump_loader(self):
+        """Main thread: take in what the worker has read, swap the new exam in, keep the toast up to date."""
+        ld = self._loader
+        if ld is None: return
+        ld.pump()
+        name = os.path.basename(ld.label)
+        if self.sections_all is not ld.sections and (ld.sections or (ld.done and ld.error is None)):
+            # the old exam stays up until the new one has something to show, then it's one assignment
+            self.sections_all = ld.sections; self.exam_path = ld.label; self._exam_src = ld.path; self.ui_rev += 1
+            self.answers = {}; self.locked = {}; self.live = LiveScore(); self.results = None
+            self._attempt_t0 = self._attempt_mode = None; self._recorded_rev = None; self.timer.stop()
+            self._journal_close(remove=True)  # whatever attempt was running is gone now
+            self._prewrap = None
+            self.lobby_list.scroll_to(0)
+            if self._load_to_lobby: self.state = S_LOBBY
+        if ld.done:
+            self._loader = None
+            if ld.error is not None and not ld.sections: self.toast.show(f"Load error: {ld.error}")
+            elif ld.error is not None: self.toast.show(f"Load error (loaded {len(ld.sections)} sections): {ld.error}")
+            elif ld.file_errors:
+                for fp, msg in ld.file_errors: _log_runtime(f"Load error in {fp}: {msg}")
+                first = ld.file_errors[0]
+                self.toast.show(f"Loaded {ld.n_files-len(ld.file_errors)}/{ld.n_files} files from {name}; "
+                                f"{len(ld.file_errors)} failed, e.g. {os.path.basename(first[0])}: {first[1]}")
+            elif ld.many: self.toast.show(f"Loaded {ld.n_files} files from {name} ({len(ld.sections)} sections)")
+            else: self.toast.show(f"Loaded: {name}")
+            self.start_prewrap()
+            if self._resume_pending is not None:
+                if ld.error is None and ld.sections is self.sections_all: self._apply_resume(self._resume_pending)
+                else: self._resume_pending = None; self.toast.show(f"Can't resume: {ld.error or 'exam failed to load'}")
+        else:
+            pct = int(ld.fraction()*100)
+            if pct == self._load_pct: return
+            self._load_pct = pct
+            self.toast.show(f"Loading {name}… {pct}%")
+        DIRTY.add(self.toast.lane(self.W, self.H))
+
+    def _ensure_section(self, idx):
+        """True if section idx exists, waiting on a still-loading exam if needed."""
+        if self._loading_current():
+            self._loader.wait_for(idx); self._pump_loader()
+        return 0 <= idx < len(self.sections_all)
+
+    def _ensure_all_sections(self):
+        if self._loading_current():
+            self._loader.finish(); self._pump_loader()
+
+    def wait_for_load(self):
+        """Block until a background load is through (headless use, e.g. the benchmark)."""
+        if self._loader is not None:
+            self._loader.finish(); self._pump_loader()
+
+    def load_exam_file(self, p, to_lobby=False):
+        """
+        Load an exam (drag & drop etc.) in the background; the toast shows progress and how it went.
+        p can also be a folder or a list of files (a whole question bank).
+        """
+        self._open_exam(p, to_lobby)
+        self.toast.show(f"Loading {os.path.basename(exam_label(p))}…")
+        DIRTY.add(self.toast.lane(self.W, self.H))
+
+    # ---------- session journal (resume after a crash) ----------
+    def _journal_path(self):
+        return os.path.join(_user_data_dir(), SESSION_JOURNAL)
+
+    def _sec_index(self):
+        """section name -> index in sections_all (rebuilt when the exam changes or grows)"""
+        key = (id(self.sections_all), len(self.sections_all))
+        if self._sec_idx[0] != key:
+            idx = {}
+            for i, sec in enumerate(self.sections_all): idx.setdefault(sec[0], i)
+            self._sec_idx = (key, idx)
+        return self._sec_idx[1]
+
+    def _journal_records(self):
+        """The attempt as it stands, as journal records (what a new or compacted journal starts with)."""
+        recs = [(J_BEGIN, json.dumps({"src": self._exam_src, "label": self.exam_path, "mode": self.mode,
+                                      "started": self._attempt_t0}, ensure_ascii=False).encode("utf-8"))]
+        idx = self._sec_index()
+        for name, sheet in self.answers.items():
+            i = idx.get(name)
+            if i is None: continue
+            recs.append((J_SECTION, _J_SECTION.pack(i, len(sheet)) + name.encode("utf-8")))
+            recs.append((J_SHEET, _J_IDX.pack(i) + sheet.to_bytes()))
+            if self.locked.get(name): recs.append((J_LOCK, _J_IDX.pack(i)))
+        recs.append((J_NAV, _J_NAV.pack(self.state == S_SECTION, self.sec_i, self.q_i)))
+        if self.state == S_SECTION:
+            recs.append((J_TIMER, _J_TIMER.pack(self.sec_i, -1 if self.time_left_ms is None else self.time_left_ms)))
+        return recs
+
+    def _journal_open(self):
+        if self._jr is None and self.settings.get("journal", True) and self._exam_src is not None:
+            self._jr = SessionJournal(self._journal_path(), self._journal_records())
+            self._jr_nav = (self.state == S_SECTION, self.sec_i, self.q_i)
+            self._resume = None  # that session's file just got replaced
+
+    def _journal(self, kind, payload):
+        """Log one change to the attempt (call after making it). The first one opens the journal with a full snapshot."""
+        if self._jr is not None: self._jr.append(kind, payload)
+        else: self._journal_open()  # the opening snapshot has this change already
+
+    def _journal_timer(self):
+        self._jr_tick = pygame.time.get_ticks()
+        self._journal(J_TIMER, _J_TIMER.pack(self.sec_i, -1 if self.time_left_ms is None else self.time_left_ms))
+
+    def _journal_checkpoint(self):
+        """Once a frame: note where the student is, and compact the log once it's grown long."""
+        if self._jr is None: return
+        nav = (self.state == S_SECTION, self.sec_i, self.q_i)
+        if nav != self._jr_nav:
+            self._jr_nav = nav; self._jr.append(J_NAV, _J_NAV.pack(*nav))
+        if self._jr.n > SessionJournal.COMPACT_AFTER:
+            self._jr.compact(self._journal_records())
+
+    def _journal_close(self, remove=False):
+        if self._jr is not None:
+            self._jr.close(remove); self._jr = None
+
+    def resume_session(self):
+        """Reload the unfinished session's exam (if it isn't the one loaded) and put the attempt back."""
+        st = self._resume
+        if st is None: return
+        src = st["begin"].get("src")
+        if self.sections_all and src == self._exam_src and not self._loading_current():
+            self._apply_resume(st)
+        elif src:
+            self._resume_pending = st
+            self.load_exam_file(src)
+
+    def _apply_resume(self, st):
+        self._resume = self._resume_pending = None
+        secs = self.sections_all
+        for idx, (name, n) in st["sections"].items():
+            if idx >= len(secs) or secs[idx][0] != name or len(secs[idx][1]) != n:
+                self.toast.trigger("Can't resume: the exam has changed since that session"); return
+        self.answers = {}; self.locked = {}; self.live = LiveScore(); self.results = None
+        for idx, (name, n) in sorted(st["sections"].items()):
+            items = secs[idx][1]
+            sheet = self.answers[name] = AnswerSheet.from_bytes(st["sheets"].get(idx) or bytes(n))
+            self.live.section(name, items)
+            for i, c in enumerate(sheet.to_bytes()):  # through LiveScore, so the running score matches
+                if c: self.live.update(name, i, None, _ANSWER_LETTERS[c])
+            self.locked[name] = idx in st["locked"]
+        b = st["begin"]
+        self._attempt_mode = b.get("mode") or None  # just this attempt; the saved preference stays as it was
+        self._attempt_t0 = b.get("started")
+        self._answer_rev += 1; self._recorded_rev = None
+        nav, timer = st["nav"], st["timer"]
+        if nav and nav[0] and nav[1] < len(secs) and not self.locked.get(secs[nav[1]][0]):
+            self.start_section(nav[1])
+            if timer and timer[0] == nav[1]: self.time_left_ms = timer[1]
+            self.q_i = min(nav[2], max(0, len(secs[nav[1]][1]) - 1))
+        else:
+            self.sec_i = nav[1] if nav and nav[1] < len(secs) else 0
+            self.state = S_LOBBY
+        if self._jr is not None: self._jr.compact(self._journal_records())
+        else: self._journal_open()
+        self.toast.trigger("Resumed where you left off")
+
     # ---------- toast (for little notification popups) ----------
     def draw_toast(self):
         self.toast.draw(self.screen, self.fonts, self.theme, self.H)
 
     # ---------- screens (all the different UI pages) ----------
+    def _card(self):
+        return pygame.Rect(int(self.W*0.1), 100, int(self.W*0.8), self.H-160)
+
+    def _build_home(self, ui):
+        ui.card = self._card()
+        ui.resume = Button((ui.card.left+20, ui.card.bottom-20-44-16-44, 160, 44), "Resume", icon="play") if self._resume else None
+        ui.start = Button(pygame.Rect(0,0,0,0), "Start", icon="play")
+        ui.settings = Button(pygame.Rect(0,0,0,0), "Settings", icon="settings")
+        ui.builder = Button(pygame.Rect(0,0,0,0), "Exam Builder", icon="code")
+        ui.history = Button(pygame.Rect(0,0,0,0), "History", icon="chart")
+        ui.help = Button(pygame.Rect(0,0,0,0), "Help", icon="help")
+        ui.quit = Button(pygame.Rect(0,0,0,0), "Quit", icon="power")
+        ui.buttons = [ui.start, ui.settings, ui.builder, ui.history, ui.help, ui.quit]
+        place_button_row(ui.card, ui.buttons, align="center", pad_x=20, pad_y=20, gap=12, min_w=120, max_w=220, h=44)
+        if ui.resume: ui.buttons.append(ui.resume)
+
     def scr_home(self, events):
+        ui = self._ui("home", self._build_home, self._resume is not None)
+        card = ui.card
         self.fill_bg(); self.header()
-        card = pygame.Rect(int(self.W*0.1), 100, int(self.W*0.8), self.H-160)
         blit_shadowed_card(self.screen, card, self.theme)
 
         y = card.top+22
         self.screen.blit(draw_text("Welcome", self.fonts["h1"], self.theme["text"]), (card.left+20, y)); y+=56
         for ln in [
-            "Drag & drop a .json exam file here, or pass it as a command-line argument.",
+            "Drag & drop a .json (or compiled .tfx) exam file here, or pass it as a command-line argument.",
             "Use Settings to switch Theme and Mode (Exam or Practice).",
             "Build an exam with the Exam Builder.",
             "Tip: A/B/C/D to answer, ←/→ to move, Enter to submit, Esc to Lobby (Practice)."
@@ -715,37 +3268,55 @@ class App:
         y += 10
         self.screen.blit(draw_text(f"Loaded file: {os.path.basename(self.exam_path) if self.exam_path else '(none)'}", self.fonts["body"], self.theme["text"]), (card.left+20, y)); y+=40
 
-        self.btn_start = Button(pygame.Rect(0,0,0,0), "Start", icon="play")
-        self.btn_settings = Button(pygame.Rect(0,0,0,0), "Settings", icon="settings")
-        self.btn_builder = Button(pygame.Rect(0,0,0,0), "Exam Builder", icon="code")
-        self.btn_help = Button(pygame.Rect(0,0,0,0), "Help", icon="help")
-        self.btn_quit = Button(pygame.Rect(0,0,0,0), "Quit", icon="power")
-        self.btn_start.enabled = bool(self.sections_all)
-
-        layout_button_row(card, [self.btn_start, self.btn_settings, self.btn_builder, self.btn_help, self.btn_quit],
-                          self.theme, self.fonts, align="center", pad_x=20, pad_y=20, gap=12, min_w=120, max_w=220, h=44)
+        ui.start.enabled = bool(self.sections_all)
+        if ui.resume:
+            st = self._resume
+            done = sum(1 for b in st["sheets"].values() for c in b if c)
+            when = _fmt_when(st["begin"]["started"]) if st["begin"].get("started") else "earlier"
+            msg = f"Unfinished session from {when}: {os.path.basename(st['begin'].get('label') or '')} • {done} answered"
+            r = ui.resume.rect
+            self.screen.blit(draw_text(fit_text(msg, self.fonts["body"], card.right-20-(r.right+16)), self.fonts["body"], self.theme["text"]),
+                             (r.right+16, r.centery-self.fonts["body"].get_height()//2))
+            ui.resume.enabled = self._resume_pending is None
+        ui.draw(self.screen, self.theme, self.fonts)
 
         for e in events:
-            if self.btn_start.handle_event(e): self.state = S_LOBBY
-            elif self.btn_settings.handle_event(e): self.state = S_SETTINGS
-            elif self.btn_builder.handle_event(e):
+            if ui.resume and ui.resume.handle_event(e): self.resume_session()
+            elif ui.start.handle_event(e): self.state = S_LOBBY
+            elif ui.settings.handle_event(e): self.state = S_SETTINGS
+            elif ui.builder.handle_event(e):
                 self.builder_sections = [] ; self.b_sel_sec = -1 ; self.b_sel_item = -1
+                self.b_index.clear(); self._b_locs = None; self.in_search.text = ""; self.in_search.cursor = 0
+                self._b_index_job = None; self._b_index_pending = []
                 self._sync_inputs_from_model()
                 self.state = S_BUILDER
-            elif self.btn_help.handle_event(e): self.state = S_HELP
-            elif self.btn_quit.handle_event(e): pygame.event.post(pygame.event.Event(pygame.QUIT))
+            elif ui.history.handle_event(e): self.open_history()
+            elif ui.help.handle_event(e): self.state = S_HELP
+            elif ui.quit.handle_event(e): pygame.event.post(pygame.event.Event(pygame.QUIT))
             elif e.type == pygame.DROPFILE:
-                try:
-                    p = e.file
-                    self.sections_all = parse_exam(p); self.exam_path = p
-                    self.toast.trigger(f"Loaded: {os.path.basename(p)}")
-                except Exception as ex:
-                    self.toast.trigger(f"Load error: {ex}")
+                self.load_exam_file(getattr(e, "files", e.file))
         self.draw_toast()
 
+    def _build_settings(self, ui):
+        ui.card = card = self._card()
+        y = card.top+20+56+36
+        ui.theme_chips = []
+        bx = card.left+20
+        for nm in ["light","dark","high_contrast"]:
+            ui.theme_chips.append((nm, pygame.Rect(bx, y, 180, 40))); bx += 196
+        y += 60+36
+        ui.mode_toggle = PillToggle((card.left+20, y, 300, 44), "Exam", "Practice")
+        y += 70
+        ui.fm = Button((card.left+180, y-6, 40,40), "–")
+        ui.fp = Button((card.left+230, y-6, 40,40), "+")
+        ui.back = Button(pygame.Rect(0,0,0,0), "Back", icon="back")
+        place_button_row(card, [ui.back], align="left", pad_x=20, pad_y=20, gap=12, min_w=140, max_w=180, h=44)
+        ui.buttons = [ui.fm, ui.fp, ui.back]
+
     def scr_settings(self, events):
+        ui = self._ui("settings", self._build_settings)
+        card = ui.card
         self.fill_bg(); self.header()
-        card = pygame.Rect(int(self.W*0.1), 100, int(self.W*0.8), self.H-160)
         blit_shadowed_card(self.screen, card, self.theme)
 
         y = card.top+20
@@ -753,65 +3324,63 @@ class App:
 
         # Theme chips
         self.screen.blit(draw_text("Theme", self.fonts["bold"], self.theme["text"]), (card.left+20, y)); y+=36
-        themes = ["light","dark","high_contrast"]; self.theme_buttons=[]
-        bx = card.left+20
-        for nm in themes:
-            r = pygame.Rect(bx, y, 180, 40); bx += 196
+        for nm, r in ui.theme_chips:
             draw_chip(self.screen, r, self.theme)
             active = (self.settings.get("theme","light")==nm)
             if active: pygame.draw.rect(self.screen, self.theme["ok"], r, 3, border_radius=12)
             icon = load_icon(nm, 22)
             if icon: self.screen.blit(icon, (r.x+10, r.y+9))
             self.screen.blit(draw_text(nm.replace("_"," ").title(), self.fonts["body"], self.theme["text"]), (r.x+40, r.y+9))
-            self.theme_buttons.append((nm, r))
         y+=60
 
         # Mode pill toggle
         self.screen.blit(draw_text("Mode", self.fonts["bold"], self.theme["text"]), (card.left+20, y)); y+=36
-        self.mode_toggle = PillToggle((card.left+20, y, 300, 44), "Exam", "Practice")
-        self.mode_toggle.value = 0 if self.settings.get("mode","exam")=="exam" else 1
-        self.mode_toggle.draw(self.screen, self.theme, self.fonts)
+        ui.mode_toggle.value = 0 if self.mode=="exam" else 1
+        ui.mode_toggle.draw(self.screen, self.theme, self.fonts)
         y+=70
 
         # font size
         self.screen.blit(draw_text("Font size", self.fonts["bold"], self.theme["text"]), (card.left+20, y))
         cur = str(self.settings.get("font_size",24))
         self.screen.blit(draw_text(cur, self.fonts["body"], self.theme["muted"]), (card.left+120, y))
-        self.btn_fm = Button((card.left+180, y-6, 40,40), "–")
-        self.btn_fp = Button((card.left+230, y-6, 40,40), "+")
-        self.btn_fm.draw(self.screen, self.theme, self.fonts)
-        self.btn_fp.draw(self.screen, self.theme, self.fonts)
-        y+=64
-        self.btn_back = Button(pygame.Rect(0,0,0,0), "Back", icon="back")
-        layout_button_row(card, [self.btn_back], self.theme, self.fonts, align="left", pad_x=20, pad_y=20, gap=12, min_w=140, max_w=180, h=44)
+        ui.draw(self.screen, self.theme, self.fonts)
 
         for e in events:
             if e.type == pygame.MOUSEBUTTONUP and e.button==1:
-                for nm, r in self.theme_buttons:
+                for nm, r in ui.theme_chips:
                     if r.collidepoint(e.pos):
                         self.settings["theme"]=nm; save_settings(self.settings)
                         self.theme = THEMES[nm]  # apply immediately
+                        _text_cache.clear()
                         self.fill_bg()
-            if self.mode_toggle.handle_event(e):
-                self.settings["mode"] = "practice" if self.mode_toggle.value==1 else "exam"
+            if ui.mode_toggle.handle_event(e):
+                self.settings["mode"] = "practice" if ui.mode_toggle.value==1 else "exam"
+                self._attempt_mode = None  # picked by hand, so it applies to the attempt in progress too
                 save_settings(self.settings)
-            if self.btn_fm.handle_event(e):
+            if ui.fm.handle_event(e):
                 self.settings["font_size"]=max(18,self.settings.get("font_size",24)-2); save_settings(self.settings)
                 self.fonts = mk_fonts(self.settings["font_size"], os.path.join(_base_dir(), "ui_font.ttf"))
-            if self.btn_fp.handle_event(e):
+                self.start_prewrap()
+            if ui.fp.handle_event(e):
                 self.settings["font_size"]=min(32,self.settings.get("font_size",24)+2); save_settings(self.settings)
                 self.fonts = mk_fonts(self.settings["font_size"], os.path.join(_base_dir(), "ui_font.ttf"))
-            if self.btn_back.handle_event(e):
+                self.start_prewrap()
+            if ui.back.handle_event(e):
                 self.state = S_HOME
             elif e.type == pygame.DROPFILE:
-                try:
-                    p=e.file; self.sections_all=parse_exam(p); self.exam_path=p; self.toast.trigger(f"Loaded: {os.path.basename(p)}")
-                except Exception as ex: self.toast.trigger(f"Load error: {ex}")
+                self.load_exam_file(getattr(e, "files", e.file))
         self.draw_toast()
 
+    def _build_back_only(self, ui):
+        ui.card = self._card()
+        ui.back = Button(pygame.Rect(0,0,0,0), "Back", icon="back")
+        place_button_row(ui.card, [ui.back], align="left", pad_x=20, pad_y=20, gap=12, min_w=140, max_w=180, h=44)
+        ui.buttons = [ui.back]
+
     def scr_help(self, events):
+        ui = self._ui("help", self._build_back_only)
+        card = ui.card
         self.fill_bg(); self.header()
-        card = pygame.Rect(int(self.W*0.1), 100, int(self.W*0.8), self.H-160)
         blit_shadowed_card(self.screen, card, self.theme)
         y = card.top+20
         self.screen.blit(draw_text("Help", self.fonts["h1"], self.theme["text"]), (card.left+20, y)); y+=56
@@ -819,92 +3388,168 @@ class App:
             "Load JSON: Drag & drop onto any screen or pass a file path when launching.",
             "Controls: A/B/C/D to answer; ←/→ to move; Enter to submit; Esc to Lobby (Practice).",
             "Exam Mode: Timer locks sections; Practice Mode lets you roam. Skip button appears in Practice.",
-            "Results: Save TXT or Export JSON with your performance.",
+            "Results: Save TXT or Export JSON with your performance. Every finished attempt is also kept in History.",
+            "Item Analysis (from History): difficulty, discrimination and option picks per question across all attempts.",
+            "Crashed or quit mid-exam? Home offers to Resume the session right where you left off.",
             "Exam Builder: Create sections/items and Save As JSON (Testify format)."
         ]:
             for w in wrap_lines(ln, self.fonts["body"], card.width-40):
                 self.screen.blit(draw_text(w, self.fonts["body"], self.theme["muted"]), (card.left+20,y)); y+=28
-        self.btn_back = Button(pygame.Rect(0,0,0,0), "Back", icon="back")
-        layout_button_row(card, [self.btn_back], self.theme, self.fonts, align="left", pad_x=20, pad_y=20, gap=12, min_w=140, max_w=180, h=44)
+        ui.draw(self.screen, self.theme, self.fonts)
         for e in events:
-            if self.btn_back.handle_event(e):
+            if ui.back.handle_event(e):
                 self.state = S_HOME
             elif e.type == pygame.DROPFILE:
-                try:
-                    p=e.file; self.sections_all=parse_exam(p); self.exam_path=p; self.toast.trigger(f"Loaded: {os.path.basename(p)}")
-                except Exception as ex: self.toast.trigger(f"Load error: {ex}")
+                self.load_exam_file(getattr(e, "files", e.file))
         self.draw_toast()
 
+    def _build_lobby(self, ui):
+        ui.card = card = pygame.Rect(int(self.W*0.06), 90, int(self.W*0.88), self.H-140)
+        top = card.top+16+46+36
+        self.lobby_list.set_rect((card.left+20, top, card.width-40, card.bottom-20-44-12 - top))
+        ui.home = Button(pygame.Rect(0,0,0,0), "Home", icon="home")
+        ui.results = Button(pygame.Rect(0,0,0,0), "View Results", icon="chart")
+        place_button_row(card, [ui.home, ui.results], align="left", pad_x=20, pad_y=20, gap=12, min_w=150, max_w=220, h=44)
+        ui.buttons = [ui.home, ui.results]
+
+    def _lobby_row(self, i):
+        name, items, tmin = self.sections_all[i]
+        locked = self.locked.get(name, False) and self.mode=="exam"
+        label = f"{i+1}. {name}   ({tmin if tmin else 'untimed'} min)   • {len(items)} items"
+        st = self.live.peek(name)
+        if st is not None and st.answered:
+            label += f"   • {st.answered}/{st.n} answered"
+            if self.mode == "practice": label += f"   • {st.correct}/{st.total} right"
+        if locked: label += "   — LOCKED"
+        return label, ("lock" if locked else "section"), not locked
+
     def scr_lobby(self, events):
+        mode = self.mode
+        ui = self._ui("lobby", self._build_lobby)
+        card = ui.card
+        self.lobby_list.set_count(len(self.sections_all))
         self.fill_bg(); self.header()
-        card = pygame.Rect(int(self.W*0.06), 90, int(self.W*0.88), self.H-140)
         blit_shadowed_card(self.screen, card, self.theme)
         y = card.top+16
         self.screen.blit(draw_text("Section Lobby", self.fonts["h1"], self.theme["text"]), (card.left+20, y)); y+=46
-        mode = self.settings.get("mode","exam")
-        self.screen.blit(draw_text(f"Mode: {mode.capitalize()} • File: {os.path.basename(self.exam_path) if self.exam_path else '(none)'}", self.fonts["body"], self.theme["muted"]), (card.left+20, y)); y+=36
-
-        self.section_buttons=[]
-        by=y
-        for i,(name,items,tmin) in enumerate(self.sections_all):
-            locked = self.locked.get(name, False) and mode=="exam"
-            label = f"{i+1}. {name}   ({tmin if tmin else 'untimed'} min)   • {len(items)} items"
-            if locked: label += "   — LOCKED"
-            btn = Button((card.left+20, by, card.width-40, 56), label, icon=("lock" if locked else "section"))
-            btn.enabled = not locked
-            self.section_buttons.append((i,btn)); btn.draw(self.screen, self.theme, self.fonts); by+=64
-
-        self.btn_home = Button(pygame.Rect(0,0,0,0), "Home", icon="home")
-        self.btn_results = Button(pygame.Rect(0,0,0,0), "View Results", icon="chart")
-        self.btn_results.enabled = bool(self.results)
-        layout_button_row(card, [self.btn_home, self.btn_results], self.theme, self.fonts, align="left", pad_x=20, pad_y=20, gap=12, min_w=150, max_w=220, h=44)
+        loading = "   • loading…" if self._loading_current() else ""
+        self.screen.blit(draw_text(f"Mode: {mode.capitalize()} • File: {os.path.basename(self.exam_path) if self.exam_path else '(none)'}{loading}", self.fonts["body"], self.theme["muted"]), (card.left+20, y)); y+=36
+
+        self.lobby_list.draw(self.screen, self.theme, self.fonts, self._lobby_row)
+        ui.results.enabled = bool(self.results)
+        ui.draw(self.screen, self.theme, self.fonts)
 
         for e in events:
-            if self.btn_home.handle_event(e): self.state = S_HOME
-            elif self.btn_results.handle_event(e): self.state = S_RESULTS
-            elif e.type==pygame.MOUSEBUTTONDOWN and e.button==1:
-                pass
+            if ui.home.handle_event(e): self.state = S_HOME
+            elif ui.results.handle_event(e): self.state = S_RESULTS
             elif e.type == pygame.DROPFILE:
-                try:
-                    p=e.file; self.sections_all=parse_exam(p); self.exam_path=p; self.toast.trigger(f"Loaded: {os.path.basename(p)}")
-                except Exception as ex: self.toast.trigger(f"Load error: {ex}")
+                self.load_exam_file(getattr(e, "files", e.file))
             else:
-                for idx, b in self.section_buttons:
-                    if b.handle_event(e):
-                        name = self.sections_all[idx][0]
-                        if self.locked.get(name, False) and mode=="exam":
-                            pass
-                        else:
-                            self.start_section(idx)
+                idx = self.lobby_list.handle_event(e)
+                if idx is not None:
+                    name = self.sections_all[idx][0]
+                    if self.locked.get(name, False) and mode=="exam":
+                        pass
+                    else:
+                        self.start_section(idx)
         self.draw_toast()
 
     def start_section(self, idx):
+        self._ensure_section(idx)
         self.sec_i = idx; name, items, tmin = self.sections_all[idx]
-        if name not in self.answers: self.answers[name] = [None]*len(items)
+        new_sheet = name not in self.answers
+        if new_sheet: self.answers[name] = AnswerSheet(len(items))
+        if self._attempt_t0 is None: self._attempt_t0 = time.time()
+        self.live.section(name, items)
         if name not in self.locked: self.locked[name] = False
-        self.q_i = 0; self.last_tick = pygame.time.get_ticks()
-        self.time_left_ms = int((tmin or 0)*60_000) if tmin else None
+        self.q_i = 0
+        # the countdown only runs in exam mode; practice shows the time but leaves it alone
+        self.timer.set(idx, int((tmin or 0)*60_000) if tmin else None, running=self.mode == "exam")
         self.state = S_SECTION
+        if new_sheet: self._journal(J_SECTION, _J_SECTION.pack(idx, len(items)) + name.encode("utf-8"))
+        self._journal_timer()
+
+    @property
+    def mode(self):
+        """'exam' or 'practice' for the attempt in progress (a resumed one keeps the mode it was taken in)."""
+        return self._attempt_mode or self.settings.get("mode","exam")
+
+    @property
+    def time_left_ms(self):
+        return self.timer.left_ms()
+
+    @time_left_ms.setter
+    def time_left_ms(self, ms):
+        self.timer.set(self.sec_i, ms, running=self.timer.running())
 
     def tick_timer(self):
-        if self.time_left_ms is None: return
-        now = pygame.time.get_ticks(); delta = now - self.last_tick; self.last_tick = now
-        if self.settings.get("mode","exam") == "exam":
-            self.time_left_ms = max(0, self.time_left_ms - delta)
-            if self.time_left_ms == 0:
-                name,_,_=self.sections_all[self.sec_i]; self.locked[name]=True
-                self.toast.trigger("Time’s up — advancing…")
-                if self.sec_i < len(self.sections_all)-1: self.start_section(self.sec_i+1)
-                else: self.finish_exam()
+        """Per frame on the section screen: repaint the chip when its text changes, checkpoint the journal."""
+        if not self.timer.running(): return
+        if pygame.time.get_ticks() - self._jr_tick >= 1000: self._journal_timer()
+        if self._timer_text() != self._timer_shown: DIRTY.add(self._timer_chip)
+        if self.timer.expired(): self.on_deadline()  # in case the event hasn't come through yet
+
+    def on_deadline(self):
+        """SECTION_TIMER_EVENT (or a frame that noticed first): lock the timed section and move on."""
+        t = self.timer
+        if not t.running(): return
+        if not t.expired():
+            t._arm(); return  # SDL's timer beat the monotonic clock by a hair
+        idx = t.sec; t.stop()
+        name,_,_=self.sections_all[idx]; self.locked[name]=True
+        self._journal(J_LOCK, _J_IDX.pack(idx))
+        self.toast.trigger("Time’s up — advancing…")
+        if self._ensure_section(idx+1): self.start_section(idx+1)
+        else: self.finish_exam()
+
+    def _timer_text(self):
+        ms = self.time_left_ms
+        if ms is None: return None
+        mins = ms//60000; secs = (ms%60000)//1000
+        return f"Time left: {mins:02d}:{secs:02d}"
+
+    def _set_answer(self, name, i, letter):
+        old = self.answers[name][i]
+        if old == letter: return
+        self.answers[name][i] = letter
+        self.live.update(name, i, old, letter)
+        self._answer_rev += 1
+        self._journal(J_ANSWER, _J_ANSWER.pack(self._sec_index().get(name, self.sec_i), i, ord(letter) if letter else 0))
+        if i == self.q_i:
+            for r, l in self.choice_rects:
+                if l in (old, letter): DIRTY.add(r)
+
+    def _build_section(self, ui):
+        name, items, tmin = self.sections_all[self.sec_i]
+        item = items[self.q_i]
+        ui.left = left = pygame.Rect(20, 90, int(self.W*0.6-30), self.H-120)
+        ui.right = right = pygame.Rect(int(self.W*0.6+10), 90, int(self.W*0.4-30), self.H-120)
+        ui.chip = pygame.Rect(right.left+16, right.top+12, 220, 30)
+        ui.passage_lines = wrap_lines(item["passage"], self.fonts["body"], right.width-32) if item.get("passage") else []
+        ui.q_lines = wrap_lines(item.get("q",""), self.fonts["body"], left.width-32)
+        y = left.top+60 + 28*len(ui.q_lines) + 10
+        ui.choice_rects = []
+        for i, ch in enumerate(item.get("choices", [])):
+            letter = ["A","B","C","D"][i] if i<4 else "?"
+            ui.choice_rects.append((pygame.Rect(left.left+12, y, left.width-24, 52), letter)); y+=60
+        ui.choices_y = y
+        next_exists = self._ensure_section(self.sec_i+1)
+        ui.skip = Button((right.left+16, right.bottom-56, 220,40), "Skip to Next Section", icon="chev_right") if next_exists else None
+        ui.prev = Button((left.left+16, left.bottom-56, 120,40), "Prev", icon="chev_left")
+        ui.next = Button((left.left+146, left.bottom-56, 120,40), "Next", icon="chev_right")
+        ui.submit = Button((left.right-156, left.bottom-56, 140,40), "Submit", icon="check")
+        ui.lobby = Button((right.left+16, right.bottom-56 - (44 if ui.skip else 0) - 12, 120,40), "Lobby", icon="home")
+        ui.buttons = ([ui.skip] if ui.skip else []) + [ui.prev, ui.next, ui.submit, ui.lobby]
 
     def scr_section(self, events):
-        self.fill_bg(); self.header()
         name, items, tmin = self.sections_all[self.sec_i]
         item = items[self.q_i]; total = len(items)
-        is_exam = (self.settings.get("mode","exam") == "exam")
+        is_exam = (self.mode == "exam")
+        ui = self._ui("section", self._build_section, self.sec_i, self.q_i)
+        left, right = ui.left, ui.right
+        self.choice_rects = ui.choice_rects
 
-        left = pygame.Rect(20, 90, int(self.W*0.6-30), self.H-120)
-        right = pygame.Rect(int(self.W*0.6+10), 90, int(self.W*0.4-30), self.H-120)
+        self.fill_bg(); self.header()
         blit_shadowed_card(self.screen, left, self.theme); blit_shadowed_card(self.screen, right, self.theme)
 
         # header on left
@@ -913,80 +3558,65 @@ class App:
 
         # timer
         if self.time_left_ms is not None:
-            mins = self.time_left_ms//60000; secs = (self.time_left_ms%60000)//1000
+            mins = self.time_left_ms//60000
             col = self.theme["bad"] if mins<1 else (self.theme["warn"] if mins<5 else self.theme["muted"])
-            chip = pygame.Rect(right.left+16, right.top+12, 220, 30); draw_chip(self.screen, chip, self.theme)
-            self.screen.blit(draw_text(f"Time left: {mins:02d}:{secs:02d}", self.fonts["bold"], col), (chip.x+10, chip.y+5))
+            chip = ui.chip; draw_chip(self.screen, chip, self.theme)
+            self._timer_shown = self._timer_text(); self._timer_chip = chip
+            self.screen.blit(draw_text(self._timer_shown, self.fonts["bold"], col), (chip.x+10, chip.y+5))
 
         # Skip button (Practice mode)
-        next_exists = self.sec_i < len(self.sections_all)-1
+        next_exists = ui.skip is not None
         skip_enabled = (not is_exam) and next_exists and (self.time_left_ms is None or self.time_left_ms > 0)
-        if next_exists:
-            self.btn_skip = Button((right.left+16, right.bottom-56, 220,40), "Skip to Next Section", icon="chev_right")
-            self.btn_skip.enabled = skip_enabled
-            self.btn_skip.draw(self.screen, self.theme, self.fonts)
-        else:
-            self.btn_skip = None
+        if ui.skip: ui.skip.enabled = skip_enabled
 
         # passage on right
         py = right.top+50
-        if item.get("passage"):
+        if ui.passage_lines:
             self.screen.blit(draw_text("Passage", self.fonts["bold"], self.theme["muted"]), (right.left+16, py)); py+=28
-            for ln in wrap_lines(item["passage"], self.fonts["body"], right.width-32):
-                self.screen.blit(draw_text(ln, self.fonts["body"], self.theme["text"]), (right.left+16, py)); py+=26
+            sec = self.sections_all[self.sec_i]
+            pkey = (getattr(sec, "passages", None), item.pid) if getattr(item, "pid", 0) else item["passage"]
+            block = passage_surface(pkey, ui.passage_lines, self.fonts["body"], self.theme["text"], self.theme["panel"])
+            self.screen.blit(block, (right.left+16, py), pygame.Rect(0, 0, block.get_width(), max(0, right.bottom-py)))
 
         # question
         y = left.top+60
         self.screen.blit(draw_text("Question", self.fonts["bold"], self.theme["muted"]), (left.left+16, y-28))
-        for ln in wrap_lines(item.get("q",""), self.fonts["body"], left.width-32):
+        for ln in ui.q_lines:
             self.screen.blit(draw_text(ln, self.fonts["body"], self.theme["text"]), (left.left+16, y)); y+=28
-        y+=10
 
         # choices
-        self.choice_rects=[]
         sel = (self.answers[name][self.q_i] or "")
         chs = item.get("choices", [])
         if chs:
-            for i, ch in enumerate(chs):
-                r = pygame.Rect(left.left+12, y, left.width-24, 52)
+            for (r, letter), ch in zip(ui.choice_rects, chs):
                 draw_chip(self.screen, r, self.theme)
-                letter = ["A","B","C","D"][i] if i<4 else "?"
                 if sel == letter:
                     pygame.draw.rect(self.screen, self.theme["accent"], r, 3, border_radius=12)
                 badge = pygame.Rect(r.left+10, r.top+10, 32, 32)
                 pygame.draw.rect(self.screen, self.theme["accent"] if sel==letter else (160,160,170), badge, border_radius=8)
                 self.screen.blit(draw_text(letter, self.fonts["bold"], (255,255,255)), (badge.x+8, badge.y+4))
                 self.screen.blit(draw_text(ch, self.fonts["body"], self.theme["text"]), (badge.right+10, badge.top+4))
-                self.choice_rects.append((r, letter))
-                y+=60
         else:
-            self.screen.blit(draw_text("(Unscored item — no choices)", self.fonts["body"], self.theme["muted"]), (left.left+16, y)); y+=30
+            self.screen.blit(draw_text("(Unscored item — no choices)", self.fonts["body"], self.theme["muted"]), (left.left+16, ui.choices_y))
 
         # nav buttons
-        self.btn_prev = Button((left.left+16, left.bottom-56, 120,40), "Prev", icon="chev_left")
-        self.btn_next = Button((left.left+146, left.bottom-56, 120,40), "Next", icon="chev_right")
-        self.btn_submit = Button((left.right-156, left.bottom-56, 140,40), "Submit", icon="check")
-        self.btn_prev.enabled = (self.q_i>0)
-        self.btn_next.enabled = (self.q_i<total-1)
-        for b in [self.btn_prev, self.btn_next, self.btn_submit]:
-            b.draw(self.screen, self.theme, self.fonts)
-
-        self.btn_lobby = Button((right.left+16, right.bottom-56 - (44 if self.btn_skip else 0) - 12, 120,40), "Lobby", icon="home")
-        self.btn_lobby.draw(self.screen, self.theme, self.fonts)
+        ui.prev.enabled = (self.q_i>0)
+        ui.next.enabled = (self.q_i<total-1)
+        ui.draw(self.screen, self.theme, self.fonts)
 
         for e in events:
-            if self.btn_prev.handle_event(e) and self.q_i>0: self.q_i-=1
-            elif self.btn_next.handle_event(e) and self.q_i<total-1: self.q_i+=1
-            elif self.btn_submit.handle_event(e): self.finish_exam()
-            elif self.btn_lobby.handle_event(e):
+            if ui.prev.handle_event(e) and self.q_i>0: self.q_i-=1
+            elif ui.next.handle_event(e) and self.q_i<total-1: self.q_i+=1
+            elif ui.submit.handle_event(e): self.finish_exam()
+            elif ui.lobby.handle_event(e):
                 if not is_exam: self.state = S_LOBBY
-            elif self.btn_skip and self.btn_skip.handle_event(e) and skip_enabled:
+            elif ui.skip and ui.skip.handle_event(e) and skip_enabled:
                 self.start_section(self.sec_i+1)
             elif e.type==pygame.KEYDOWN:
-                if e.unicode.lower()=="a": self.answers[name][self.q_i]="A"
-                elif e.unicode.lower()=="b": self.answers[name][self.q_i]="B"
-                elif e.unicode.lower()=="c": self.answers[name][self.q_i]="C"
-                elif e.unicode.lower()=="d": self.answers[name][self.q_i]="D"
+                if e.unicode.lower()=="a": self._set_answer(name, self.q_i, "A")
+                elif e.unicode.lower()=="b": self._set_answer(name, self.q_i, "B")
+                elif e.unicode.lower()=="c": self._set_answer(name, self.q_i, "C")
+                elif e.unicode.lower()=="d": self._set_answer(name, self.q_i, "D")
                 elif e.key==pygame.K_RIGHT and self.q_i<total-1: self.q_i+=1
                 elif e.key==pygame.K_LEFT and self.q_i>0: self.q_i-=1
                 elif e.key in (pygame.K_RETURN, pygame.K_KP_ENTER): self.finish_exam()
@@ -994,35 +3624,37 @@ class App:
             elif e.type == pygame.MOUSEBUTTONUP and e.button == 1:
                 for r, letter in self.choice_rects:
                     if r.collidepoint(e.pos):
-                        self.answers[name][self.q_i] = letter
+                        self._set_answer(name, self.q_i, letter)
                         break
             elif e.type==pygame.DROPFILE:
-                try:
-                    p=e.file; self.sections_all=parse_exam(p); self.exam_path=p; self.state=S_LOBBY; self.toast.trigger(f"Loaded: {os.path.basename(p)}")
-                except Exception as ex: self.toast.trigger(f"Load error: {ex}")
-        self.tick_timer()
+                self.load_exam_file(getattr(e, "files", e.file), to_lobby=True)
         self.draw_toast()
 
     def finish_exam(self):
-        res = {}; tot_c=tot_t=0
-        for name,items,_ in self.sections_all:
-            c=t=0; wrong=[]
-            ans = self.answers.get(name, [None]*len(items))
-            for i,it in enumerate(items):
-                if not it.get("choices"): continue
-                t+=1
-                key=(it.get("ans","") or "").strip().upper()
-                usr=(ans[i] or "").strip().upper()
-                if usr==key: c+=1
-                else: wrong.append((i+1, it.get("q",""), key, usr or "—"))
-            res[name]={"correct":c,"total":t,"wrong":wrong}
-            tot_c+=c; tot_t+=t
-        self.results={"by_section":res,"overall":{"correct":tot_c,"total":tot_t}}
+        self.timer.stop()
+        self._ensure_all_sections()
+        self.results = self.live.snapshot(self.sections_all, self.answers)
+        self._results_at = datetime.datetime.now()
         self.state = S_RESULTS
+        if self._recorded_rev != self._answer_rev:
+            try:
+                self.history.record(self.sections_all, self.answers, self.results, label=self.exam_path or "",
+                                    mode=self.mode, started=self._attempt_t0,
+                                    finished=self._results_at.timestamp(), live=self.live)
+                self._recorded_rev = self._answer_rev
+            except Exception as ex:
+                _log_runtime(f"Could not save attempt to history: {ex}")
+                self.toast.trigger(f"Couldn't save to history: {ex}")
+        self._journal_close(remove=True)  # finished: nothing to resume (practice mode reopens it on the next change)
+
+    def _results_file(self, ext):
+        # one file per attempt (named by when it was graded) rather than one file that keeps getting overwritten
+        stamp = (self._results_at or datetime.datetime.now()).strftime("%Y%m%d-%H%M%S")
+        return os.path.join(_user_data_dir(), f"isee_results_{stamp}.{ext}")
 
     def save_report_txt(self):
-        base=_user_data_dir(); path=os.path.join(base,"isee_results.txt")
-        now=datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+        path=self._results_file("txt")
+        now=(self._results_at or datetime.datetime.now()).strftime("%Y-%m-%d %H:%M")
         L=[f"{APP_NAME} Results ({now})","="*64]
         gc=self.results["overall"]["correct"]; gt=self.results["overall"]["total"]
         overall=(100.0*gc/gt) if gt else 0.0
@@ -1038,13 +3670,26 @@ class App:
         self.toast.trigger(f"Saved {os.path.basename(path)}")
 
     def export_results_json(self):
-        base=_user_data_dir(); path=os.path.join(base,"isee_results.json")
-        with open(path,"w",encoding="utf-8") as f: json.dump(self.results,f,ensure_ascii=False,indent=2)
+        path=self._results_file("json")
+        # the answers ride along so an export doubles as a response sheet for --grade
+        data = dict(self.results, answers={name: list(sheet) for name, sheet in self.answers.items()})
+        with open(path,"w",encoding="utf-8") as f: json.dump(data,f,ensure_ascii=False,indent=2)
         self.toast.trigger(f"Saved {os.path.basename(path)}")
 
+    def _build_results(self, ui):
+        ui.card = card = pygame.Rect(int(self.W*0.08), 90, int(self.W*0.84), self.H-140)
+        ui.save = Button(pygame.Rect(0,0,0,0), "Save TXT", icon="file_text")
+        ui.export = Button(pygame.Rect(0,0,0,0), "Export JSON", icon="code")
+        ui.lobby = Button(pygame.Rect(0,0,0,0), "Section Lobby", icon="section")
+        ui.history = Button(pygame.Rect(0,0,0,0), "History", icon="chart")
+        ui.home = Button(pygame.Rect(0,0,0,0), "Home", icon="home")
+        ui.buttons = [ui.save, ui.export, ui.lobby, ui.history, ui.home]
+        place_button_row(card, ui.buttons, align="left", pad_x=20, pad_y=20, gap=12, min_w=150, max_w=220, h=44)
+
     def scr_results(self, events):
+        ui = self._ui("results", self._build_results)
+        card = ui.card
         self.fill_bg(); self.header()
-        card = pygame.Rect(int(self.W*0.08), 90, int(self.W*0.84), self.H-140)
         blit_shadowed_card(self.screen, card, self.theme)
         y=card.top+16
         self.screen.blit(draw_text("Results", self.fonts["h1"], self.theme["text"]), (card.left+20, y)); y+=48
@@ -1058,80 +3703,234 @@ class App:
                 p=(100.0*r["correct"]/r["total"]) if r["total"] else 0.0
                 self.screen.blit(draw_text(f"{sec}: {r['correct']}/{r['total']} ({p:.1f}%)", self.fonts["body"], self.theme["muted"]), (card.left+20, y)); y+=28
 
-        self.btn_save = Button(pygame.Rect(0,0,0,0), "Save TXT", icon="file_text")
-        self.btn_export = Button(pygame.Rect(0,0,0,0), "Export JSON", icon="code")
-        self.btn_lobby = Button(pygame.Rect(0,0,0,0), "Section Lobby", icon="section")
-        self.btn_home = Button(pygame.Rect(0,0,0,0), "Home", icon="home")
-        layout_button_row(card, [self.btn_save, self.btn_export, self.btn_lobby, self.btn_home],
-                          self.theme, self.fonts, align="left", pad_x=20, pad_y=20, gap=12, min_w=150, max_w=220, h=44)
+        ui.draw(self.screen, self.theme, self.fonts)
 
         for e in events:
-            if self.btn_save.handle_event(e): self.save_report_txt()
-            elif self.btn_export.handle_event(e): self.export_results_json()
-            elif self.btn_lobby.handle_event(e): self.state = S_LOBBY
-            elif self.btn_home.handle_event(e): self.state = S_HOME
+            if ui.save.handle_event(e): self.save_report_txt()
+            elif ui.export.handle_event(e): self.export_results_json()
+            elif ui.lobby.handle_event(e): self.state = S_LOBBY
+            elif ui.history.handle_event(e): self.open_history()
+            elif ui.home.handle_event(e): self.state = S_HOME
             elif e.type==pygame.DROPFILE:
-                try:
-                    p=e.file; self.sections_all=parse_exam(p); self.exam_path=p; self.state=S_LOBBY; self.toast.trigger(f"Loaded: {os.path.basename(p)}")
-                except Exception as ex: self.toast.trigger(f"Load error: {ex}")
+                self.load_exam_file(getattr(e, "files", e.file), to_lobby=True)
         self.draw_toast()
 
-    # ---------- Builder (Exam Builder UI) ----------
-    def scr_builder(self, events):
+    # ---------- History (past attempts) ----------
+    def _current_exam_key(self):
+        if self._exam_key[0] != id(self.sections_all):
+            self._ensure_all_sections()
+            self._exam_key = (id(self.sections_all), exam_identity(self.sections_all, self.live)[0])
+        return self._exam_key[1]
+
+    def _refresh_history(self):
+        try:
+            key = self._current_exam_key() if (self._hist_this_exam and self.sections_all) else None
+            self._hist = HistoryPages(self.history, exam_key=key)
+        except Exception as ex:
+            _log_runtime(f"Could not read history: {ex}")
+            self.toast.trigger(f"Couldn't read history: {ex}")
+            self._hist = None
+        self._hist_sel = None
+        self.hist_list.set_count(self._hist.count if self._hist else 0); self.hist_list.scroll_to(0)
+        DIRTY.invalidate()
+
+    def open_history(self):
+        self._refresh_history()
+        self.state = S_HISTORY
+
+    def _build_history(self, ui):
+        ui.card = card = pygame.Rect(int(self.W*0.06), 90, int(self.W*0.88), self.H-140)
+        top = card.top+16+46+36
+        ui.filter = PillToggle((card.right-20-320, card.top+18, 320, 40), "All exams", "This exam")
+        ui.list_w = int(card.width*0.6)
+        self.hist_list.set_rect((card.left+20, top, ui.list_w-20, card.bottom-20-44-12 - top))
+        ui.detail = pygame.Rect(card.left+ui.list_w+16, top, card.width-ui.list_w-36, self.hist_list.rect.height)
+        ui.home = Button(pygame.Rect(0,0,0,0), "Home", icon="home")
+        ui.results = Button(pygame.Rect(0,0,0,0), "Results", icon="chart")
+        ui.analyze = Button(pygame.Rect(0,0,0,0), "Item Analysis", icon="chart")
+        place_button_row(card, [ui.home, ui.results, ui.analyze], align="left", pad_x=20, pad_y=20, gap=12, min_w=150, max_w=220, h=44)
+        ui.buttons = [ui.home, ui.results, ui.analyze]
+
+    def _history_row(self, i):
+        row = self._hist.row(i) if self._hist else None
+        if row is None: return "", None, False
+        _id, label, mode, finished, c, t = row
+        p = (100.0*c/t) if t else 0.0
+        return (f"{_fmt_when(finished)}   {os.path.basename(label or '') or '(unnamed)'}   "
+                f"{c}/{t} ({p:.0f}%)   {(mode or '').capitalize()}"), "file_text", True
+
+    def scr_history(self, events):
+        ui = self._ui("history", self._build_history)
+        card = ui.card
+        if self._hist is None: self._refresh_history()
+        n = self._hist.count if self._hist else 0
+        self.hist_list.set_count(n)
         self.fill_bg(); self.header()
-        # layout
-        left = pygame.Rect(20, 90, int(self.W*0.32), self.H-140)
-        mid  = pygame.Rect(left.right+12, 90, int(self.W*0.32), self.H-140)
-        right= pygame.Rect(mid.right+12, 90, self.W - (mid.right+32), self.H-140)
-        for r in (left, mid, right): blit_shadowed_card(self.screen, r, self.theme)
+        blit_shadowed_card(self.screen, card, self.theme)
+        y = card.top+16
+        self.screen.blit(draw_text("History", self.fonts["h1"], self.theme["text"]), (card.left+20, y)); y+=46
+        scope = f" for {os.path.basename(self.exam_path or '')}" if self._hist_this_exam else ""
+        self.screen.blit(draw_text(f"{n} attempt{'s' if n != 1 else ''}{scope} • newest first",
+                                   self.fonts["body"], self.theme["muted"]), (card.left+20, y))
+        ui.filter.value = 1 if self._hist_this_exam else 0
+        if self.sections_all: ui.filter.draw(self.screen, self.theme, self.fonts)
 
-        # left: sections list
-        self.screen.blit(draw_text("Sections", self.fonts["bold"], self.theme["text"]), (left.x+14, left.y+12))
-        by = left.y+44
-        self.btn_add_sec = Button((left.x+14, left.bottom-52, 130,40), "Add Section")
-        self.btn_del_sec = Button((left.x+154, left.bottom-52, 130,40), "Delete Section")
-        self.btn_add_sec.draw(self.screen, self.theme, self.fonts)
-        self.btn_del_sec.draw(self.screen, self.theme, self.fonts)
-
-        self._section_btns = []
-        for i, sec in enumerate(self.builder_sections):
-            label = f"{i+1}. {sec.get('name','Untitled')}"
-            btn = Button((left.x+14, by, left.width-28, 40), label)
-            if i == self.b_sel_sec:
-                pygame.draw.rect(self.screen, self.theme["accent"], btn.rect, 3, border_radius=12)
-            btn.draw(self.screen, self.theme, self.fonts); self._section_btns.append((i, btn)); by += 46
+        if n:
+            sel = self._hist_sel[0][0] if self._hist_sel else None
+            selected = next((i for i in self.hist_list.visible_range() if (self._hist.row(i) or (None,))[0] == sel), -1)
+            self.hist_list.draw(self.screen, self.theme, self.fonts, self._history_row, selected=selected)
+        else:
+            self.screen.blit(draw_text("No attempts yet. Finish an exam and it shows up here.", self.fonts["body"],
+                                       self.theme["muted"]), self.hist_list.rect.topleft)
 
-        # mid: items list for selected section
-        self.screen.blit(draw_text("Items", self.fonts["bold"], self.theme["text"]), (mid.x+14, mid.y+12))
-        by = mid.y+44
-        self.btn_add_item = Button((mid.x+14, mid.bottom-52, 130,40), "Add Item")
-        self.btn_del_item = Button((mid.x+154, mid.bottom-52, 130,40), "Delete Item")
-        self.btn_add_item.draw(self.screen, self.theme, self.fonts)
-        self.btn_del_item.draw(self.screen, self.theme, self.fonts)
-        self._item_btns = []
-        if 0 <= self.b_sel_sec < len(self.builder_sections):
-            items = self.builder_sections[self.b_sel_sec].get("items", [])
-            for j, it in enumerate(items):
-                label = f"Q{j+1}"
-                btn = Button((mid.x+14, by, mid.width-28, 40), label)
-                if j == self.b_sel_item:
-                    pygame.draw.rect(self.screen, self.theme["accent"], btn.rect, 3, border_radius=12)
-                btn.draw(self.screen, self.theme, self.fonts); self._item_btns.append((j, btn)); by += 46
+        # picked attempt: per-section breakdown
+        d = ui.detail; y = d.top
+        if self._hist_sel:
+            (_id, label, mode, finished, c, t), secs = self._hist_sel
+            for ln, font, col in [(_fmt_when(finished), "bold", "text"),
+                                  (fit_text(os.path.basename(label or "") or "(unnamed)", self.fonts["body"], d.width), "body", "muted"),
+                                  (f"Overall: {c}/{t} ({(100.0*c/t) if t else 0.0:.1f}%)", "bold", "text")]:
+                self.screen.blit(draw_text(ln, self.fonts[font], self.theme[col]), (d.left, y)); y+=30
+            y += 6
+            for name, sc, st in secs:
+                if y + 28 > d.bottom: break
+                p = (100.0*sc/st) if st else 0.0
+                self.screen.blit(draw_text(fit_text(f"{name}: {sc}/{st} ({p:.1f}%)", self.fonts["body"], d.width),
+                                           self.fonts["body"], self.theme["muted"]), (d.left, y)); y+=28
+
+        ui.results.enabled = bool(self.results)
+        ui.analyze.enabled = bool(self._hist_sel) or (self._hist_this_exam and n > 0)
+        ui.draw(self.screen, self.theme, self.fonts)
+
+        for e in events:
+            if ui.home.handle_event(e): self.state = S_HOME
+            elif ui.results.handle_event(e): self.state = S_RESULTS
+            elif ui.analyze.handle_event(e):
+                # the picked attempt's exam, or the loaded one when the list is narrowed to it
+                self.open_analysis(self.history.exam_of(self._hist_sel[0][0]) if self._hist_sel else self._current_exam_key())
+            elif self.sections_all and ui.filter.handle_event(e):
+                self._hist_this_exam = not self._hist_this_exam
+                self._refresh_history()
+            elif e.type == pygame.DROPFILE:
+                self.load_exam_file(getattr(e, "files", e.file))
+            else:
+                idx = self.hist_list.handle_event(e)
+                if idx is not None and self._hist and self._hist.row(idx):
+                    row = self._hist.row(idx)
+                    self._hist_sel = (row, self.history.section_scores(row[0]))
+                    DIRTY.invalidate()
+        self.draw_toast()
+
+    # ---------- Item analysis ----------
+    def open_analysis(self, exam_key):
+        self._analysis = AnalysisJob(self.history.path, exam_key)
+        self.an_sec = 0
+        self.an_sec_list.scroll_to(0); self.an_item_list.scroll_to(0)
+        self.state = S_ANALYSIS
+
+    def _build_analysis(self, ui):
+        ui.card = card = pygame.Rect(int(self.W*0.04), 90, int(self.W*0.92), self.H-140)
+        top = card.top+16+46+36
+        h = card.bottom-20-44-12 - top
+        lw = int(card.width*0.28)
+        self.an_sec_list.set_rect((card.left+20, top, lw, h))
+        ui.summary_y = top
+        self.an_item_list.set_rect((card.left+40+lw, top+64, card.width-60-lw, h-64))
+        ui.back = Button(pygame.Rect(0,0,0,0), "Back", icon="back")
+        ui.home = Button(pygame.Rect(0,0,0,0), "Home", icon="home")
+        place_button_row(card, [ui.back, ui.home], align="left", pad_x=20, pad_y=20, gap=12, min_w=150, max_w=220, h=44)
+        ui.buttons = [ui.back, ui.home]
+
+    def _analysis_sec_row(self, i):
+        sec = self._analysis.result["sections"][i]
+        kr = "n/a" if sec["kr20"] is None else f"{sec['kr20']:.2f}"
+        return f"{sec['section']} · KR-20 {kr}", None, True
+
+    def _paint_item_row(self, surf, rect, i):
+        it = self._analysis.result["sections"][self.an_sec]["items"][i]
+        draw_chip(surf, rect, self.theme)
+        f = self.fonts["body"]; y = rect.y + (rect.height - f.get_height())//2
+        r = "n/a" if it["rpb"] is None else f"{it['rpb']:+.2f}"
+        x = rect.x + 10
+        for txt, w in ((f"Q{it['num']}", 70), (it["key"] or "–", 50), (f"{it['p']:.2f}", 70), (r, 80)):
+            surf.blit(draw_text(txt, f, self.theme["text"]), (x, y)); x += w
+        flags = ", ".join(it["flags"])
+        fw = f.size(flags)[0] + 10 if flags else 0
+        opts = "  ".join(f"{o}{'*' if o == it['key'] else ''} {v*100:.0f}%" for o, v in sorted(it["options"].items()))
+        surf.blit(draw_text(fit_text(opts, f, rect.right - x - fw - 10), f, self.theme["muted"]), (x, y))
+        if flags: surf.blit(draw_text(flags, f, self.theme["bad"]), (rect.right - fw, y))
+
+    def scr_analysis(self, events):
+        ui = self._ui("analysis", self._build_analysis)
+        card = ui.card
+        job = self._analysis
+        res = job.result if job is not None and job.done else None
+        secs = res["sections"] if res else []
+        self.an_sec = min(self.an_sec, max(0, len(secs)-1))
+        self.an_sec_list.set_count(len(secs))
+        self.an_item_list.set_count(len(secs[self.an_sec]["items"]) if secs else 0)
+        self.fill_bg(); self.header()
+        blit_shadowed_card(self.screen, card, self.theme)
+        y = card.top+16
+        self.screen.blit(draw_text("Item Analysis", self.fonts["h1"], self.theme["text"]), (card.left+20, y)); y+=46
+        if job is None or not job.done: sub = "Crunching the numbers…"
+        elif job.error is not None: sub = f"Can't analyze: {job.error}"
+        else: sub = f"{os.path.basename(res['label'] or '') or '(unnamed exam)'} • {res['attempts']} attempt{'s' if res['attempts'] != 1 else ''}"
+        self.screen.blit(draw_text(fit_text(sub, self.fonts["body"], card.width-40), self.fonts["body"], self.theme["muted"]), (card.left+20, y))
+
+        if secs:
+            self.an_sec_list.draw(self.screen, self.theme, self.fonts, self._analysis_sec_row, selected=self.an_sec)
+            sec = secs[self.an_sec]; x = self.an_item_list.rect.x; y = ui.summary_y
+            kr = "n/a" if sec["kr20"] is None else f"{sec['kr20']:.3f}"
+            self.screen.blit(draw_text(fit_text(f"{sec['section']}: {sec['candidates']} candidates • mean {sec['mean']:.1f}/{sec['scored']} "
+                                                f"(sd {sec['sd']:.1f}) • KR-20 {kr}", self.fonts["bold"], self.an_item_list.rect.width),
+                                       self.fonts["bold"], self.theme["text"]), (x, y))
+            hx = x + 10
+            for txt, w in (("Item", 70), ("Key", 50), ("p", 70), ("r_pb", 80), ("Picked (key*)", 0)):
+                self.screen.blit(draw_text(txt, self.fonts["body"], self.theme["muted"]), (hx, y+34)); hx += w
+            self.an_item_list.draw(self.screen, self.theme, self.fonts, None, paint=self._paint_item_row)
+
+        ui.draw(self.screen, self.theme, self.fonts)
+        for e in events:
+            if ui.back.handle_event(e): self.state = S_HISTORY
+            elif ui.home.handle_event(e): self.state = S_HOME
+            elif e.type == pygame.DROPFILE:
+                self.load_exam_file(getattr(e, "files", e.file))
+            else:
+                idx = self.an_sec_list.handle_event(e) if secs else None
+                self.an_item_list.handle_event(e)
+                if idx is not None and idx != self.an_sec:
+                    self.an_sec = idx; self.an_item_list.scroll_to(0); DIRTY.invalidate()
+        self.draw_toast()
+
+    # ---------- Builder (Exam Builder UI) ----------
+    def _build_builder(self, ui):
+        ui.left = left = pygame.Rect(20, 90, int(self.W*0.32), self.H-140)
+        ui.mid = mid = pygame.Rect(left.right+12, 90, int(self.W*0.32), self.H-140)
+        ui.right = right = pygame.Rect(mid.right+12, 90, self.W - (mid.right+32), self.H-140)
+
+        ui.add_sec = Button((left.x+14, left.bottom-52, 130,40), "Add Section")
+        ui.del_sec = Button((left.x+154, left.bottom-52, 130,40), "Delete Section")
+        self.b_sec_list.set_rect((left.x+14, left.y+44, left.width-28, left.height-44-64))
+
+        ui.add_item = Button((mid.x+14, mid.bottom-52, 130,40), "Add Item")
+        ui.del_item = Button((mid.x+154, mid.bottom-52, 130,40), "Delete Item")
+        self.b_item_list.set_rect((mid.x+14, mid.y+44, mid.width-28, mid.height-44-64))
 
         # right: editors
         x = right.x+14; y = right.y+12
-        self.screen.blit(draw_text("Editor", self.fonts["bold"], self.theme["text"]), (x, y)); y+=40
+        ui.editor_y = y; y+=40
         # Section name + time
         self.in_sec_name.rect = pygame.Rect(x, y, right.width-170, 36)
         self.in_time.rect = pygame.Rect(self.in_sec_name.rect.right+10, y, 140, 36); y+=48
         # Question
-        self.screen.blit(draw_text("Question", self.fonts["bold"], self.theme["muted"]), (x, y)); y+=8
+        ui.q_label_y = y; y+=8
         self.in_q.rect = pygame.Rect(x, y+20, right.width-20, 96); y+=120
         # Passage
-        self.screen.blit(draw_text("Passage (optional)", self.fonts["bold"], self.theme["muted"]), (x, y)); y+=8
+        ui.passage_label_y = y; y+=8
         self.in_passage.rect = pygame.Rect(x, y+20, right.width-20, 96); y+=120
         # Choices
-        self.screen.blit(draw_text("Choices A–D", self.fonts["bold"], self.theme["muted"]), (x, y)); y+=8
+        ui.choices_label_y = y; y+=8
         w2 = (right.width-28)//2
         for row in range(2):
             for col in range(2):
@@ -1140,61 +3939,135 @@ class App:
         y += 120
         # Answer
         self.in_ans.rect = pygame.Rect(x, y, 100, 36)
-        self.btn_back_home = Button(pygame.Rect(0,0,0,0), "Back")
-        self.btn_save_as = Button(pygame.Rect(0,0,0,0), "Save As...")
+        ui.back_home = Button(pygame.Rect(0,0,0,0), "Back")
+        ui.save_as = Button(pygame.Rect(0,0,0,0), "Save As...")
         # lay them out aligned to the right edge of the right panel
-        layout_button_row(right, [self.btn_back_home, self.btn_save_as],
-                          self.theme, self.fonts, align="right", pad_x=14, pad_y=12, gap=10, min_w=130, max_w=180, h=40)
+        place_button_row(right, [ui.back_home, ui.save_as], align="right", pad_x=14, pad_y=12, gap=10, min_w=130, max_w=180, h=40)
+        # search box (+ importing the loaded exam to search through) sits in the header bar; hits drop down over the panels
+        self.in_search.rect = pygame.Rect(int(self.W*0.3), 18, int(self.W*0.4), 36)
+        ui.import_loaded = Button((self.in_search.rect.right+12, 16, 160, 40), "Import Loaded")
+        ui.buttons = [ui.add_sec, ui.del_sec, ui.add_item, ui.del_item, ui.import_loaded, ui.back_home, ui.save_as]
+
+    def scr_builder(self, events):
+        ui = self._ui("builder", self._build_builder)
+        left, mid, right = ui.left, ui.mid, ui.right
+        sel_items = self.builder_sections[self.b_sel_sec].get("items", []) if 0 <= self.b_sel_sec < len(self.builder_sections) else []
+        self.b_sec_list.set_count(len(self.builder_sections))
+        self.b_item_list.set_count(len(sel_items))
+        self.fill_bg(); self.header()
+        for r in (left, mid, right): blit_shadowed_card(self.screen, r, self.theme)
+
+        # left: sections list
+        self.screen.blit(draw_text("Sections", self.fonts["bold"], self.theme["text"]), (left.x+14, left.y+12))
+        self.b_sec_list.draw(self.screen, self.theme, self.fonts,
+                             lambda i: (f"{i+1}. {self.builder_sections[i].get('name','Untitled')}", None, True), self.b_sel_sec)
+
+        # mid: items list for selected section
+        self.screen.blit(draw_text("Items", self.fonts["bold"], self.theme["text"]), (mid.x+14, mid.y+12))
+        self.b_item_list.draw(self.screen, self.theme, self.fonts, lambda j: (f"Q{j+1}", None, True), self.b_sel_item)
+
+        # right: editors
+        x = right.x+14
+        self.screen.blit(draw_text("Editor", self.fonts["bold"], self.theme["text"]), (x, ui.editor_y))
+        self.screen.blit(draw_text("Question", self.fonts["bold"], self.theme["muted"]), (x, ui.q_label_y))
+        self.screen.blit(draw_text("Passage (optional)", self.fonts["bold"], self.theme["muted"]), (x, ui.passage_label_y))
+        self.screen.blit(draw_text("Choices A–D", self.fonts["bold"], self.theme["muted"]), (x, ui.choices_label_y))
+        ui.draw(self.screen, self.theme, self.fonts)
 
         # draw inputs
-        for inp in [self.in_sec_name, self.in_time, self.in_q, self.in_passage, *self.in_choice, self.in_ans]:
+        for inp in self._all_inputs():
             inp.draw(self.screen, self.fonts, self.theme)
 
+        # search hits drop-down
+        self._builder_search()
+        overlay = None
+        if self._b_search_open and self.in_search.text.strip():
+            sr = self.in_search.rect
+            overlay = pygame.Rect(sr.x, sr.bottom+8, sr.width, min(8, max(1, len(self.b_hits)))*46 + 10)
+            self.b_hit_list.set_rect(overlay.inflate(-16, -16))
+            blit_shadowed_card(self.screen, overlay, self.theme)
+            if self.b_hits:
+                w = self.b_hit_list.rect.width - 40
+                self.b_hit_list.draw(self.screen, self.theme, self.fonts,
+                                     lambda i: (fit_text(self.b_hits[i][2], self.fonts["bold"], w), None, True))
+            else:
+                self.screen.blit(draw_text("No matches", self.fonts["body"], self.theme["muted"]), (overlay.x+16, overlay.y+12))
+            if self._b_index_job is not None:
+                prog = draw_text(f"indexing {self._b_index_done}/{len(self._b_index_pending)}…", self.fonts["body"], self.theme["muted"])
+                self.screen.blit(prog, (overlay.right-prog.get_width()-16, overlay.bottom+6))
+
         # events
         for e in events:
+            if overlay is not None:
+                hit = self.b_hit_list.handle_event(e) if self.b_hits else None
+                if hit is not None:
+                    self._builder_jump(*self.b_hits[hit][:2]); overlay = None; continue
+                if e.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL) and \
+                        overlay.collidepoint(getattr(e, "pos", pygame.mouse.get_pos())):
+                    continue  # the drop-down is on top; don't click through to the editor
             # inputs
-            for inp in [self.in_sec_name, self.in_time, self.in_q, self.in_passage, *self.in_choice, self.in_ans]:
+            for inp in self._all_inputs():
                 inp.handle_event(e)
 
-            if self.btn_back_home.handle_event(e):
+            if e.type == pygame.MOUSEBUTTONUP and e.button == 1:
+                self._b_search_open = self.in_search.active
+            elif e.type == pygame.KEYDOWN and self.in_search.active:
+                if e.key in (pygame.K_RETURN, pygame.K_KP_ENTER) and self.b_hits:
+                    self._builder_jump(*self.b_hits[0][:2])
+                elif e.key == pygame.K_ESCAPE:
+                    self.in_search.text = ""; self.in_search.cursor = 0; self._b_search_open = False
+                else:
+                    self._b_search_open = True
+
+            if ui.back_home.handle_event(e):
                 self.state = S_HOME
 
-            if self.btn_add_sec.handle_event(e):
+            if ui.import_loaded.handle_event(e):
+                self._import_loaded_exam()
+
+            if ui.add_sec.handle_event(e):
                 self.builder_sections.append({"name":"Untitled","time_minutes":None,"items":[]})
                 self.b_sel_sec = len(self.builder_sections)-1; self.b_sel_item = -1
+                self.b_sec_list.set_count(len(self.builder_sections)); self.b_sec_list.ensure_visible(self.b_sel_sec)
+                self.b_item_list.scroll_to(0)
                 self._sync_inputs_from_model()
 
-            if self.btn_del_sec.handle_event(e) and 0 <= self.b_sel_sec < len(self.builder_sections):
-                del self.builder_sections[self.b_sel_sec]
+            if ui.del_sec.handle_event(e) and 0 <= self.b_sel_sec < len(self.builder_sections):
+                for it in self.builder_sections[self.b_sel_sec].get("items", []): self.b_index.remove(it)
+                del self.builder_sections[self.b_sel_sec]; self._b_locs = None
                 self.b_sel_sec = -1; self.b_sel_item = -1
                 self._sync_inputs_from_model()
 
-            for idx, btn in self._section_btns:
-                if btn.handle_event(e):
-                    self._apply_inputs_to_model()
-                    self.b_sel_sec = idx; self.b_sel_item = -1
-                    self._sync_inputs_from_model()
+            idx = self.b_sec_list.handle_event(e)
+            if idx is not None:
+                self._apply_inputs_to_model()
+                self.b_sel_sec = idx; self.b_sel_item = -1
+                self.b_item_list.scroll_to(0)
+                self._sync_inputs_from_model()
 
-            if self.btn_add_item.handle_event(e) and 0 <= self.b_sel_sec < len(self.builder_sections):
+            if ui.add_item.handle_event(e) and 0 <= self.b_sel_sec < len(self.builder_sections):
                 sec = self.builder_sections[self.b_sel_sec]
                 sec.setdefault("items", []).append({"q":"","choices":[],"ans":"","passage":""})
+                self.b_index.update(sec["items"][-1]); self._b_locs = None
                 self.b_sel_item = len(sec["items"])-1
+                self.b_item_list.set_count(len(sec["items"])); self.b_item_list.ensure_visible(self.b_sel_item)
                 self._sync_inputs_from_model()
 
-            if self.btn_del_item.handle_event(e) and 0 <= self.b_sel_sec < len(self.builder_sections):
+            if ui.del_item.handle_event(e) and 0 <= self.b_sel_sec < len(self.builder_sections):
                 sec = self.builder_sections[self.b_sel_sec]
                 if 0 <= self.b_sel_item < len(sec.get("items",[])):
-                    del sec["items"][self.b_sel_item]
+                    self.b_index.remove(sec["items"][self.b_sel_item])
+                    del sec["items"][self.b_sel_item]; self._b_locs = None
                     self.b_sel_item = -1
                     self._sync_inputs_from_model()
 
-            for jdx, btn in self._item_btns:
-                if btn.handle_event(e):
-                    self._apply_inputs_to_model()
-                    self.b_sel_item = jdx
-                    self._sync_inputs_from_model()
+            jdx = self.b_item_list.handle_event(e)
+            if jdx is not None:
+                self._apply_inputs_to_model()
+                self.b_sel_item = jdx
+                self._sync_inputs_from_model()
 
-            if self.btn_save_as.handle_event(e):
+            if ui.save_as.handle_event(e):
                 self._apply_inputs_to_model()
                 data = {"sections": self.builder_sections}
                 # defaults
@@ -1204,6 +4077,7 @@ class App:
                     for it in sec.get("items",[]):
                         it.setdefault("q",""); it.setdefault("choices",[])
                         it.setdefault("ans",""); it.setdefault("passage","")
+                data = with_shared_passages(data)  # passages used by several items are written once
                 # choose path (lazy Tk root to prevent .app launch issues)
                 saved = False
                 try:
@@ -1233,31 +4107,467 @@ class App:
         self.draw_toast()
 
     # ---------------------------- loop (main event loop) ----------------------------
+    def _all_inputs(self):
+        return [self.in_sec_name, self.in_time, self.in_q, self.in_passage, *self.in_choice, self.in_ans, self.in_search]
+
+    def _next_wake_ms(self):
+        """
+        How long the loop may sleep before the screen has to change by itself.
+        0 = something is animating (draw at full frame rate), None = nothing scheduled, wait for input.
+        """
+        now = pygame.time.get_ticks()
+        waits = []
+        t = self.toast
+        if t.msg and t.phase in ("in", "out"):
+            return 0
+        if t.msg and t.phase == "hold":
+            waits.append(t.ts + t.hold_ms - now + 1)
+        if self.state == S_BUILDER:
+            for inp in self._all_inputs():
+                if inp.active: waits.append(inp.last_blink + 501 - now)
+        if self.state == S_SECTION and self.timer.running():
+            # next time the mm:ss text flips (the deadline itself arrives as SECTION_TIMER_EVENT)
+            waits.append((self.time_left_ms % 1000 or 1000) + 1)
+        return max(0, min(waits)) if waits else None
+
+    def _view_key(self):
+        """Stuff that, when it changes, means the whole window has to be repainted."""
+        return (self.state, self.sec_i, self.q_i, self.W, self.H, id(self.theme), id(self.fonts),
+                id(self.sections_all), len(self.sections_all), self.exam_path, self.mode,
+                self.b_sel_sec, self.b_sel_item, len(self.builder_sections))
+
+    def frame(self, events):
+        """
+        Draw one frame of the current screen and hand it this frame's events.
+        Returns None if the whole window was repainted, or the list of rects that were (dirty-rect mode).
+        """
+        if self.state==S_SECTION: self.tick_timer()
+        if self._view_key() != self._last_view: DIRTY.invalidate()
+        if self.toast.animating(): DIRTY.add(self.toast.lane(self.W, self.H))
+        region = DIRTY.take() if self.settings.get("dirty_rects", True) else None
+        if region is not None:
+            clip = region[0].unionall(region[1:]) if region else pygame.Rect(0,0,0,0)
+            if clip.width*clip.height > 0.6*self.W*self.H:
+                region = None  # not worth it, just repaint everything
+            else:
+                self.screen.set_clip(clip)
+        view = self._view_key()
+        PROF.state_name = STATE_NAMES.get(self.state, "")
+        t0 = time.perf_counter()
+        if self.state==S_HOME: self.scr_home(events)
+        elif self.state==S_SETTINGS: self.scr_settings(events)
+        elif self.state==S_HELP: self.scr_help(events)
+        elif self.state==S_LOBBY: self.scr_lobby(events)
+        elif self.state==S_SECTION: self.scr_section(events)
+        elif self.state==S_RESULTS: self.scr_results(events)
+        elif self.state==S_BUILDER: self.scr_builder(events)
+        elif self.state==S_HISTORY: self.scr_history(events)
+        elif self.state==S_ANALYSIS: self.scr_analysis(events)
+        PROF.add("scr_" + PROF.state_name, (time.perf_counter()-t0)*1000)
+        self.screen.set_clip(None)
+        self._journal_checkpoint()
+        self._last_view = self._view_key()
+        if self._last_view != view: DIRTY.invalidate()
+        if any(e.type == pygame.MOUSEBUTTONUP for e in events):
+            # a release that landed on another button (or nowhere) still un-presses everything
+            for ui in self._ui_trees.values():
+                for b in ui.buttons:
+                    if b.pressed: b.pressed = False; DIRTY.add(b.rect)
+        _shadow_cache.end_frame(); _text_cache.end_frame()
+        return region
+
     def run(self):
         running=True
+        redraw=True
+        dirty_mode = bool(self.settings.get("dirty_rects", True))
         while running:
+            # Idle rendering: when nothing is moving, block until input shows up or until the next
+            # scheduled change (toast, cursor blink, timer second) instead of redrawing 60x a second.
+            idle = bool(self.settings.get("idle_render", True))
+            wake = 0 if (redraw or not idle) else self._next_wake_ms()
+            raw = []
+            if wake != 0 and self._has_background_work():
+                # spare time: read more of the exam / wrap a few more questions ahead, then check for input again
+                changed = self._background_step()
+                raw = pygame.event.get()
+                if not raw and not changed: continue
+            elif wake != 0:
+                first = pygame.event.wait() if wake is None else pygame.event.wait(wake)
+                if first.type != pygame.NOEVENT: raw.append(first)
+            t_work = time.perf_counter()
+            raw.extend(pygame.event.get())
+
             events=[]
-            for e in pygame.event.get():
+            for e in raw:
                 if e.type==pygame.QUIT: running=False
                 elif e.type==pygame.VIDEORESIZE: self.on_resize(e.w,e.h)
-                elif e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+                elif e.type == pygame.MOUSEBUTTONDOWN and e.button == 1 and self.toast.rect and self.toast.rect.collidepoint(e.pos):
                     # dismiss toast on click
-                    if self.toast.rect and self.toast.rect.collidepoint(e.pos):
-                        self.toast.phase="idle"; self.toast.msg=""; self.toast.rect=None
-                else: events.append(e)
-            if self.state==S_HOME: self.scr_home(events)
-            elif self.state==S_SETTINGS: self.scr_settings(events)
-            elif self.state==S_HELP: self.scr_help(events)
-            elif self.state==S_LOBBY: self.scr_lobby(events)
-            elif self.state==S_SECTION: self.scr_section(events)
-            elif self.state==S_RESULTS: self.scr_results(events)
-            elif self.state==S_BUILDER: self.scr_builder(events)
-            pygame.display.flip(); self.clock.tick(60)
+                    DIRTY.add(self.toast.lane(self.W, self.H))
+                    self.toast.phase="idle"; self.toast.msg=""; self.toast.rect=None
+                elif e.type == pygame.KEYDOWN and e.key == pygame.K_F3:
+                    PROF.toggle(); DIRTY.invalidate()
+                elif e.type == EXAM_LOAD_EVENT:
+                    self._pump_loader()
+                elif e.type == ANALYSIS_EVENT:
+                    DIRTY.invalidate()
+                elif e.type == SECTION_TIMER_EVENT:
+                    self.on_deadline(); DIRTY.invalidate()
+                elif e.type == getattr(pygame, "DROPBEGIN", None):
+                    self._drop_batch = []
+                elif e.type == pygame.DROPFILE and self._drop_batch is not None:
+                    self._drop_batch.append(e.file)
+                elif e.type == getattr(pygame, "DROPCOMPLETE", None):
+                    # hand a multi-file drop to the screens as one DROPFILE carrying the whole batch
+                    batch, self._drop_batch = self._drop_batch or [], None
+                    if len(batch) == 1: events.append(pygame.event.Event(pygame.DROPFILE, file=batch[0]))
+                    elif batch: events.append(pygame.event.Event(pygame.DROPFILE, file=batch[0], files=batch))
+                else:
+                    if e.type in _EXPOSE_EVENTS: DIRTY.invalidate()
+                    # builder edits touch too many things to track piece by piece
+                    elif self.state==S_BUILDER and e.type!=pygame.MOUSEMOTION: DIRTY.invalidate()
+                    events.append(e)
+            PROF.add("events", (time.perf_counter()-t_work)*1000)
+            state_before = self.state
+            region = self.frame(events)
+            t0 = time.perf_counter()
+            if PROF.enabled:
+                hud = PROF.draw(self.screen, self.fonts, self.theme)
+                if region is not None: region = region + [hud]
+            if region is None: pygame.display.flip()
+            elif region: pygame.display.update(region)
+            t1 = time.perf_counter(); PROF.add("flip", (t1-t0)*1000)
+            self.clock.tick(60)
+            PROF.add("tick", (time.perf_counter()-t1)*1000)
+            PROF.end_frame((t1-t_work)*1000)
+            if dirty_mode:
+                redraw = DIRTY.pending()
+            else:
+                # screens handle events after drawing, so draw once more right away to show what they changed
+                redraw = bool(raw) or self.state != state_before
+        self._journal_close()  # quitting mid-exam can be resumed next time too
+
+#
+# ---------------------------- Benchmark (headless) ----------------------------
+_BENCH_WORDS = ("the","whale","river","seven","because","number","passage","quickly","under","ancient",
+                "measure","light","fraction","island","reason","between","signal","gather","equal","winter")
+
+def make_synthetic_exam(sections=10, items=20, passage_words=120, choices=4, seed=0):
+    """Fake exam in the normal JSON schema (for benchmarks). Every 3rd item shares its section's passage."""
+    import random
+    rnd = random.Random(seed)
+    words = lambda n: " ".join(rnd.choice(_BENCH_WORDS) for _ in range(n))
+    out = []
+    for si in range(sections):
+        shared = words(passage_words) if passage_words else ""
+        its = []
+        for ii in range(items):
+            its.append({
+                "q": f"Q{ii+1}. " + words(rnd.randint(8, 40)) + "?",
+                "choices": [words(rnd.randint(1, 8)) for _ in range(choices)],
+                "ans": "ABCD"[rnd.randrange(min(4, choices))] if choices else "",
+                "passage": (shared if ii % 3 == 0 else words(passage_words)) if passage_words else "",
+            })
+        out.append({"name": f"Section {si+1}", "time_minutes": 30, "items": its})
+    return {"sections": out}
+
+def _bench_events(state, frame_i, W, H):
+    """Scripted input for one frame: a mouse sweep everywhere, plus some screen-specific keys."""
+    E = pygame.event.Event
+    x = (frame_i * 37) % W; y = 80 + (frame_i * 23) % (H - 80)
+    evs = [E(pygame.MOUSEMOTION, pos=(x, y), rel=(1, 1), buttons=(0, 0, 0))]
+    if state == S_SECTION:
+        if frame_i % 4 == 1: evs.append(E(pygame.KEYDOWN, key=pygame.K_a, unicode="abcd"[frame_i % 16 // 4], mod=0))
+        if frame_i % 8 == 3: evs.append(E(pygame.KEYDOWN, key=pygame.K_RIGHT, unicode="", mod=0))
+    elif state in (S_LOBBY, S_BUILDER):
+        if frame_i % 6 == 2:
+            evs.append(E(pygame.KEYDOWN, key=(pygame.K_PAGEDOWN if frame_i % 24 < 12 else pygame.K_PAGEUP), unicode="", mod=0))
+    return evs
+
+def run_benchmark(frames=120, sections=10, items=20, passage_words=120, choices=4, full_repaint=False, seed=0):
+    """
+    Drives every screen of a real App (dummy video driver) for N frames with scripted events
+    and returns per-screen numbers: frame times, memory, allocations.
+    """
+    global _DATA_DIR_OVERRIDE
+    import tempfile, tracemalloc, shutil
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    data = make_synthetic_exam(sections, items, passage_words, choices, seed)
+    # scratch data dir for the whole run: default settings, empty history/cache, and nothing of the user's read or written
+    scratch = tempfile.mkdtemp(prefix="testify_bench_")
+    saved_dir, _DATA_DIR_OVERRIDE = _DATA_DIR_OVERRIDE, scratch
+    path = os.path.join(scratch, "bench_exam.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    app = None
+    try:
+        t0 = time.perf_counter(); parse_exam(path); parse_ms = (time.perf_counter()-t0)*1000
+        app = App(path, settings=dict(DEFAULT_SETTINGS, journal=False))
+        app.wait_for_load(); app.toast.trigger("")
+        app._prewrap = None  # measure cold wrapping like a first visit would
+        report = {"version": VERSION, "frames": frames, "full_repaint": full_repaint,
+                  "exam": {"sections": sections, "items": items, "passage_words": passage_words, "choices": choices},
+                  "parse_ms": round(parse_ms, 3), "screens": {}}
+        for state in (S_HOME, S_SETTINGS, S_HELP, S_LOBBY, S_SECTION, S_RESULTS, S_HISTORY, S_BUILDER):
+            if state == S_SECTION: app.start_section(0)
+            elif state == S_RESULTS: app.finish_exam()
+            elif state == S_HISTORY: app.open_history()
+            elif state == S_BUILDER:
+                app.builder_sections = json.loads(json.dumps(data["sections"]))
+                app.b_sel_sec = 0; app.b_sel_item = 0; app._sync_inputs_from_model()
+            app.state = state
+            DIRTY.invalidate()
+            times = []
+            counts0 = dict(PROF.counts); blocks0 = sys.getallocatedblocks()
+            tracemalloc.start()
+            for i in range(frames):
+                if full_repaint: DIRTY.invalidate()
+                evs = _bench_events(state, i, app.W, app.H)
+                t0 = time.perf_counter()
+                region = app.frame(evs)
+                if region is None: pygame.display.flip()
+                elif region: pygame.display.update(region)
+                times.append((time.perf_counter()-t0)*1000)
+                app.state = state  # scripted keys may navigate away (Enter etc.), stay put
+            cur, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+            times.sort()
+            pct = lambda q: times[min(len(times)-1, int(q/100.0*len(times)))]
+            report["screens"][STATE_NAMES[state]] = {
+                "mean_ms": round(sum(times)/len(times), 3), "p50_ms": round(pct(50), 3),
+                "p99_ms": round(pct(99), 3), "max_ms": round(times[-1], 3),
+                "mem_peak_kb": round(peak/1024, 1), "mem_retained_kb": round(cur/1024, 1),
+                "alloc_blocks": sys.getallocatedblocks() - blocks0,
+                "counts": {k: PROF.counts[k] - counts0[k] for k in PROF.COUNTERS},
+            }
+        pygame.quit()
+        return report
+    finally:
+        if app is not None: app.history.close()
+        _DATA_DIR_OVERRIDE = saved_dir
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def compare_benchmark(report, baseline, tolerance=0.10):
+    """Lines describing p50 changes vs a stored baseline, and whether anything got slower than tolerance."""
+    lines, regressed = [], False
+    for name, cur in report["screens"].items():
+        base = baseline.get("screens", {}).get(name)
+        if not base or not base.get("p50_ms"):
+            lines.append(f"{name:<9} p50 {cur['p50_ms']:8.3f}ms  (no baseline)"); continue
+        ratio = cur["p50_ms"] / base["p50_ms"]
+        bad = ratio > 1 + tolerance
+        regressed = regressed or bad
+        lines.append(f"{name:<9} p50 {cur['p50_ms']:8.3f}ms  baseline {base['p50_ms']:8.3f}ms  x{ratio:5.2f}{'  <-- slower' if bad else ''}")
+    return lines, regressed
+
+def bench_main(argv):
+    """python main.py --bench [options]  (see --help)"""
+    import argparse
+    ap = argparse.ArgumentParser(prog="testify --bench", description="Headless rendering benchmark.")
+    ap.add_argument("--frames", type=int, default=120)
+    ap.add_argument("--sections", type=int, default=10)
+    ap.add_argument("--items", type=int, default=20)
+    ap.add_argument("--passage-words", type=int, default=120)
+    ap.add_argument("--choices", type=int, default=4)
+    ap.add_argument("--full", action="store_true", help="repaint the whole window every frame")
+    ap.add_argument("--out", help="write the JSON report here")
+    ap.add_argument("--baseline", help="compare against a stored report")
+    ap.add_argument("--tolerance", type=float, default=0.10)
+    a = ap.parse_args(argv)
+    report = run_benchmark(a.frames, a.sections, a.items, a.passage_words, a.choices, a.full)
+    print(f"parse: {report['parse_ms']:.1f}ms")
+    for name, r in report["screens"].items():
+        print(f"{name:<9} mean {r['mean_ms']:7.3f}  p50 {r['p50_ms']:7.3f}  p99 {r['p99_ms']:7.3f} ms  "
+              f"peak {r['mem_peak_kb']:8.1f}KB  blocks {r['alloc_blocks']:+d}  {r['counts']}")
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if a.baseline:
+        with open(a.baseline, "r", encoding="utf-8") as f:
+            lines, regressed = compare_benchmark(report, json.load(f), a.tolerance)
+        print("\n".join(lines))
+        return 1 if regressed else 0
+    return 0
+
+def compile_main(argv):
+    """python main.py --compile exam.json exam.tfx"""
+    if len(argv) != 2:
+        print("usage: main.py --compile <exam.json> <out.tfx>"); return 2
+    try:
+        t0 = time.perf_counter(); compile_exam(argv[0], argv[1])
+    except ValueError as ex:
+        print(f"Compile failed: {ex}"); return 1
+    print(f"Wrote {argv[1]} ({os.path.getsize(argv[1])} bytes) in {(time.perf_counter()-t0)*1000:.0f}ms")
+    return 0
+
+def decompile_main(argv):
+    """python main.py --decompile exam.tfx exam.json"""
+    if len(argv) != 2:
+        print("usage: main.py --decompile <exam.tfx> <out.json>"); return 2
+    try:
+        decompile_exam(argv[0], argv[1])
+    except (ValueError, OSError) as ex:
+        print(f"Decompile failed: {ex}"); return 1
+    print(f"Wrote {argv[1]}")
+    return 0
+
+def footprint_main(argv):
+    """python main.py --footprint exam.json : memory held by the loaded exam model"""
+    import argparse
+    ap = argparse.ArgumentParser(prog="main.py --footprint")
+    ap.add_argument("exam")
+    args = ap.parse_args(argv)
+    sections = parse_exam(args.exam)
+    fp = exam_footprint(sections)
+    as_dicts = [[d["name"], d["items"], d["time_minutes"]] for d in sections_to_json(sections)["sections"]]
+    old = exam_footprint(as_dicts)["bytes"]
+    print(f"{fp['sections']} sections, {fp['items']} items")
+    print(f"model:          {fp['bytes']/1024:10.1f} KB")
+    print(f"as plain dicts: {old/1024:10.1f} KB")
+    return 0
+
+def grade_main(argv):
+    """python main.py --grade exam.json responses... [--out graded.jsonl] [--workers N]"""
+    import argparse
+    ap = argparse.ArgumentParser(prog="main.py --grade", description="Grade response sheets (JSON with an 'answers' "
+                                 "object, e.g. Testify's results export) against an exam. Writes one JSON line per candidate.")
+    ap.add_argument("exam", help="exam .json / .tfx (or a bank folder)")
+    ap.add_argument("responses", nargs="+", help="response files or folders of them")
+    ap.add_argument("--out", default="-", help="output .jsonl (default: stdout)")
+    ap.add_argument("--workers", type=int, default=1, help="processes to spread the batch over (0 = one per core)")
+    ap.add_argument("--no-wrong", action="store_true", help="leave out the per-item 'wrong' lists")
+    a = ap.parse_args(argv)
+    files = response_files(a.responses)
+    workers = a.workers if a.workers > 0 else (os.cpu_count() or 1)
+    out = sys.stdout if a.out == "-" else open(a.out, "w", encoding="utf-8")
+    n = bad = 0; t0 = time.perf_counter()
+    try:
+        for rec in grade_batch(a.exam, files, workers=workers, with_wrong=not a.no_wrong):
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            n += 1; bad += "error" in rec
+    finally:
+        if out is not sys.stdout: out.close()
+    print(f"Graded {n-bad} sheet(s), {bad} unreadable, in {time.perf_counter()-t0:.2f}s"
+          f"{'' if _numpy() else ' (numpy not installed, used the slow path)'}", file=sys.stderr)
+    return 1 if bad else 0
+
+def history_main(argv):
+    """python main.py --history [--exam exam.json] [--section NAME] [--since DATE] [--until DATE] [--limit N]"""
+    import argparse
+    ap = argparse.ArgumentParser(prog="main.py --history", description="List past attempts, newest first.")
+    ap.add_argument("--exam", help="only attempts at this exam (.json / .tfx / bank folder)")
+    ap.add_argument("--section", help="only attempts that had a section with this name")
+    ap.add_argument("--since", help="YYYY-MM-DD (inclusive)")
+    ap.add_argument("--until", help="YYYY-MM-DD (exclusive)")
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--offset", type=int, default=0)
+    a = ap.parse_args(argv)
+    day = lambda d: datetime.datetime.strptime(d, "%Y-%m-%d").timestamp() if d else None
+    filters = {"section": a.section, "since": day(a.since), "until": day(a.until)}
+    if a.exam:
+        try:
+            sections = load_exam_bank(a.exam)[0] if os.path.isdir(a.exam) else load_exam_cached(a.exam)
+        except Exception as ex:
+            print(f"Load failed: {ex}"); return 1
+        filters["exam_key"] = exam_identity(sections)[0]
+    store = AttemptStore()
+    n = store.count(**filters)
+    for aid, label, mode, finished, c, t in store.page(a.offset, a.limit, **filters):
+        p = (100.0*c/t) if t else 0.0
+        print(f"#{aid:<6} {_fmt_when(finished)}  {c:>5}/{t:<5} ({p:5.1f}%)  {(mode or ''):<8} {label}")
+    print(f"{n} attempt(s) match; showed {max(0, min(a.limit, n - a.offset))} from #{a.offset}")
+    return 0
+
+def analyze_main(argv):
+    """python main.py --analyze exam.json [responses...] [--since DATE] [--until DATE] [--json out.json]"""
+    import argparse
+    ap = argparse.ArgumentParser(prog="main.py --analyze", description="Item statistics (p, point-biserial, option "
+                                 "picks, KR-20) over every attempt at an exam in the history, or over response sheets.")
+    ap.add_argument("exam", help="exam .json / .tfx (or a bank folder)")
+    ap.add_argument("responses", nargs="*", help="response files / folders (default: the attempt history)")
+    ap.add_argument("--since", help="YYYY-MM-DD (history only)")
+    ap.add_argument("--until", help="YYYY-MM-DD (history only)")
+    ap.add_argument("--json", help="also write the full report here")
+    a = ap.parse_args(argv)
+    day = lambda d: datetime.datetime.strptime(d, "%Y-%m-%d").timestamp() if d else None
+    try:
+        sections = load_exam_bank(a.exam)[0] if os.path.isdir(a.exam) else load_exam_cached(a.exam)
+    except Exception as ex:
+        print(f"Load failed: {ex}"); return 1
+    t0 = time.perf_counter()
+    try:
+        if a.responses:
+            sheets, bad = [], 0
+            for fp in response_files(a.responses):
+                try: sheets.append(load_response_sheet(fp)[1])
+                except Exception as ex: bad += 1; print(f"Skipped {fp}: {ex}", file=sys.stderr)
+            report = analyze_sheets(sections, sheets)
+            report["label"] = a.exam
+        else:
+            report = analyze_history(AttemptStore(), exam_identity(sections)[0], since=day(a.since), until=day(a.until))
+    except (RuntimeError, KeyError) as ex:
+        print(f"Can't analyze: {ex.args[0] if ex.args else ex}"); return 1
+    print(format_analysis(report))
+    print(f"\n(analyzed in {time.perf_counter()-t0:.2f}s)", file=sys.stderr)
+    if a.json:
+        with open(a.json, "w", encoding="utf-8") as f: json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Wrote {a.json}", file=sys.stderr)
+    return 0
+
+def export_results_main(argv):
+    """python main.py --export-results exam.json [responses...] --out rows.csv[.gz] | rows.jsonl[.gz]"""
+    import argparse
+    ap = argparse.ArgumentParser(prog="main.py --export-results", description="One row per candidate x item "
+                                 "(candidate, section, item, response, key, correct) from the attempt history or response sheets.")
+    ap.add_argument("exam", help="exam .json / .tfx (or a bank folder)")
+    ap.add_argument("responses", nargs="*", help="response files / folders (default: the attempt history)")
+    ap.add_argument("--out", default="-", help=".csv / .jsonl, add .gz to compress (default: CSV to stdout)")
+    ap.add_argument("--format", choices=("csv", "jsonl"), help="override what --out's extension says")
+    ap.add_argument("--since", help="YYYY-MM-DD (history only)")
+    ap.add_argument("--until", help="YYYY-MM-DD (history only)")
+    a = ap.parse_args(argv)
+    day = lambda d: datetime.datetime.strptime(d, "%Y-%m-%d").timestamp() if d else None
+    try:
+        sections = load_exam_bank(a.exam)[0] if os.path.isdir(a.exam) else load_exam_cached(a.exam)
+    except Exception as ex:
+        print(f"Load failed: {ex}", file=sys.stderr); return 1
+    errors = []
+    if a.responses:
+        rows = iter_sheet_rows(sections, response_files(a.responses), errors)
+    else:
+        rows = iter_history_rows(AttemptStore(), exam_identity(sections)[0], since=day(a.since), until=day(a.until))
+    t0 = time.perf_counter()
+    n = write_result_rows(rows, a.out, a.format)
+    for fp, msg in errors: print(f"Skipped {fp}: {msg}", file=sys.stderr)
+    print(f"Wrote {n} row(s) to {'stdout' if a.out == '-' else a.out} in {time.perf_counter()-t0:.2f}s", file=sys.stderr)
+    return 1 if errors else 0
+
+def purge_cache_main(argv):
+    """python main.py --purge-cache"""
+    print(f"Removed {purge_exam_cache()} cached file(s) from {_exam_cache_dir()}")
+    return 0
+
+# headless command-line entry points: python main.py <flag> ...
+_CLI_COMMANDS = {
+    "--bench": bench_main,
+    "--compile": compile_main,
+    "--decompile": decompile_main,
+    "--purge-cache": purge_cache_main,
+    "--footprint": footprint_main,
+    "--grade": grade_main,
+    "--history": history_main,
+    "--analyze": analyze_main,
+    "--export-results": export_results_main,
+}
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in _CLI_COMMANDS:
+        sys.exit(_CLI_COMMANDS[sys.argv[1]](sys.argv[2:]))
     try:
         _log_runtime("Boot")
-        initial = sys.argv[1] if len(sys.argv)>1 and os.path.isfile(sys.argv[1]) else None
+        # one file, a folder, or several files / folders (a question bank)
+        given = [a for a in sys.argv[1:] if os.path.exists(a)]
+        initial = (given[0] if len(given) == 1 else given) or None
         App(initial).run()
         _log_runtime("Normal exit")
     except Exception as ex:
@@ -1279,4 +4589,6 @@ def main():
                 pass
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # bank loading uses a process pool; needed in frozen (.app/.exe) builds
     main()
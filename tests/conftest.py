@@ -0,0 +1,21 @@
+import os
+import sys
+
+# main.py is a single-file app at the repo root; headless pygame for anything that touches it
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point the per-user data dir (settings, history, exam cache, journal) at a temp dir."""
+    d = tmp_path / "data"
+    d.mkdir()
+    monkeypatch.setattr(main, "_DATA_DIR_OVERRIDE", str(d))
+    return d
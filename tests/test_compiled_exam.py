@@ -0,0 +1,93 @@
+import json
+import os
+import struct
+
+import pytest
+
+import main
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_exam.json")
+
+
+def _write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return str(path)
+
+
+def _roundtrip(tmp_path, src):
+    tfx, back = str(tmp_path / "exam.tfx"), str(tmp_path / "back.json")
+    main.compile_exam(src, tfx)
+    main.decompile_exam(tfx, back)
+    return tfx, back
+
+
+def test_sample_exam_roundtrip(tmp_path):
+    tfx, back = _roundtrip(tmp_path, SAMPLE)
+    expected = main.sections_to_json(main.parse_exam(SAMPLE))
+    assert main.sections_to_json(main.CompiledExam(tfx).sections) == expected
+    assert main.sections_to_json(main.parse_exam(back)) == expected
+
+
+def test_unicode_times_and_extra_keys_roundtrip(tmp_path):
+    src = _write(tmp_path / "u.json", {"sections": [
+        {"name": "Lecture — Français", "time_minutes": None, "items": [
+            {"q": "Qu'est-ce que «ça» ? 🙂", "choices": ["é", "ü", "日本語"], "ans": "C", "passage": "Ω≈ç√"},
+            {"q": "no passage", "choices": ["x", "y"], "ans": "a", "explanation": "weil ✓", "tags": ["t1", 2]},
+        ]},
+        {"name": "Zero", "time_minutes": 0, "items": [{"q": "open ended"}]},
+        {"name": "Float", "time_minutes": 12.5, "items": []},
+    ]})
+    tfx, back = _roundtrip(tmp_path, src)
+    expected = main.sections_to_json(main.parse_exam(src))
+    ex = main.CompiledExam(tfx)
+    assert [s.time_minutes for s in ex.sections] == [None, 0, 12.5]
+    assert main.sections_to_json(ex.sections) == expected
+    assert main.sections_to_json(main.parse_exam(back)) == expected
+    assert ex.sections[0][1][1]["explanation"] == "weil ✓"
+    assert ex.sections[0][1][0].extra is None
+
+
+def test_empty_exam(tmp_path):
+    tfx, _ = _roundtrip(tmp_path, _write(tmp_path / "e.json", {"sections": []}))
+    assert main.CompiledExam(tfx).sections == []
+
+
+def test_every_truncation_is_rejected(tmp_path):
+    tfx, _ = _roundtrip(tmp_path, SAMPLE)
+    data = open(tfx, "rb").read()
+    cut = str(tmp_path / "cut.tfx")
+    for n in range(len(data)):
+        with open(cut, "wb") as f: f.write(data[:n])
+        with pytest.raises(ValueError):
+            main.CompiledExam(cut)
+
+
+def test_corrupt_item_offset_is_rejected(tmp_path):
+    tfx, _ = _roundtrip(tmp_path, SAMPLE)
+    data = bytearray(open(tfx, "rb").read())
+    off_index = main._TFX_HEADER.unpack_from(data, 0)[7]
+    struct.pack_into("<Q", data, off_index, 10**9)
+    with open(tfx, "wb") as f: f.write(data)
+    with pytest.raises(ValueError, match="truncated or corrupt"):
+        main.CompiledExam(tfx)
+
+
+def test_not_a_compiled_exam(tmp_path):
+    with pytest.raises(ValueError):
+        main.CompiledExam(SAMPLE)
+
+
+def test_cache_rebuilds_corrupt_entry(tmp_path, data_dir):
+    src = _write(tmp_path / "x.json", {"sections": [
+        {"name": "S", "items": [{"q": "a", "choices": ["x"], "ans": "A", "explanation": "e"}]}]})
+    expected = main.sections_to_json(main.parse_exam(src))
+    main.load_exam_cached(src)
+    (tfx,) = [os.path.join(main._exam_cache_dir(), fn) for fn in os.listdir(main._exam_cache_dir()) if fn.endswith(".tfx")]
+    size = os.path.getsize(tfx)
+    with open(tfx, "r+b") as f: f.truncate(size - 3)
+    assert main.sections_to_json(main.load_exam_cached(src)) == expected
+    assert os.path.getsize(tfx) == size
+    hit = main.load_exam_cached(src)
+    assert isinstance(hit[0][1], main.CompiledItems)
+    assert main.sections_to_json(hit) == expected
@@ -0,0 +1,137 @@
+import json
+import os
+
+import pygame
+import pytest
+
+import main
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_exam.json")
+
+
+def _begin(**kw):
+    return (main.J_BEGIN, json.dumps(dict({"src": "exam.json", "label": "exam", "mode": "exam", "started": 1.0}, **kw)).encode())
+
+
+def _section(idx, name, n):
+    return (main.J_SECTION, main._J_SECTION.pack(idx, n) + name.encode("utf-8"))
+
+
+def _answer(idx, i, letter):
+    return (main.J_ANSWER, main._J_ANSWER.pack(idx, i, main._ANSWER_LETTERS.index(letter)))
+
+
+def _write(path, records, tail=b""):
+    with open(path, "wb") as f:
+        f.write(b"".join(main.journal_record(k, p) for k, p in records) + tail)
+
+
+def test_appends_replay(tmp_path):
+    path = str(tmp_path / "j")
+    jr = main.SessionJournal(path, [_begin(), _section(0, "Math", 3)])
+    for rec in (_answer(0, 0, "B"), _answer(0, 2, "D"), _answer(0, 0, "C"),
+                (main.J_NAV, main._J_NAV.pack(1, 0, 2)), (main.J_TIMER, main._J_TIMER.pack(0, 90_000)),
+                _section(1, "Reading", 2), (main.J_LOCK, main._J_IDX.pack(0))):
+        jr.append(*rec)
+    jr.close()
+    st = main.read_session_journal(path)
+    assert st["begin"]["src"] == "exam.json"
+    assert st["sections"] == {0: ("Math", 3), 1: ("Reading", 2)}
+    assert main.AnswerSheet.from_bytes(st["sheets"][0]).to_list() == ["C", None, "D"]
+    assert st["sheets"][1] == bytearray(2)
+    assert st["locked"] == {0}
+    assert st["nav"] == (1, 0, 2)
+    assert st["timer"] == (0, 90_000)
+
+
+def test_compaction_replaces_the_log(tmp_path):
+    path = str(tmp_path / "j")
+    jr = main.SessionJournal(path, [_begin(), _section(0, "Math", 2)])
+    for k in range(500):
+        jr.append(*_answer(0, k % 2, "ABCD"[k % 4]))
+    sheet = main.AnswerSheet.from_bytes(bytes(2)); sheet[0] = "A"; sheet[1] = "B"
+    jr.compact([_begin(), _section(0, "Math", 2), (main.J_SHEET, main._J_IDX.pack(0) + sheet.to_bytes())])
+    jr.append(*_answer(0, 1, "D"))
+    jr.close()
+    st = main.read_session_journal(path)
+    assert main.AnswerSheet.from_bytes(st["sheets"][0]).to_list() == ["A", "D"]
+    assert os.path.getsize(path) < 200
+    assert not os.path.exists(path + ".tmp")
+
+
+@pytest.mark.parametrize("tail", [b"\x03\x07", main._JREC.pack(main.J_ANSWER, 7, 0) + b"\x00\x00", b"\xff" * 64])
+def test_torn_tail_keeps_what_came_before(tmp_path, tail):
+    path = str(tmp_path / "j")
+    _write(path, [_begin(), _section(0, "Math", 2), _answer(0, 1, "C")], tail)
+    st = main.read_session_journal(path)
+    assert main.AnswerSheet.from_bytes(st["sheets"][0]).to_list() == [None, "C"]
+
+
+def test_bad_crc_stops_replay(tmp_path):
+    path = str(tmp_path / "j")
+    _write(path, [_begin(), _section(0, "Math", 2), _answer(0, 0, "A"), _answer(0, 1, "B")])
+    data = bytearray(open(path, "rb").read())
+    data[-1] ^= 0xFF  # last answer's payload no longer matches its crc
+    open(path, "wb").write(data)
+    st = main.read_session_journal(path)
+    assert main.AnswerSheet.from_bytes(st["sheets"][0]).to_list() == ["A", None]
+
+
+def test_nothing_to_resume(tmp_path):
+    path = str(tmp_path / "j")
+    assert main.read_session_journal(path) is None
+    _write(path, [_begin()])
+    assert main.read_session_journal(path) is None  # no section was ever opened
+
+
+def _app(settings):
+    return main.App(None, settings=dict(main.DEFAULT_SETTINGS, **settings))
+
+
+def test_apply_resume_restores_the_attempt(data_dir):
+    main.save_settings(dict(main.DEFAULT_SETTINGS, mode="practice"))
+    app = _app({"mode": "exam"})
+    app.load_exam_file(SAMPLE); app.wait_for_load()
+    name, items, _ = app.sections_all[0]
+    app.start_section(0)
+    app._set_answer(name, 0, "B"); app._set_answer(name, 1, "A")
+    app.time_left_ms = 123_456; app._journal_timer()
+    app.q_i = 1; app.frame([])
+    answers = {n: s.to_list() for n, s in app.answers.items()}
+    live = app.live.snapshot(app.sections_all, app.answers)["overall"]
+    app._jr.close()  # "crash": the file stays behind
+    app._jr = None
+    pygame.quit()
+
+    app = main.App(None)  # saved settings say practice; the journal says the attempt was in exam mode
+    assert app._resume is not None
+    app.resume_session(); app.wait_for_load()
+    assert app.state == main.S_SECTION and (app.sec_i, app.q_i) == (0, 1)
+    assert {n: s.to_list() for n, s in app.answers.items()} == answers
+    assert app.live.snapshot(app.sections_all, app.answers)["overall"] == live
+    assert app.mode == "exam" and app.timer.running()
+    assert 120_000 < app.time_left_ms <= 123_456
+    assert app.settings["mode"] == "practice"
+    assert main.load_settings()["mode"] == "practice"
+    app.finish_exam()
+    assert not os.path.exists(app._journal_path())
+    pygame.quit()
+
+
+def test_apply_resume_refuses_a_changed_exam(data_dir, tmp_path):
+    path = str(tmp_path / "exam.json")
+    with open(SAMPLE, encoding="utf-8") as f: data = json.load(f)
+    with open(path, "w", encoding="utf-8") as f: json.dump(data, f)
+    app = _app({})
+    app.load_exam_file(path); app.wait_for_load()
+    app.start_section(0); app._set_answer(app.sections_all[0][0], 0, "A"); app.frame([])
+    app._jr.close(); app._jr = None
+    pygame.quit()
+
+    data["sections"][0]["items"].append({"q": "new", "choices": ["x", "y"], "ans": "A"})
+    with open(path, "w", encoding="utf-8") as f: json.dump(data, f)
+    app = main.App(None)
+    app.resume_session(); app.wait_for_load()
+    assert app.state != main.S_SECTION
+    assert not any(s.to_list()[0] for s in app.answers.values())
+    pygame.quit()